@@ -1,6 +1,14 @@
-from cache_toolbox.core import get_cached_content, set_cached_content, del_cached_content
+from datetime import datetime
+from StringIO import StringIO
+
+from mock import patch
+from cache_toolbox.core import (
+    get_cached_content, set_cached_content, del_cached_content, stream_and_cache_in_chunks, ChunkedCachedContent
+)
 from opaque_keys.edx.locations import Location
+from django.core.cache import get_cache
 from django.test import TestCase
+from xmodule.contentstore.content import StaticContentStream
 
 
 class Content(object):
@@ -38,3 +46,83 @@ class CachingTestCase(TestCase):
                          'should not be stored in cache with unicodeLocation')
         self.assertEqual(None, get_cached_content(self.nonUnicodeLocation),
                          'should not be stored in cache with nonUnicodeLocation')
+
+
+@patch('cache_toolbox.core.app_settings.CACHE_TOOLBOX_CONTENT_CHUNK_SIZE', 10)
+class ChunkedCachingTestCase(TestCase):
+    """
+    Tests of the caching of large contents in chunks.
+    """
+    location = Location(u'c4x', u'mitX', u'800', u'run', u'asset', u'lecture.pdf')
+    data = ''.join(str(i % 10) for i in xrange(95))
+
+    def setUp(self):
+        super(ChunkedCachingTestCase, self).setUp()
+        self.chunk_cache = get_cache('django.core.cache.backends.locmem.LocMemCache', LOCATION='test_content_chunks')
+        self.chunk_cache.clear()
+        patcher = patch('cache_toolbox.core.content_chunk_cache', return_value=self.chunk_cache)
+        self.mock_chunk_cache = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(del_cached_content, self.location)
+
+    def content_stream(self):
+        """
+        Returns a stream of the test data, as fetched from the contentstore.
+        """
+        return StaticContentStream(
+            self.location, 'lecture.pdf', 'application/pdf', StringIO(self.data),
+            last_modified_at=datetime(2015, 1, 1), length=len(self.data)
+        )
+
+    def cache_content(self):
+        """
+        Stream the test data while caching it in chunks and return what's cached for it.
+        """
+        self.assertEqual(''.join(stream_and_cache_in_chunks(self.content_stream())), self.data)
+        return get_cached_content(self.location)
+
+    def test_stream_data(self):
+        cached_content = self.cache_content()
+        self.assertEqual(cached_content.length, len(self.data))
+        self.assertEqual(''.join(cached_content.stream_data()), self.data)
+
+    def test_stream_data_in_range(self):
+        cached_content = self.cache_content()
+        for first_byte, last_byte in [(0, 9), (5, 5), (5, 34), (30, 94), (90, 94)]:
+            self.assertEqual(
+                ''.join(cached_content.stream_data_in_range(first_byte, last_byte)),
+                self.data[first_byte:last_byte + 1]
+            )
+
+    def test_no_chunk_cache(self):
+        self.mock_chunk_cache.return_value = None
+        self.assertIsNone(self.cache_content())
+
+    def test_interrupted_stream(self):
+        stream = stream_and_cache_in_chunks(self.content_stream())
+        next(stream)
+        stream.close()
+        # Only complete contents get cached, and another process may now cache it
+        self.assertIsNone(get_cached_content(self.location))
+        self.assertIsNotNone(self.cache_content())
+
+    def test_concurrent_fill(self):
+        fill_lock_key = ChunkedCachedContent(self.content_stream(), 10).chunk_key('filling')
+        self.chunk_cache.add(fill_lock_key, True)
+        # Another process is caching it: just stream it
+        self.assertIsNone(self.cache_content())
+        self.chunk_cache.delete(fill_lock_key)
+        self.assertIsNotNone(self.cache_content())
+
+    @patch('xmodule.assetstore.assetmgr.AssetManager.find')
+    def test_evicted_chunk(self, mock_find):
+        cached_content = self.cache_content()
+        self.chunk_cache.delete(cached_content.chunk_key(2))
+        mock_find.return_value = StaticContentStream(
+            self.location, 'lecture.pdf', 'application/pdf', StringIO(self.data), length=len(self.data)
+        )
+
+        self.assertEqual(''.join(cached_content.stream_data_in_range(5, 44)), self.data[5:45])
+        mock_find.assert_called_once_with(self.location, as_stream=True)
+        # The content gets cached anew
+        self.assertIsNone(get_cached_content(self.location))
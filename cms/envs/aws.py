@@ -141,6 +141,9 @@ if 'loc_cache' not in CACHES:
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'edx_location_mem_cache',
     }
+COURSE_STRUCTURE_CACHE_MAX_ENTRY_SIZE = ENV_TOKENS.get(
+    'COURSE_STRUCTURE_CACHE_MAX_ENTRY_SIZE', COURSE_STRUCTURE_CACHE_MAX_ENTRY_SIZE
+)
 
 SESSION_COOKIE_DOMAIN = ENV_TOKENS.get('SESSION_COOKIE_DOMAIN')
 SESSION_COOKIE_HTTPONLY = ENV_TOKENS.get('SESSION_COOKIE_HTTPONLY', True)
@@ -254,6 +257,10 @@ if AWS_SECRET_ACCESS_KEY == "":
 DATABASES = AUTH_TOKENS['DATABASES']
 MODULESTORE = convert_module_store_setting_if_needed(AUTH_TOKENS.get('MODULESTORE', MODULESTORE))
 CONTENTSTORE = AUTH_TOKENS['CONTENTSTORE']
+STATIC_CONTENT_CACHE_TTL = ENV_TOKENS.get('STATIC_CONTENT_CACHE_TTL', STATIC_CONTENT_CACHE_TTL)
+STATIC_CONTENT_COURSE_CACHE_TTLS = ENV_TOKENS.get(
+    'STATIC_CONTENT_COURSE_CACHE_TTLS', STATIC_CONTENT_COURSE_CACHE_TTLS
+)
 DOC_STORE_CONFIG = AUTH_TOKENS['DOC_STORE_CONFIG']
 # Datadog for events!
 DATADOG = AUTH_TOKENS.get("DATADOG", {})
@@ -327,6 +327,18 @@ XBLOCK_SELECT_FUNCTION = prefer_xmodules
 ############################ Modulestore Configuration ################################
 MODULESTORE_BRANCH = 'draft-preferred'
 
+# Lifetime (in seconds) of the unlocked contentstore assets in browsers' and CDNs' caches,
+# for the courses not mapped to a specific lifetime in STATIC_CONTENT_COURSE_CACHE_TTLS.
+# Locked assets are only cached privately.
+STATIC_CONTENT_CACHE_TTL = 60 * 60 * 24
+STATIC_CONTENT_COURSE_CACHE_TTLS = {}
+
+# Largest size (in bytes, once compressed) of the split modulestore structures
+# stored in the 'course_structure_cache' cache; larger ones are only cached in
+# each process. Keep it below the item size limit of the cache backend, e.g.
+# memcached's 1MB default, which drops larger values without any error.
+COURSE_STRUCTURE_CACHE_MAX_ENTRY_SIZE = 1000 * 1000
+
 MODULESTORE = {
     'default': {
         'ENGINE': 'xmodule.modulestore.mixed.MixedModuleStore',
@@ -6,3 +6,26 @@ CACHE_TOOLBOX_DEFAULT_TIMEOUT = getattr(
     'CACHE_TOOLBOX_DEFAULT_TIMEOUT',
     60 * 60 * 24 * 3,
 )
+
+# Size of the chunks in which contents too large to be cached as a single
+# value are cached; it must fit in a single cache value.
+CACHE_TOOLBOX_CONTENT_CHUNK_SIZE = getattr(
+    settings,
+    'CACHE_TOOLBOX_CONTENT_CHUNK_SIZE',
+    512 * 1024,
+)
+
+# How long a process may take to stream a content while caching it in chunks
+# before another process may start caching it
+CACHE_TOOLBOX_CONTENT_FILL_TIMEOUT = getattr(
+    settings,
+    'CACHE_TOOLBOX_CONTENT_FILL_TIMEOUT',
+    5 * 60,
+)
+
+# Contents larger than this are never cached
+CACHE_TOOLBOX_MAX_CHUNKED_CONTENT_LENGTH = getattr(
+    settings,
+    'CACHE_TOOLBOX_MAX_CHUNKED_CONTENT_LENGTH',
+    100 * 1024 * 1024,
+)
@@ -7,13 +7,17 @@ Core methods
 .. autofunction:: cache_toolbox.core.instance_key
 
 """
+import logging
 
-from django.core.cache import cache
+from django.core.cache import cache, get_cache, InvalidCacheBackendError
 from django.db import DEFAULT_DB_ALIAS
 from opaque_keys import InvalidKeyError
+from xmodule.contentstore.content import StaticContent
 
 from . import app_settings
 
+log = logging.getLogger(__name__)
+
 
 def get_instance(model, instance_or_pk, timeout=None, using=None):
     """
@@ -118,6 +122,118 @@ def get_cached_content(location):
     return cache.get(unicode(location).encode("utf-8"))
 
 
+def content_chunk_cache():
+    """
+    Returns the cache holding the chunks of the contents cached in chunks, or
+    None if no 'content_chunks' cache is configured: large contents are then
+    never cached, so that they don't evict the entries of the default cache.
+    """
+    try:
+        return get_cache('content_chunks')
+    except InvalidCacheBackendError:
+        return None
+
+
+class ChunkedCachedContent(StaticContent):
+    """
+    The cached metadata of a content too large to be cached as a single value,
+    whose data is cached in chunks of `chunk_size` bytes and read from the
+    cache chunk by chunk as it is streamed.
+    """
+    def __init__(self, content, chunk_size):
+        super(ChunkedCachedContent, self).__init__(
+            content.location, content.name, content.content_type, None,
+            last_modified_at=content.last_modified_at, thumbnail_location=content.thumbnail_location,
+            import_path=content.import_path, length=content.length, locked=content.locked,
+            content_digest=content.content_digest
+        )
+        self.chunk_size = chunk_size
+
+    def chunk_key(self, index):
+        """
+        The cache key of the chunk `index`, which changes with each version of the content.
+        """
+        return u"{}:{}:{}:{}".format(
+            self.location, self.last_modified_at.strftime("%Y%m%d%H%M%S%f"), self.chunk_size, index
+        ).encode("utf-8")
+
+    def stream_data(self):
+        return self.stream_data_in_range(0, self.length - 1)
+
+    def stream_data_in_range(self, first_byte, last_byte):
+        """
+        Stream the data between first_byte and last_byte (included)
+        """
+        chunk_cache = content_chunk_cache()
+        first_index = first_byte // self.chunk_size
+        last_index = last_byte // self.chunk_size
+        for index in xrange(first_index, last_index + 1):
+            chunk_start = index * self.chunk_size
+            chunk = chunk_cache.get(self.chunk_key(index)) if chunk_cache is not None else None
+            if chunk is None:
+                # The chunk was evicted: stream the rest from the DB, and
+                # cache the content anew the next time it's requested
+                log.info(u"Chunk %d of %s is not cached", index, self.location)
+                # Imported here as the modulestore isn't needed when loading this module
+                from xmodule.assetstore.assetmgr import AssetManager
+                del_cached_content(self.location)
+                content = AssetManager.find(self.location, as_stream=True)
+                for data in content.stream_data_in_range(max(first_byte, chunk_start), last_byte):
+                    yield data
+                return
+            yield chunk[max(first_byte - chunk_start, 0):last_byte - chunk_start + 1]
+
+
+def stream_and_cache_in_chunks(content):
+    """
+    Stream the data of `content`, a `StaticContentStream`, caching it in
+    chunks as it goes, then cache its metadata once all of its chunks are
+    cached, so that the following requests are served from the cache.
+
+    Only one process fills the cache for a given version of a content at a
+    time; the others concurrently requesting it just stream it from the DB.
+    Nothing gets cached if no 'content_chunks' cache is configured.
+    """
+    chunk_cache = content_chunk_cache()
+    if chunk_cache is None:
+        for data in content.stream_data():
+            yield data
+        return
+
+    chunk_size = app_settings.CACHE_TOOLBOX_CONTENT_CHUNK_SIZE
+    cached_content = ChunkedCachedContent(content, chunk_size)
+    fill_lock_key = cached_content.chunk_key('filling')
+    if not chunk_cache.add(fill_lock_key, True, app_settings.CACHE_TOOLBOX_CONTENT_FILL_TIMEOUT):
+        for data in content.stream_data():
+            yield data
+        return
+
+    try:
+        index = 0
+        buffered = []
+        buffered_length = 0
+        for data in content.stream_data():
+            yield data
+            buffered.append(data)
+            buffered_length += len(data)
+            if buffered_length >= chunk_size:
+                buffered_data = ''.join(buffered)
+                while len(buffered_data) >= chunk_size:
+                    chunk_cache.set(cached_content.chunk_key(index), buffered_data[:chunk_size])
+                    index += 1
+                    buffered_data = buffered_data[chunk_size:]
+                buffered = [buffered_data]
+                buffered_length = len(buffered_data)
+        if buffered_length:
+            chunk_cache.set(cached_content.chunk_key(index), ''.join(buffered))
+
+        # Only cache the metadata once all of its chunks are cached (if the
+        # client disconnects before, the generator is closed and it isn't)
+        set_cached_content(cached_content)
+    finally:
+        chunk_cache.delete(fill_lock_key)
+
+
 def del_cached_content(location):
     """
     delete content for the given location, as well as for content with run=None.
@@ -3,7 +3,9 @@ Middleware to serve assets.
 """
 
 import logging
+from uuid import uuid4
 
+from django.conf import settings
 from django.http import (
     HttpResponse, HttpResponseNotModified, HttpResponseForbidden
 )
@@ -14,7 +16,8 @@ from xmodule.contentstore.content import StaticContent, XASSET_LOCATION_TAG
 from xmodule.modulestore import InvalidLocationError
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.locator import AssetLocator
-from cache_toolbox.core import get_cached_content, set_cached_content
+from cache_toolbox import app_settings as cache_settings
+from cache_toolbox.core import get_cached_content, set_cached_content, stream_and_cache_in_chunks
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.exceptions import NotFoundError
 
@@ -43,7 +46,10 @@ class StaticContentServer(object):
 
             # first look in our cache so we don't have to round-trip to the DB
             content = get_cached_content(loc)
-            if content is None:
+            # whether the content was fetched from the DB, in which case it is
+            # cached once the request is known to need its data
+            fetched = content is None
+            if fetched:
                 # nope, not in cache, let's fetch from DB
                 try:
                     content = AssetManager.find(loc, as_stream=True)
@@ -51,14 +57,6 @@ class StaticContentServer(object):
                     response = HttpResponse()
                     response.status_code = 404
                     return response
-
-                # since we fetched it from DB, let's cache it going forward, but only if it's < 1MB
-                # this is because I haven't been able to find a means to stream data out of memcached
-                if content.length is not None:
-                    if content.length < 1048576:
-                        # since we've queried as a stream, let's read in the stream into memory to set in cache
-                        content = content.copy_to_in_mem()
-                        set_cached_content(content)
             else:
                 # NOP here, but we may wish to add a "cache-hit" counter in the future
                 pass
@@ -81,25 +79,42 @@ class StaticContentServer(object):
             # timestamp, so we can simply compare the strings
             last_modified_at_str = content.last_modified_at.strftime("%a, %d-%b-%Y %H:%M:%S GMT")
 
+            # The contentstore's digest of the data makes a strong ETag
+            # (getattr b/c caching may mean some pickled instances don't have attr)
+            content_digest = getattr(content, 'content_digest', None)
+            etag = '"{}"'.format(content_digest) if content_digest else None
+            cache_control = get_cache_control(loc, getattr(content, "locked", False))
+
             # see if the client has cached this content, if so then compare the
-            # timestamps, if they are the same then just return a 304 (Not Modified)
-            if 'HTTP_IF_MODIFIED_SINCE' in request.META:
-                if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
-                if if_modified_since == last_modified_at_str:
-                    return HttpResponseNotModified()
+            # ETags or, failing that, the timestamps, if they are the same then
+            # just return a 304 (Not Modified)
+            if etag is not None and 'HTTP_IF_NONE_MATCH' in request.META:
+                not_modified = etag_matches(request.META['HTTP_IF_NONE_MATCH'], etag)
+            else:
+                not_modified = request.META.get('HTTP_IF_MODIFIED_SINCE') == last_modified_at_str
+            if not_modified:
+                response = HttpResponseNotModified()
+                if etag is not None:
+                    response['ETag'] = etag
+                response['Cache-Control'] = cache_control
+                return response
+
+            # since we fetched it from DB, let's cache it going forward: contents < 1MB
+            # as a whole now, larger ones in chunks as they are fully streamed
+            if fetched and content.length is not None and content.length < 1048576:
+                # since we've queried as a stream, let's read in the stream into memory to set in cache
+                content = content.copy_to_in_mem()
+                set_cached_content(content)
 
             # *** File streaming within a byte range ***
             # If a Range is provided, parse Range attribute of the request
             # Add Content-Range in the response if Range is structurally correct
-            # Request -> Range attribute structure: "Range: bytes=first-[last]"
+            # Request -> Range attribute structure: "Range: bytes=first-[last](, first-[last])*"
             # Response -> Content-Range attribute structure: "Content-Range: bytes first-last/totalLength"
             # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.35
             response = None
+            content_type = content.content_type
             if request.META.get('HTTP_RANGE'):
-                # Data from cache (StaticContent) has no easy byte management, so we use the DB instead (StaticContentStream)
-                if type(content) == StaticContent:
-                    content = AssetManager.find(loc, as_stream=True)
-
                 header_value = request.META['HTTP_RANGE']
                 try:
                     unit, ranges = parse_range_header(header_value, content.length)
@@ -112,43 +127,117 @@ class StaticContentServer(object):
                     if unit != 'bytes':
                         # Only accept ranges in bytes
                         log.warning(u"Unknown unit in Range header: %s for content: %s", header_value, unicode(loc))
-                    elif len(ranges) > 1:
-                        # According to Http/1.1 spec content for multiple ranges should be sent as a multipart message.
-                        # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
-                        # But we send back the full content.
-                        log.warning(
-                            u"More than 1 ranges in Range header: %s for content: %s", header_value, unicode(loc)
-                        )
                     else:
-                        first, last = ranges[0]
-
-                        if 0 <= first <= last < content.length:
-                            # If the byte range is satisfiable
+                        # Only send the satisfiable byte ranges
+                        ranges = [(first, last) for first, last in ranges if 0 <= first <= last < content.length]
+                        if not ranges:
+                            log.warning(
+                                u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
+                            )
+                            return HttpResponse(status=416)  # Requested Range Not Satisfiable
+                        elif len(ranges) == 1:
+                            first, last = ranges[0]
                             response = HttpResponse(content.stream_data_in_range(first, last))
                             response['Content-Range'] = 'bytes {first}-{last}/{length}'.format(
                                 first=first, last=last, length=content.length
                             )
                             response['Content-Length'] = str(last - first + 1)
-                            response.status_code = 206  # Partial Content
                         else:
-                            log.warning(
-                                u"Cannot satisfy ranges in Range header: %s for content: %s", header_value, unicode(loc)
-                            )
-                            return HttpResponse(status=416)  # Requested Range Not Satisfiable
+                            # According to Http/1.1 spec content for multiple ranges is sent as a multipart message.
+                            # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
+                            boundary = uuid4().hex
+                            body, length = multipart_byteranges(content, ranges, boundary)
+                            response = HttpResponse(body)
+                            response['Content-Length'] = str(length)
+                            content_type = 'multipart/byteranges; boundary={}'.format(boundary)
+                        response.status_code = 206  # Partial Content
 
             # If Range header is absent or syntactically invalid return a full content response.
             if response is None:
-                response = HttpResponse(content.stream_data())
+                if (
+                    fetched and content.length is not None and
+                    1048576 <= content.length <= cache_settings.CACHE_TOOLBOX_MAX_CHUNKED_CONTENT_LENGTH
+                ):
+                    response = HttpResponse(stream_and_cache_in_chunks(content))
+                else:
+                    response = HttpResponse(content.stream_data())
                 response['Content-Length'] = content.length
 
             # "Accept-Ranges: bytes" tells the user that only "bytes" ranges are allowed
             response['Accept-Ranges'] = 'bytes'
-            response['Content-Type'] = content.content_type
+            response['Content-Type'] = content_type
             response['Last-Modified'] = last_modified_at_str
+            if etag is not None:
+                response['ETag'] = etag
+            response['Cache-Control'] = cache_control
 
             return response
 
 
+def get_cache_control(location, locked):
+    """
+    Returns the Cache-Control header value for the asset at `location`.
+
+    Locked assets may only be cached by the browser of the user, and must be
+    revalidated (which checks the user's access); the others may be cached by
+    anyone for the lifetime configured for their course.
+    """
+    if locked:
+        return 'private, no-cache'
+    max_age = settings.STATIC_CONTENT_COURSE_CACHE_TTLS.get(
+        unicode(location.course_key), settings.STATIC_CONTENT_CACHE_TTL
+    )
+    return 'public, max-age={}'.format(max_age)
+
+
+def etag_matches(header_value, etag):
+    """
+    Returns whether the If-None-Match header value `header_value` matches `etag`.
+
+    See spec for details: http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.26
+    """
+    for entity_tag in header_value.split(','):
+        entity_tag = entity_tag.strip()
+        # The weak comparison function can be used with If-None-Match on GET requests.
+        if entity_tag.startswith('W/'):
+            entity_tag = entity_tag[2:]
+        if entity_tag in ('*', etag):
+            return True
+    return False
+
+
+def multipart_byteranges(content, ranges, boundary):
+    """
+    Returns a generator of the multipart/byteranges body with the `ranges` of
+    `content`, separated by `boundary`, along with the length of this body.
+
+    See spec for details: http://www.w3.org/Protocols/rfc2616/rfc2616-sec19.html#sec19.2
+    """
+    part_headers = [
+        '--{boundary}\r\nContent-Type: {content_type}\r\nContent-Range: bytes {first}-{last}/{length}\r\n\r\n'.format(
+            boundary=boundary, content_type=content.content_type, first=first, last=last, length=content.length
+        )
+        for first, last in ranges
+    ]
+    closing = '--{}--\r\n'.format(boundary)
+
+    def body():
+        """
+        Streams each range preceded by its part's headers.
+        """
+        for part_header, (first, last) in zip(part_headers, ranges):
+            yield part_header
+            for chunk in content.stream_data_in_range(first, last):
+                yield chunk
+            yield '\r\n'
+        yield closing
+
+    length = sum(
+        len(part_header) + (last - first + 1) + 2 for part_header, (first, last) in zip(part_headers, ranges)
+    ) + len(closing)
+    return body(), length
+
+
 def parse_range_header(header_value, content_length):
     """
     Returns the unit and a list of (start, end) tuples of ranges.
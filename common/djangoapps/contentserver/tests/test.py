@@ -146,7 +146,7 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
 
     def test_range_request_multiple_ranges(self):
         """
-        Test that multiple ranges in request outputs the full content.
+        Test that multiple ranges in request outputs a multipart message with each range.
         """
         first_byte = self.length_unlocked / 4
         last_byte = self.length_unlocked / 2
@@ -154,9 +154,53 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
             first=first_byte, last=last_byte)
         )
 
-        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.status_code, 206)  # HTTP_206_PARTIAL_CONTENT
         self.assertNotIn('Content-Range', resp)
-        self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
+        self.assertTrue(resp['Content-Type'].startswith('multipart/byteranges; boundary='))
+        self.assertEqual(resp['Content-Length'], str(len(resp.content)))
+        for first, last in [(first_byte, last_byte), (max(0, self.length_unlocked - 100), self.length_unlocked - 1)]:
+            self.assertIn(
+                'Content-Range: bytes {first}-{last}/{length}'.format(
+                    first=first, last=last, length=self.length_unlocked
+                ),
+                resp.content
+            )
+
+    def test_etag(self):
+        """
+        Test that assets are served with a strong ETag, and not served again if it matches If-None-Match.
+        """
+        resp = self.client.get(self.url_unlocked)
+        etag = resp['ETag']
+        self.assertEqual(etag, '"{}"'.format(self.contentstore.get_attr(self.unlocked_asset, 'md5')))
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp['ETag'], etag)
+
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH='"not-the-etag"')
+        self.assertEqual(resp.status_code, 200)
+
+    @override_settings(STATIC_CONTENT_CACHE_TTL=60)
+    def test_cache_control_unlocked(self):
+        """
+        Test that unlocked assets may be cached publicly, for their course's lifetime if there's one.
+        """
+        resp = self.client.get(self.url_unlocked)
+        self.assertEqual(resp['Cache-Control'], 'public, max-age=60')
+
+        with override_settings(STATIC_CONTENT_COURSE_CACHE_TTLS={unicode(self.course_key): 3600}):
+            resp = self.client.get(self.url_unlocked)
+        self.assertEqual(resp['Cache-Control'], 'public, max-age=3600')
+
+    def test_cache_control_locked(self):
+        """
+        Test that locked assets may only be cached privately.
+        """
+        self.client.login(username=self.staff_usr, password=self.staff_pwd)
+        resp = self.client.get(self.url_locked)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp['Cache-Control'], 'private, no-cache')
 
     @ddt.data(
         'bytes 0-',
@@ -1,5 +1,7 @@
+from collections import OrderedDict
 import logging
 import re
+import threading
 
 from staticfiles.storage import staticfiles_storage
 from staticfiles import finders
@@ -14,6 +16,46 @@ from opaque_keys.edx.locator import AssetLocator
 log = logging.getLogger(__name__)
 
 
+class _BoundedCache(object):
+    """
+    A thread-safe dict of at most `size` entries, which evicts the least
+    recently used ones.
+    """
+    def __init__(self, size):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        """
+        Returns the value for `key`, calling `compute()` to get it if it isn't cached.
+        """
+        with self._lock:
+            if key in self._entries:
+                # Move it back to the most recently used end
+                value = self._entries.pop(key)
+                self._entries[key] = value
+                return value
+
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return value
+
+
+# Compiled url replacement regexes, by prefix
+_COMPILED_REGEXES = _BoundedCache(256)
+
+# Whether a path exists in the staticfiles storage, which only changes when
+# the static files are collected, i.e. when deploying
+_STATICFILES_EXISTS = _BoundedCache(4096)
+
+# Types of the stores of the courses
+_MODULESTORE_TYPES = _BoundedCache(1024)
+
+
 def _url_replace_regex(prefix):
     """
     Match static urls in quotes that don't end in '?raw'.
@@ -30,6 +72,45 @@ def _url_replace_regex(prefix):
         """.format(prefix=prefix)
 
 
+def _compiled_url_replace_regex(prefix):
+    """
+    The compiled _url_replace_regex for `prefix`.
+    """
+    return _COMPILED_REGEXES.get_or_compute(prefix, lambda: re.compile(_url_replace_regex(prefix)))
+
+
+def _static_prefix_regex(data_dir):
+    """
+    The prefixes of the static urls which aren't already in `data_dir`.
+    """
+    return u'(?:{static_url}|/static/)(?!{data_dir})'.format(
+        static_url=settings.STATIC_URL,
+        data_dir=data_dir
+    )
+
+
+def _staticfiles_exists(path):
+    """
+    Returns whether `path` exists in staticfiles_storage.
+    """
+    # Keyed by the storage too, so that each storage has its own entries
+    return _STATICFILES_EXISTS.get_or_compute(
+        (staticfiles_storage, path),
+        lambda: staticfiles_storage.exists(path)
+    )
+
+
+def _get_modulestore_type(course_id):
+    """
+    Returns the type of the store of the course `course_id`.
+    """
+    store = modulestore()
+    return _MODULESTORE_TYPES.get_or_compute(
+        (store, course_id),
+        lambda: store.get_modulestore_type(course_id)
+    )
+
+
 def try_staticfiles_lookup(path):
     """
     Try to lookup a path in staticfiles_storage.  If it fails, return
@@ -71,7 +152,7 @@ def replace_jump_to_id_urls(text, course_id, jump_to_id_base_url):
         rest = match.group('rest')
         return "".join([quote, jump_to_id_base_url + rest, quote])
 
-    return re.sub(_url_replace_regex('/jump_to_id/'), replace_jump_to_id_url, text)
+    return _compiled_url_replace_regex('/jump_to_id/').sub(replace_jump_to_id_url, text)
 
 
 def replace_course_urls(text, course_key):
@@ -91,7 +172,7 @@ def replace_course_urls(text, course_key):
         rest = match.group('rest')
         return "".join([quote, '/courses/' + course_id + '/', rest, quote])
 
-    return re.sub(_url_replace_regex('/course/'), replace_course_url, text)
+    return _compiled_url_replace_regex('/course/').sub(replace_course_url, text)
 
 
 def process_static_urls(text, replacement_function, data_dir=None):
@@ -110,14 +191,7 @@ def process_static_urls(text, replacement_function, data_dir=None):
         rest = match.group('rest')
         return replacement_function(original, prefix, quote, rest)
 
-    return re.sub(
-        _url_replace_regex(u'(?:{static_url}|/static/)(?!{data_dir})'.format(
-            static_url=settings.STATIC_URL,
-            data_dir=data_dir
-        )),
-        wrap_part_extraction,
-        text
-    )
+    return _compiled_url_replace_regex(_static_prefix_regex(data_dir)).sub(wrap_part_extraction, text)
 
 
 def make_static_urls_absolute(request, html):
@@ -137,6 +211,59 @@ def make_static_urls_absolute(request, html):
     )
 
 
+def _replace_static_url(original, prefix, quote, rest, data_directory, course_id, static_asset_path):
+    """
+    Replace a single matched static url (see replace_static_urls).
+    """
+    # Don't mess with things that end in '?raw'
+    if rest.endswith('?raw'):
+        return original
+
+    # In debug mode, if we can find the url as is,
+    if settings.DEBUG and finders.find(rest, True):
+        return original
+    # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
+    elif (not static_asset_path) \
+            and course_id \
+            and _get_modulestore_type(course_id) != ModuleStoreEnum.Type.xml:
+        # first look in the static file pipeline and see if we are trying to reference
+        # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
+
+        exists_in_staticfiles_storage = False
+        try:
+            exists_in_staticfiles_storage = _staticfiles_exists(rest)
+        except Exception as err:
+            log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
+                rest, str(err)))
+
+        if exists_in_staticfiles_storage:
+            url = staticfiles_storage.url(rest)
+        else:
+            # if not, then assume it's courseware specific content and then look in the
+            # Mongo-backed database
+            url = StaticContent.convert_legacy_static_url_with_course_id(rest, course_id)
+
+            if AssetLocator.CANONICAL_NAMESPACE in url:
+                url = url.replace('block@', 'block/', 1)
+
+    # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
+    else:
+        course_path = "/".join((static_asset_path or data_directory, rest))
+
+        try:
+            if _staticfiles_exists(rest):
+                url = staticfiles_storage.url(rest)
+            else:
+                url = staticfiles_storage.url(course_path)
+        # And if that fails, assume that it's course content, and add manually data directory
+        except Exception as err:
+            log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
+                rest, str(err)))
+            url = "".join([prefix, course_path])
+
+    return "".join([quote, url, quote])
+
+
 def replace_static_urls(text, data_directory=None, course_id=None, static_asset_path=''):
     """
     Replace /static/$stuff urls either with their correct url as generated by collectstatic,
@@ -154,52 +281,39 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
         """
         Replace a single matched url.
         """
-        # Don't mess with things that end in '?raw'
-        if rest.endswith('?raw'):
-            return original
-
-        # In debug mode, if we can find the url as is,
-        if settings.DEBUG and finders.find(rest, True):
-            return original
-        # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
-        elif (not static_asset_path) \
-                and course_id \
-                and modulestore().get_modulestore_type(course_id) != ModuleStoreEnum.Type.xml:
-            # first look in the static file pipeline and see if we are trying to reference
-            # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
-
-            exists_in_staticfiles_storage = False
-            try:
-                exists_in_staticfiles_storage = staticfiles_storage.exists(rest)
-            except Exception as err:
-                log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
-                    rest, str(err)))
-
-            if exists_in_staticfiles_storage:
-                url = staticfiles_storage.url(rest)
-            else:
-                # if not, then assume it's courseware specific content and then look in the
-                # Mongo-backed database
-                url = StaticContent.convert_legacy_static_url_with_course_id(rest, course_id)
+        return _replace_static_url(original, prefix, quote, rest, data_directory, course_id, static_asset_path)
 
-                if AssetLocator.CANONICAL_NAMESPACE in url:
-                    url = url.replace('block@', 'block/', 1)
+    return process_static_urls(text, replace_static_url, data_dir=static_asset_path or data_directory)
 
-        # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
-        else:
-            course_path = "/".join((static_asset_path or data_directory, rest))
 
-            try:
-                if staticfiles_storage.exists(rest):
-                    url = staticfiles_storage.url(rest)
-                else:
-                    url = staticfiles_storage.url(course_path)
-            # And if that fails, assume that it's course content, and add manually data directory
-            except Exception as err:
-                log.warning("staticfiles_storage couldn't find path {0}: {1}".format(
-                    rest, str(err)))
-                url = "".join([prefix, course_path])
+def replace_urls(text, course_id, jump_to_id_base_url, data_directory=None, static_asset_path=''):
+    """
+    Apply replace_static_urls, replace_course_urls and replace_jump_to_id_urls
+    to `text` in a single pass.
 
-        return "".join([quote, url, quote])
+    text: The source text to do the substitution in
+    course_id: The course in which this rewrite happens
+    jump_to_id_base_url: The base of the jump_to_id urls (see replace_jump_to_id_urls)
+    data_directory, static_asset_path: see replace_static_urls
+    """
+    deprecated_course_id = course_id.to_deprecated_string()
+    regex = _compiled_url_replace_regex(u'{static}|/course/|/jump_to_id/'.format(
+        static=_static_prefix_regex(static_asset_path or data_directory)
+    ))
 
-    return process_static_urls(text, replace_static_url, data_dir=static_asset_path or data_directory)
+    def replace_url(match):
+        """
+        Replace a single matched url, according to its prefix.
+        """
+        prefix = match.group('prefix')
+        quote = match.group('quote')
+        rest = match.group('rest')
+        if prefix == '/course/':
+            return "".join([quote, '/courses/' + deprecated_course_id + '/', rest, quote])
+        elif prefix == '/jump_to_id/':
+            return "".join([quote, jump_to_id_base_url + rest, quote])
+        return _replace_static_url(
+            match.group(0), prefix, quote, rest, data_directory, course_id, static_asset_path
+        )
+
+    return regex.sub(replace_url, text)
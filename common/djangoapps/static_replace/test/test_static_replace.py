@@ -4,6 +4,8 @@ from nose.tools import assert_equals, assert_true, assert_false  # pylint: disab
 from static_replace import (
     replace_static_urls,
     replace_course_urls,
+    replace_jump_to_id_urls,
+    replace_urls,
     _url_replace_regex,
     process_static_urls,
     make_static_urls_absolute
@@ -143,6 +145,52 @@ def test_static_url_with_query(mock_modulestore, mock_storage):
     assert_equals(post_text, replace_static_urls(pre_text, DATA_DIRECTORY, COURSE_KEY))
 
 
+@patch('static_replace.staticfiles_storage')
+@patch('static_replace.modulestore')
+def test_lookups_cached(mock_modulestore, mock_storage):
+    """
+    Make sure the staticfiles lookups and store types are only looked up once
+    """
+    course_key = SlashSeparatedCourseKey('org', 'cached', 'run')
+    mock_storage.exists.return_value = True
+    mock_storage.url.return_value = '/static/file.png'
+    mock_modulestore.return_value = Mock(MongoModuleStore)
+
+    for __ in range(3):
+        assert_equals('"/static/file.png"', replace_static_urls(STATIC_SOURCE, DATA_DIRECTORY, course_key))
+    mock_storage.exists.assert_called_once_with('file.png')
+    mock_modulestore.return_value.get_modulestore_type.assert_called_once_with(course_key)
+
+
+@patch('static_replace.staticfiles_storage')
+@patch('static_replace.modulestore')
+def test_replace_urls(mock_modulestore, mock_storage):
+    """
+    Make sure replace_urls replaces like replace_static_urls, replace_course_urls
+    and replace_jump_to_id_urls do
+    """
+    mock_storage.exists.return_value = False
+    mock_modulestore.return_value = Mock(MongoModuleStore)
+    jump_to_id_base_url = '/courses/org/course/run/jump_to_id/'
+
+    text = (
+        '<a href="/course/chapter">x</a><img src="/static/file.png"/>'
+        '<a href=\'/jump_to_id/block\'>y</a><img src="/static/foo.png?raw"/>'
+    )
+    expected = replace_jump_to_id_urls(
+        replace_course_urls(replace_static_urls(text, DATA_DIRECTORY, COURSE_KEY), COURSE_KEY),
+        COURSE_KEY,
+        jump_to_id_base_url
+    )
+    assert_equals(
+        expected,
+        replace_urls(text, COURSE_KEY, jump_to_id_base_url, data_directory=DATA_DIRECTORY)
+    )
+    assert_true('/c4x/org/course/asset/file.png' in expected)
+    assert_true('/courses/org/course/run/chapter' in expected)
+    assert_true(jump_to_id_base_url + 'block' in expected)
+
+
 def test_regex():
     yes = ('"/static/foo.png"',
            '"/static/foo.png"',
@@ -3,7 +3,6 @@
 from __future__ import absolute_import
 
 import logging
-import json
 
 from django.conf import settings
 
@@ -12,6 +11,10 @@ from track.utils import DateTimeJSONEncoder
 
 log = logging.getLogger('track.backends.logger')
 
+# The encoder of the events: compact, and shared by all the events rather than
+# created for each of them by json.dumps.
+EVENT_ENCODER = DateTimeJSONEncoder(separators=(',', ':'))
+
 
 class LoggerBackend(BaseBackend):
     """Event tracker backend that uses a python logger.
@@ -20,24 +23,36 @@ class LoggerBackend(BaseBackend):
 
     """
 
-    def __init__(self, name, **kwargs):
+    def __init__(self, name, batch_lines=False, **kwargs):
         """Event tracker backend that uses a python logger.
 
         :Parameters:
           - `name`: identifier of the logger, which should have
             been configured using the default python mechanisms.
+          - `batch_lines`: whether to log the events of a batch (see
+            `send_batch`) as a single message, one event per line,
+            for loggers whose handlers write the messages as is.
 
         """
         super(LoggerBackend, self).__init__(**kwargs)
 
         self.event_logger = logging.getLogger(name)
+        self.batch_lines = batch_lines
 
     def send(self, event):
-        event_str = json.dumps(event, cls=DateTimeJSONEncoder)
+        self.event_logger.info(self._serialize(event))
+
+    def send_batch(self, events):
+        if not self.batch_lines:
+            super(LoggerBackend, self).send_batch(events)
+            return
+        self.event_logger.info('\n'.join(self._serialize(event) for event in events))
+
+    def _serialize(self, event):
+        """Serialize the event to JSON."""
+        event_str = EVENT_ENCODER.encode(event)
 
         # TODO: remove trucation of the serialized event, either at a
         # higher level during the emittion of the event, or by
         # providing warnings when the events exceed certain size.
-        event_str = event_str[:settings.TRACK_MAX_EVENT]
-
-        self.event_logger.info(event_str)
+        return event_str[:settings.TRACK_MAX_EVENT]
@@ -97,3 +97,20 @@ class MongoBackend(BaseBackend):
             # during the next event.
             msg = 'Error inserting to MongoDB event tracker backend'
             log.exception(msg)
+
+    def send_batch(self, events):
+        """Insert the events in to the Mongo collection, all at once"""
+        try:
+            self.collection.insert(events, manipulate=False, continue_on_error=True)
+        except BSONError:
+            # The batch is encoded before anything is sent, so an event which
+            # can't be encoded would lose all the others: insert them one by
+            # one, losing only the bad ones as send() does.
+            msg = 'Error encoding a batch of events for the MongoDB event tracker backend, sending them one by one'
+            log.warning(msg)
+            for event in events:
+                self.send(event)
+        except PyMongoError:
+            # As in send(), the events are lost in case of a connection error.
+            msg = 'Error inserting to MongoDB event tracker backend'
+            log.exception(msg)
@@ -47,6 +47,29 @@ class TestLoggerBackend(TestCase):
         self.assertEqual(saved_events[0], unpacked_event)
         self.assertEqual(saved_events[1], unpacked_event)
 
+    def test_logger_backend_compact(self):
+        self.handler.reset()
+
+        self.backend.send({'test': [1, 2]})
+
+        self.assertEqual(self.handler.messages['info'], ['{"test":[1,2]}'])
+
+    def test_logger_backend_batch(self):
+        self.handler.reset()
+
+        events = [{'test': 1}, {'test': 2}]
+
+        # By default, each event has its own message
+        self.backend.send_batch(events)
+        self.assertEqual([json.loads(e) for e in self.handler.messages['info']], events)
+
+        # The events of a batch can be logged together, one per line
+        self.handler.reset()
+        self.backend.batch_lines = True
+        self.backend.send_batch(events)
+        self.assertEqual(len(self.handler.messages['info']), 1)
+        self.assertEqual([json.loads(e) for e in self.handler.messages['info'][0].split('\n')], events)
+
 
 class MockLoggingHandler(logging.Handler):
     """
@@ -1,5 +1,6 @@
 from __future__ import absolute_import
 
+from bson.errors import InvalidDocument
 from mock import patch
 
 from django.test import TestCase
@@ -36,3 +37,30 @@ class TestMongoBackend(TestCase):
 
         self.assertEqual(events[0], first_argument(calls[0]))
         self.assertEqual(events[1], first_argument(calls[1]))
+
+    def test_mongo_backend_batch(self):
+        events = [{'test': 1}, {'test': 2}]
+
+        self.backend.send_batch(events)
+
+        # The events are inserted all at once
+        self.backend.collection.insert.assert_called_once_with(events, manipulate=False, continue_on_error=True)
+
+    def test_mongo_backend_batch_with_bad_event(self):
+        events = [{'test': 1}, {'bad.key': 2}, {'test': 3}]
+
+        def insert(doc_or_docs, **kwargs):  # pylint: disable=unused-argument
+            """Fail to encode any bad event, as pymongo does."""
+            docs = doc_or_docs if isinstance(doc_or_docs, list) else [doc_or_docs]
+            if any('bad.key' in doc for doc in docs):
+                raise InvalidDocument("key 'bad.key' must not contain '.'")
+
+        self.backend.collection.insert.side_effect = insert
+        self.backend.send_batch(events)
+
+        # The events are then inserted one by one, only the bad one failing
+        inserted = [
+            args[0] for _name, args, _kwargs in self.backend.collection.insert.mock_calls
+            if not isinstance(args[0], list)
+        ]
+        self.assertEqual(inserted, events)
@@ -8,6 +8,10 @@ from util.request import COURSE_REGEX
 
 log = logging.getLogger(__name__)
 
+# The contexts of the course ids found in urls, so that they're only parsed once
+_COURSE_CONTEXTS = {}
+_MAX_COURSE_CONTEXTS = 1000
+
 
 def course_context_from_url(url):
     """
@@ -17,9 +21,13 @@ def course_context_from_url(url):
     url = url or ''
 
     match = COURSE_REGEX.match(url)
-    course_id = None
-    if match:
-        course_id_string = match.group('course_id')
+    if not match:
+        return course_context_from_course_id(None)
+
+    course_id_string = match.group('course_id')
+    context = _COURSE_CONTEXTS.get(course_id_string)
+    if context is None:
+        course_id = None
         try:
             course_id = SlashSeparatedCourseKey.from_deprecated_string(course_id_string)
         except InvalidKeyError:
@@ -29,8 +37,14 @@ def course_context_from_url(url):
                 ),
                 exc_info=True
             )
+        context = course_context_from_course_id(course_id)
+        if course_id is not None:
+            if len(_COURSE_CONTEXTS) >= _MAX_COURSE_CONTEXTS:
+                _COURSE_CONTEXTS.clear()
+            _COURSE_CONTEXTS[course_id_string] = context
 
-    return course_context_from_course_id(course_id)
+    # The callers are free to change their context
+    return dict(context)
 
 
 def course_context_from_course_id(course_id):
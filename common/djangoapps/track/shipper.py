@@ -0,0 +1,200 @@
+"""
+Asynchronous shipping of the tracking events to the backends.
+
+Rather than being sent to the backends on the thread of the request, the
+events are put in a bounded queue, and a background thread ships them to the
+backends in batches (see BaseBackend.send_batch).
+"""
+
+from __future__ import absolute_import
+
+import atexit
+import logging
+import os
+import Queue
+import threading
+import time
+
+from dogapi import dog_stats_api
+
+
+log = logging.getLogger(__name__)
+
+
+class EventShipper(object):
+    """
+    Ships the events to the backends `backends` (a dict of the backends by
+    name) from a background thread, in batches of up to `batch_size` events.
+
+    The events wait at most `flush_interval` seconds for a batch to fill up,
+    in a queue of at most `queue_size` events. When the queue is full, the
+    `overflow_policy` decides what happens to the new events: they're dropped
+    ('drop'), sent to the backends synchronously ('sync'), or put in the queue
+    once there is room for them ('block'), waiting at most `block_timeout`
+    seconds before they're dropped.
+
+    When the process exits, the queued events are shipped for at most
+    `exit_timeout` seconds; the others are dropped.
+    """
+    OVERFLOW_POLICIES = ('drop', 'sync', 'block')
+
+    def __init__(self, backends, queue_size=10000, batch_size=100, flush_interval=1, overflow_policy='drop',
+                 block_timeout=1, exit_timeout=5):
+        if overflow_policy not in self.OVERFLOW_POLICIES:
+            raise ValueError('Invalid overflow policy %s' % overflow_policy)
+
+        self.backends = backends
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self.exit_timeout = exit_timeout
+
+        self.queue = Queue.Queue(queue_size)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def put(self, event):
+        """
+        Queue `event` to be shipped to the backends.
+        """
+        self._ensure_thread()
+        block = self.overflow_policy == 'block'
+        try:
+            self.queue.put(event, block=block, timeout=self.block_timeout if block else None)
+        except Queue.Full:
+            dog_stats_api.increment('track.shipper.overflow', tags=['policy:{0}'.format(self.overflow_policy)])
+            if self.overflow_policy == 'sync':
+                self.ship([event])
+            else:
+                self._dropped(1)
+
+    def ship(self, events):
+        """
+        Send the events `events` to all the backends.
+        """
+        for name, backend in self.backends.items():
+            with dog_stats_api.timer('track.send.backend.{0}'.format(name)):
+                try:
+                    backend.send_batch(events)
+                except Exception:  # pylint: disable=broad-except
+                    # Don't let a backend stop the shipping of the events.
+                    log.exception('Error sending events to the %s event tracker backend', name)
+
+    def flush(self, timeout=None):
+        """
+        Wait until all the queued events are shipped, or at most `timeout`
+        seconds if it's not None, after which the events still queued are
+        dropped.
+
+        Should the background thread have died, the events are shipped from
+        this thread, still within `timeout`.
+        """
+        if self._thread is None or self._pid != os.getpid():
+            return
+        if timeout is None:
+            self.queue.join()
+            return
+
+        deadline = time.time() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks and self._thread.is_alive():
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                # Wake up regularly to notice if the background thread died.
+                self.queue.all_tasks_done.wait(min(remaining, 0.1))
+        if not self._thread.is_alive():
+            while time.time() < deadline:
+                batch = []
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self.queue.get_nowait())
+                    except Queue.Empty:
+                        break
+                if not batch:
+                    break
+                self.ship(batch)
+                for __ in batch:
+                    self.queue.task_done()
+
+        left = self.queue.qsize()
+        if left:
+            # The background thread may still ship some of them.
+            log.warning('Dropping %d tracking events which could not be shipped in %s seconds', left, timeout)
+            self._dropped(left)
+
+    def _dropped(self, count):
+        """
+        Count `count` events dropped without being shipped.
+        """
+        dog_stats_api.increment('track.shipper.dropped', count)
+
+    def _ensure_thread(self):
+        """
+        Start the background thread of this process, if not already started.
+        """
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                # The thread and the queued events of the process this one was
+                # forked from aren't this process's.
+                self.queue = Queue.Queue(self.queue_size)
+                self._thread = threading.Thread(target=self._run, name='track-shipper')
+                self._thread.daemon = True
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def _run(self):
+        """
+        Ship the queued events in batches, forever.
+        """
+        while True:
+            batch = self._next_batch()
+            dog_stats_api.gauge('track.shipper.queue_depth', self.queue.qsize())
+            dog_stats_api.histogram('track.shipper.batch_size', len(batch))
+            try:
+                self.ship(batch)
+            finally:
+                for __ in batch:
+                    self.queue.task_done()
+
+    def _next_batch(self):
+        """
+        Return the next batch of events: up to `batch_size` events, waiting at
+        most `flush_interval` seconds after the first one for the others.
+        """
+        batch = [self.queue.get()]
+        deadline = time.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=timeout))
+            except Queue.Empty:
+                break
+        return batch
+
+
+def _flush_at_exit(shipper):
+    """
+    Ship the events still queued by `shipper` when the process exits.
+    """
+    try:
+        shipper.flush(timeout=shipper.exit_timeout)
+    except Exception:  # pylint: disable=broad-except
+        log.exception('Error shipping the remaining tracking events')
+
+
+def create_shipper(backends, **options):
+    """
+    Return an EventShipper of the backends `backends`, configured with
+    `options`, whose events are shipped before the process exits.
+    """
+    shipper = EventShipper(backends, **options)
+    atexit.register(_flush_at_exit, shipper)
+    return shipper
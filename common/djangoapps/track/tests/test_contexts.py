@@ -42,3 +42,8 @@ class TestContexts(TestCase):
 
     def test_no_url(self):
         self.assert_empty_context_for_url(None)
+
+    def test_context_not_shared(self):
+        url = 'http://foo.bar.com/courses/{course_id}/more/stuff'.format(course_id=self.COURSE_ID)
+        contexts.course_context_from_url(url)['username'] = 'test'
+        self.assertNotIn('username', contexts.course_context_from_url(url))
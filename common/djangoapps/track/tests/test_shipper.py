@@ -0,0 +1,129 @@
+"""Tests of the asynchronous shipping of the events to the backends."""
+
+import threading
+
+from mock import patch
+
+from django.test import TestCase
+
+from track.backends import BaseBackend
+from track.shipper import EventShipper
+
+
+class BatchBackend(BaseBackend):
+    """A backend keeping the batches of events it's sent."""
+    def __init__(self, **options):
+        super(BatchBackend, self).__init__(**options)
+        self.batches = []
+
+    def send(self, event):
+        self.batches.append([event])
+
+    def send_batch(self, events):
+        self.batches.append(list(events))
+
+
+class HangingBackend(BaseBackend):
+    """A backend hanging until it's released."""
+    def __init__(self, **options):
+        super(HangingBackend, self).__init__(**options)
+        self.released = threading.Event()
+
+    def send(self, event):
+        self.released.wait()
+
+
+class FailingBackend(BaseBackend):
+    """A backend failing to send any event."""
+    def send(self, event):
+        raise Exception('Failed to send the event')
+
+
+class TestEventShipper(TestCase):
+    """Test that the events are shipped to the backends in batches."""
+
+    def setUp(self):
+        super(TestEventShipper, self).setUp()
+        self.backend = BatchBackend()
+
+    def test_batches(self):
+        shipper = EventShipper({'batch': self.backend}, batch_size=3, flush_interval=60)
+
+        events = [{'test': i} for i in xrange(7)]
+        for event in events:
+            shipper.put(event)
+        shipper.flush()
+
+        shipped = [event for batch in self.backend.batches for event in batch]
+        self.assertEqual(shipped, events)
+        self.assertTrue(all(len(batch) <= 3 for batch in self.backend.batches))
+
+    def test_failing_backend(self):
+        shipper = EventShipper({'failing': FailingBackend(), 'batch': self.backend})
+
+        shipper.put({'test': 1})
+        shipper.flush()
+        shipper.put({'test': 2})
+        shipper.flush()
+
+        # The other backends still get the events
+        self.assertEqual(self.backend.batches, [[{'test': 1}], [{'test': 2}]])
+
+    @patch.object(EventShipper, '_ensure_thread')
+    def test_overflow_drop(self, _mock_ensure_thread):
+        shipper = EventShipper({'batch': self.backend}, queue_size=1, overflow_policy='drop')
+
+        shipper.put({'test': 1})
+        shipper.put({'test': 2})
+
+        self.assertEqual(shipper.queue.qsize(), 1)
+        self.assertEqual(self.backend.batches, [])
+
+    @patch.object(EventShipper, '_ensure_thread')
+    def test_overflow_sync(self, _mock_ensure_thread):
+        shipper = EventShipper({'batch': self.backend}, queue_size=1, overflow_policy='sync')
+
+        shipper.put({'test': 1})
+        shipper.put({'test': 2})
+
+        self.assertEqual(shipper.queue.qsize(), 1)
+        self.assertEqual(self.backend.batches, [[{'test': 2}]])
+
+    @patch.object(EventShipper, '_ensure_thread')
+    def test_overflow_block(self, _mock_ensure_thread):
+        shipper = EventShipper({'batch': self.backend}, queue_size=1, overflow_policy='block', block_timeout=0.01)
+
+        shipper.put({'test': 1})
+        with patch('track.shipper.dog_stats_api') as mock_dog_stats_api:
+            shipper.put({'test': 2})
+
+        self.assertEqual(shipper.queue.qsize(), 1)
+        mock_dog_stats_api.increment.assert_any_call('track.shipper.dropped', 1)
+
+    def test_flush_timeout(self):
+        backend = HangingBackend()
+        self.addCleanup(backend.released.set)
+        shipper = EventShipper({'hanging': backend}, batch_size=1, flush_interval=0)
+
+        shipper.put({'test': 1})
+        shipper.put({'test': 2})
+        with patch('track.shipper.dog_stats_api') as mock_dog_stats_api:
+            shipper.flush(timeout=0.1)
+
+        # The event the hanging backend isn't done with is left to it
+        mock_dog_stats_api.increment.assert_called_once_with('track.shipper.dropped', 1)
+
+    def test_flush_dead_thread(self):
+        shipper = EventShipper({'batch': self.backend})
+        with patch.object(EventShipper, '_run'):
+            shipper.put({'test': 1})
+            shipper.put({'test': 2})
+            shipper._thread.join()  # pylint: disable=protected-access
+
+        shipper.flush(timeout=1)
+        self.assertEqual(self.backend.batches, [[{'test': 1}, {'test': 2}]])
+        self.assertTrue(shipper.queue.empty())
+
+    def test_invalid_overflow_policy(self):
+        with self.assertRaises(ValueError):
+            EventShipper({}, overflow_policy='explode')
@@ -87,6 +87,24 @@ class TestTrackerDjangoInstantiation(TestCase):
         self.assertEqual(backends[0].count, event_count)
         self.assertEqual(backends[1].count, event_count)
 
+    @override_settings(
+        TRACKING_BACKENDS=MULTI_SETTINGS,
+        TRACKING_ASYNC_SHIPPING={'ENABLED': True, 'BATCH_SIZE': 4}
+    )
+    def test_django_async_settings(self):
+        """Test if the events can be shipped asynchronously."""
+
+        backends = self._reload_backends().values()
+        self.addCleanup(self._reload_backends)
+
+        event_count = 10
+        for _ in xrange(event_count):
+            tracker.send({})
+        tracker.shipper.flush()
+
+        self.assertEqual(backends[0].count, event_count)
+        self.assertEqual(backends[1].count, event_count)
+
     @override_settings(TRACKING_BACKENDS=MULTI_SETTINGS)
     def test_django_remove_settings(self):
         """Test if a backend can be remove by setting it to None."""
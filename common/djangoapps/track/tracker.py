@@ -16,6 +16,19 @@ below::
       }
   }
 
+The events can be shipped to the backends asynchronously, in batches, from a
+background thread (see track.shipper)::
+
+  TRACKING_ASYNC_SHIPPING = {
+      'ENABLED': True,
+      'QUEUE_SIZE': 10000,
+      'BATCH_SIZE': 100,
+      'FLUSH_INTERVAL': 1,
+      'OVERFLOW_POLICY': 'drop',
+      'BLOCK_TIMEOUT': 1,
+      'EXIT_TIMEOUT': 5,
+  }
+
 """
 
 import inspect
@@ -26,6 +39,7 @@ from dogapi import dog_stats_api
 from django.conf import settings
 
 from track.backends import BaseBackend
+from track.shipper import create_shipper
 
 
 __all__ = ['send']
@@ -33,6 +47,9 @@ __all__ = ['send']
 
 backends = {}
 
+# The EventShipper of the backends, if the events are shipped asynchronously
+shipper = None
+
 
 def _initialize_backends_from_django_settings():
     """
@@ -51,6 +68,24 @@ def _initialize_backends_from_django_settings():
             options = values.get('OPTIONS', {})
             backends[name] = _instantiate_backend_from_name(engine, options)
 
+    _initialize_shipper_from_django_settings()
+
+
+def _initialize_shipper_from_django_settings():
+    """
+    Initialize the shipper of the events to the backends according to the
+    configuration in django settings, if they are shipped asynchronously.
+
+    """
+    global shipper  # pylint: disable=global-statement
+
+    config = getattr(settings, 'TRACKING_ASYNC_SHIPPING', {})
+    if config.get('ENABLED'):
+        options = dict((key.lower(), value) for key, value in config.iteritems() if key != 'ENABLED')
+        shipper = create_shipper(backends, **options)
+    else:
+        shipper = None
+
 
 def _instantiate_backend_from_name(name, options):
     """
@@ -91,6 +126,10 @@ def send(event):
     """
     dog_stats_api.increment('track.send.count')
 
+    if shipper is not None:
+        shipper.put(event)
+        return
+
     for name, backend in backends.iteritems():
         with dog_stats_api.timer('track.send.backend.{0}'.format(name)):
             backend.send(event)
@@ -1,9 +1,16 @@
 import re
 from django.conf import settings
+from django.core.cache import cache, get_cache
+from django.core.cache.backends.base import InvalidCacheBackendError
+
+from capa.safe_exec import SafeExecCache
 
 # We'll make assets named this be importable by Python code in the sandbox.
 PYTHON_LIB_ZIP = "python_lib.zip"
 
+# The cache of the results of safe_exec of this process, see get_safe_exec_cache.
+_SAFE_EXEC_CACHE = None
+
 
 def can_execute_unsafe_code(course_id):
     """
@@ -38,3 +45,26 @@ def get_python_lib_zip(contentstore, course_id):
         return zip_lib.data
     else:
         return None
+
+
+def get_safe_exec_cache():
+    """
+    Return the cache of the results of the sandboxed code of problems.
+
+    Results are cached in memory, in front of the 'safe_exec' cache if there is
+    one, else of the default cache. The same cache is returned for the whole
+    life of the process, so that its results are kept from request to request.
+    """
+    global _SAFE_EXEC_CACHE  # pylint: disable=global-statement
+    if _SAFE_EXEC_CACHE is None:
+        try:
+            shared_cache = get_cache('safe_exec')
+        except InvalidCacheBackendError:
+            shared_cache = cache
+        _SAFE_EXEC_CACHE = SafeExecCache(
+            shared_cache,
+            local_size=settings.SAFE_EXEC_CACHE_LOCAL_SIZE,
+            max_entry_size=settings.SAFE_EXEC_CACHE_MAX_ENTRY_SIZE,
+            timeout=settings.SAFE_EXEC_CACHE_TIMEOUT,
+        )
+    return _SAFE_EXEC_CACHE
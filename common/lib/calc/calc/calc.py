@@ -1,19 +1,22 @@
 """
 Parser and evaluator for FormulaResponse and NumericalResponse
 
-Uses pyparsing to parse. Main function as of now is evaluator().
+Uses pyparsing to parse. Main functions as of now are evaluator() and
+evaluate_samples().
 """
 
+from collections import OrderedDict
 import math
 import operator
 import numbers
+import threading
 import numpy
 import scipy.constants
 import functions
 
 from pyparsing import (
     Word, Literal, CaselessLiteral, ZeroOrMore, MatchFirst, Optional, Forward,
-    Group, ParseResults, stringEnd, Suppress, Combine, alphas, nums, alphanums
+    Group, ParseResults, ParseException, stringEnd, Suppress, Combine, alphas, nums, alphanums
 )
 
 DEFAULT_FUNCTIONS = {
@@ -72,6 +75,12 @@ SUFFIXES = {
     'c': 1e-2, 'm': 1e-3, 'u': 1e-6, 'n': 1e-9, 'p': 1e-12
 }
 
+# How many compiled expressions are kept, see compile_expression()
+EXPRESSION_CACHE_SIZE = 1024
+
+SUM_OPERATORS = {'+': operator.add, '-': operator.sub}
+PRODUCT_OPERATORS = {'*': operator.mul, '/': operator.truediv}
+
 
 class UndefinedVariable(Exception):
     """
@@ -93,7 +102,17 @@ def lower_dict(input_dict):
 
 # The following few functions define evaluation actions, which are run on lists
 # of results from each parse component. They convert the strings and (previously
-# calculated) numbers into the number that component represents.
+# calculated) numbers into the number that component represents. The numbers may
+# also be numpy arrays of values when evaluating a batch of samples, see
+# evaluate_samples().
+
+def is_value(token):
+    """
+    Return whether the token is a (previously calculated) number or array of
+    numbers, as opposed to an operator or parenthesis.
+    """
+    return isinstance(token, (numbers.Number, numpy.ndarray))
+
 
 def super_float(text):
     """
@@ -122,7 +141,7 @@ def eval_atom(parse_result):
     In the case of parenthesis, ignore them.
     """
     # Find first number in the list
-    result = next(k for k in parse_result if isinstance(k, numbers.Number))
+    result = next(k for k in parse_result if is_value(k))
     return result
 
 
@@ -136,7 +155,7 @@ def eval_power(parse_result):
     # `reduce` will go from left to right; reverse the list.
     parse_result = reversed(
         [k for k in parse_result
-         if isinstance(k, numbers.Number)]  # Ignore the '^' marks.
+         if is_value(k)]  # Ignore the '^' marks.
     )
     # Having reversed it, raise `b` to the power of `a`.
     power = reduce(lambda a, b: b ** a, parse_result)
@@ -151,15 +170,20 @@ def eval_parallel(parse_result):
       out = 1 / (1/in1 + 1/in2 + ...)
     e.g. [ 1, 2 ] -> 2/3
 
-    Return NaN if there is a zero among the inputs.
+    Return NaN if there is a zero among the inputs (for arrays, wherever there
+    is a zero among the inputs).
     """
     if len(parse_result) == 1:
         return parse_result[0]
-    if 0 in parse_result:
-        return float('nan')
-    reciprocals = [1. / e for e in parse_result
-                   if isinstance(e, numbers.Number)]
-    return 1. / sum(reciprocals)
+    inputs = [e for e in parse_result if is_value(e)]
+    zeros = reduce(numpy.logical_or, [numpy.equal(e, 0) for e in inputs])
+    if numpy.ndim(zeros) == 0:
+        if zeros:
+            return float('nan')
+        return 1. / sum(1. / e for e in inputs)
+    # Only take the reciprocals of the samples without zeros.
+    inputs = [numpy.where(zeros, 1., e) for e in inputs]
+    return numpy.where(zeros, numpy.nan, 1. / sum(1. / e for e in inputs))
 
 
 def eval_sum(parse_result):
@@ -173,12 +197,10 @@ def eval_sum(parse_result):
     total = 0.0
     current_op = operator.add
     for token in parse_result:
-        if token == '+':
-            current_op = operator.add
-        elif token == '-':
-            current_op = operator.sub
-        else:
+        if is_value(token):
             total = current_op(total, token)
+        else:
+            current_op = SUM_OPERATORS[token]
     return total
 
 
@@ -191,12 +213,10 @@ def eval_product(parse_result):
     prod = 1.0
     current_op = operator.mul
     for token in parse_result:
-        if token == '*':
-            current_op = operator.mul
-        elif token == '/':
-            current_op = operator.truediv
-        else:
+        if is_value(token):
             prod = current_op(prod, token)
+        else:
+            current_op = PRODUCT_OPERATORS[token]
     return prod
 
 
@@ -216,46 +236,131 @@ def add_defaults(variables, functions, case_sensitive):
     return (all_variables, all_functions)
 
 
+class ExpressionCache(object):
+    """
+    Thread-safe cache of the `size` most recently used compiled expressions.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.lock = threading.Lock()
+        self.expressions = OrderedDict()
+
+    def get_or_compile(self, key, compile_expr):
+        """
+        Return the expression cached under `key`, calling `compile_expr()` to
+        compile and cache it if it isn't cached yet.
+        """
+        with self.lock:
+            expression = self.expressions.pop(key, None)
+            if expression is not None:
+                # Mark it as the most recently used.
+                self.expressions[key] = expression
+                return expression
+
+        # Compile outside the lock; at worst an expression is compiled twice.
+        expression = compile_expr()
+        with self.lock:
+            self.expressions[key] = expression
+            while len(self.expressions) > self.size:
+                self.expressions.popitem(last=False)
+        return expression
+
+    def clear(self):
+        """
+        Drop all the cached expressions.
+        """
+        with self.lock:
+            self.expressions.clear()
+
+
+EXPRESSION_CACHE = ExpressionCache(EXPRESSION_CACHE_SIZE)
+
+
+def compile_expression(math_expr, valid_variables, valid_functions, case_sensitive=False):
+    """
+    Parse an expression into a function computing its value.
+
+    The function takes the dictionaries of all the variables and functions (as
+    returned by `add_defaults`), which must define the same names as
+    `valid_variables` and `valid_functions`. Raise an UndefinedVariable if the
+    expression uses any other variable or function.
+
+    Compiled expressions are cached, so that an expression which is evaluated
+    over and over (e.g. at each of the samples of a FormulaResponse) is only
+    parsed once.
+    """
+    key = (math_expr, case_sensitive, frozenset(valid_variables), frozenset(valid_functions))
+
+    def compile_expr():
+        """
+        Parse the expression, check its variables and compile its tree.
+        """
+        math_interpreter = ParseAugmenter(math_expr, case_sensitive)
+        math_interpreter.parse_algebra()
+        math_interpreter.check_variables(key[2], key[3])
+        return math_interpreter.compile_tree()
+
+    return EXPRESSION_CACHE.get_or_compile(key, compile_expr)
+
+
 def evaluator(variables, functions, math_expr, case_sensitive=False):
     """
     Evaluate an expression; that is, take a string of math and return a float.
 
     -Variables are passed as a dictionary from string to value. They must be
-     python numbers.
+     python numbers (or numpy arrays of them, see `evaluate_samples`).
     -Unary functions are passed as a dictionary from string to function.
     """
     # No need to go further.
     if math_expr.strip() == "":
         return float('nan')
 
-    # Parse the tree.
-    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
-    math_interpreter.parse_algebra()
-
     # Get our variables together.
     all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
 
-    # ...and check them
-    math_interpreter.check_variables(all_variables, all_functions)
+    # Parse the tree (or get it from the cache) and check the variables.
+    expression = compile_expression(math_expr, all_variables, all_functions, case_sensitive)
 
-    # Create a recursion to evaluate the tree.
-    if case_sensitive:
-        casify = lambda x: x
-    else:
-        casify = lambda x: x.lower()  # Lowercase for case insens.
+    return expression(all_variables, all_functions)
 
-    evaluate_actions = {
-        'number': eval_number,
-        'variable': lambda x: all_variables[casify(x[0])],
-        'function': lambda x: all_functions[casify(x[0])](x[1]),
-        'atom': eval_atom,
-        'power': eval_power,
-        'parallel': eval_parallel,
-        'product': eval_product,
-        'sum': eval_sum
-    }
 
-    return math_interpreter.reduce_tree(evaluate_actions)
+def evaluate_samples(variables_list, functions, math_expr, case_sensitive=False):
+    """
+    Evaluate an expression at several samples; return the list of the values of
+    `evaluator` for each dictionary of variables of `variables_list`.
+
+    All the samples are evaluated at once, on numpy arrays of the values of the
+    variables. Should that raise any error, or any floating point exception,
+    the samples are evaluated one by one instead, so that the values and errors
+    are exactly those of `evaluator`.
+    """
+    if not variables_list:
+        return []
+
+    names = set(variables_list[0])
+    if math_expr.strip() != "" and all(set(variables) == names for variables in variables_list):
+        batch = {
+            name: numpy.array([variables[name] for variables in variables_list])
+            for name in names
+        }
+        try:
+            with numpy.errstate(all='raise'):
+                values = numpy.asarray(evaluator(batch, functions, math_expr, case_sensitive))
+        except (UndefinedVariable, ParseException):
+            raise
+        except Exception:  # pylint: disable=broad-except
+            pass
+        else:
+            if values.ndim == 0:
+                # The expression doesn't depend on the variables.
+                return [values[()]] * len(variables_list)
+            if values.shape == (len(variables_list),):
+                return list(values)
+
+    return [
+        evaluator(variables, functions, math_expr, case_sensitive)
+        for variables in variables_list
+    ]
 
 
 class ParseAugmenter(object):
@@ -397,6 +502,59 @@ class ParseAugmenter(object):
         # Find the value of the entire tree.
         return handle_node(self.tree)
 
+    def compile_tree(self):
+        """
+        Compile `self.tree` into a function computing the value of the expression.
+
+        The function takes the dictionaries of the variables and functions (by
+        their lowercase names if not `self.case_sensitive`); see `evaluator`.
+        The evaluation actions are bound to the nodes, and the numbers are
+        converted, once and for all, so that evaluating doesn't walk the
+        parse results again.
+        """
+        if self.case_sensitive:
+            casify = lambda x: x
+        else:
+            casify = lambda x: x.lower()  # Lowercase for case insens.
+
+        evaluate_actions = {
+            'atom': eval_atom,
+            'power': eval_power,
+            'parallel': eval_parallel,
+            'product': eval_product,
+            'sum': eval_sum
+        }
+
+        def compile_node(node):
+            """
+            Return the function computing the value representing the node,
+            calling the functions of the child nodes for the inputs of its
+            evaluation action.
+            """
+            if not isinstance(node, ParseResults):
+                # Then treat it as a terminal node.
+                return lambda variables, functions: node
+
+            node_name = node.getName()
+            if node_name == 'number':
+                number = eval_number(list(node))
+                return lambda variables, functions: number
+            if node_name == 'variable':
+                varname = casify(node[0])
+                return lambda variables, functions: variables[varname]
+            if node_name == 'function':
+                funcname = casify(node[0])
+                argument = compile_node(node[1])
+                return lambda variables, functions: functions[funcname](argument(variables, functions))
+            if node_name not in evaluate_actions:  # pragma: no cover
+                raise Exception(u"Unknown branch name '{}'".format(node_name))
+
+            action = evaluate_actions[node_name]
+            kids = [compile_node(k) for k in node]
+            return lambda variables, functions: action([kid(variables, functions) for kid in kids])
+
+        return compile_node(self.tree)
+
     def check_variables(self, valid_variables, valid_functions):
         """
         Confirm that all the variables used in the tree are valid/defined.
@@ -3,6 +3,7 @@ Unit tests for calc.py
 """
 
 import unittest
+from mock import patch
 import numpy
 import calc
 from pyparsing import ParseException
@@ -559,3 +560,40 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+    def test_parsed_once(self):
+        """
+        Check that an expression evaluated again isn't parsed again, unless
+        the variables defined change
+        """
+        calc.EXPRESSION_CACHE.clear()
+        parse_algebra = calc.ParseAugmenter.parse_algebra
+        with patch.object(
+            calc.ParseAugmenter, 'parse_algebra', autospec=True, side_effect=parse_algebra
+        ) as mock_parse:
+            self.assertEqual(calc.evaluator({'x': 2.0}, {}, "x^2+1"), 5.0)
+            self.assertEqual(calc.evaluator({'x': 3.0}, {}, "x^2+1"), 10.0)
+            self.assertEqual(mock_parse.call_count, 1)
+            self.assertEqual(calc.evaluator({'x': 3.0, 'y': 1.0}, {}, "x^2+1"), 10.0)
+            self.assertEqual(mock_parse.call_count, 2)
+
+    def test_evaluate_samples(self):
+        """
+        Check that evaluating samples at once gives the values of evaluator,
+        including where the evaluation falls back to one sample at a time
+        """
+        samples = [{'x': 0.0, 'y': 2.0}, {'x': 1.0, 'y': -2.0}, {'x': 3.0, 'y': 0.5}]
+        for expr in ["x^2+y*sin(x)", "x||y", "x^0.5", "j*x-pi", "7", "fact(x)"]:
+            expected = [calc.evaluator(variables, {}, expr) for variables in samples]
+            actual = calc.evaluate_samples(samples, {}, expr)
+            self.assertEqual(len(actual), len(samples))
+            for value, expected_value in zip(actual, expected):
+                if numpy.isnan(expected_value):
+                    self.assertTrue(numpy.isnan(value))
+                else:
+                    self.assertAlmostEqual(value, expected_value)
+
+        with self.assertRaises(ZeroDivisionError):
+            calc.evaluate_samples(samples, {}, "y/x")
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'z'):
+            calc.evaluate_samples(samples, {}, "x+z")
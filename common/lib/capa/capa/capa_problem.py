@@ -13,11 +13,14 @@ Main module which shows problems (of "capa" type).
 This is used by capa_module.
 """
 
+from collections import OrderedDict
 from copy import deepcopy
 from datetime import datetime
+import hashlib
 import logging
 import os.path
 import re
+import threading
 
 from lxml import etree
 from pytz import UTC
@@ -56,12 +59,93 @@ html_problem_semantics = [
     "openendedrubric",
 ]
 
+# How many parsed problems are cached, see ParsedProblem
+PARSED_PROBLEM_CACHE_SIZE = 500
+
 log = logging.getLogger(__name__)
 
 #-----------------------------------------------------------------------------
 # main class for this module
 
 
+class ParsedProblem(object):
+    """
+    The part of the preprocessing of a problem which depends neither on the seed
+    nor on the student: its tree, with its includes processed and IDs given to
+    its responses and inputs, and the code of its scripts.
+
+    ParsedProblems are cached, so that LoncapaProblems only have to copy the
+    tree rather than parse and preprocess the problem again.
+    """
+    def __init__(self, problem_text, tree, responses, script_code, python_path, has_includes=False):
+        self.problem_text = problem_text
+        self.tree = tree
+        self.has_includes = has_includes
+        self.script_code = script_code
+        self.python_path = python_path
+
+        # The positions of the responses and of their inputs in tree.iter(), so that
+        # they can be found in the copies of the tree.
+        positions = {element: position for position, element in enumerate(tree.iter())}
+        self.responses = [
+            (positions[response], [positions[inputfield] for inputfield in inputfields])
+            for response, inputfields in responses
+        ]
+
+    def copy_tree(self):
+        """
+        Return a copy of the tree, and the list of its (response, inputfields).
+        """
+        tree = deepcopy(self.tree)
+        elements = list(tree.iter())
+        responses = [
+            (elements[response], [elements[inputfield] for inputfield in inputfields])
+            for response, inputfields in self.responses
+        ]
+        return tree, responses
+
+
+class ParsedProblemCache(object):
+    """
+    Thread-safe cache of the `size` most recently used ParsedProblems.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.lock = threading.Lock()
+        self.parsed_problems = OrderedDict()
+
+    def get(self, key):
+        """
+        Return the ParsedProblem cached under `key`, or None.
+        """
+        with self.lock:
+            parsed_problem = self.parsed_problems.pop(key, None)
+            if parsed_problem is not None:
+                # Mark it as the most recently used.
+                self.parsed_problems[key] = parsed_problem
+            return parsed_problem
+
+    def set(self, key, parsed_problem):
+        """
+        Cache `parsed_problem` under `key`.
+        """
+        with self.lock:
+            self.parsed_problems.pop(key, None)
+            self.parsed_problems[key] = parsed_problem
+            while len(self.parsed_problems) > self.size:
+                self.parsed_problems.popitem(last=False)
+
+    def clear(self):
+        """
+        Drop all the cached ParsedProblems.
+        """
+        with self.lock:
+            self.parsed_problems.clear()
+
+
+PARSED_PROBLEM_CACHE = ParsedProblemCache(PARSED_PROBLEM_CACHE_SIZE)
+
+
 class LoncapaSystem(object):
     """
     An encapsulation of resources needed from the outside.
@@ -154,25 +238,20 @@ class LoncapaProblem(object):
         self.done = state.get('done', False)
         self.input_state = state.get('input_state', {})
 
-        # Convert startouttext and endouttext to proper <text></text>
-        problem_text = re.sub(r"startouttext\s*/", "text", problem_text)
-        problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
-        self.problem_text = problem_text
-
-        # parse problem XML file into an element tree
-        self.tree = etree.XML(problem_text)
-
-        # handle any <include file="foo"> tags
-        self._process_includes()
+        # Parse the problem XML into an element tree with IDs given to its responses
+        # and inputs, or copy the tree of a previous parse.
+        parsed_problem = self._get_parsed_problem(problem_text)
+        self.problem_text = parsed_problem.problem_text
+        self.tree, responses = parsed_problem.copy_tree()
 
         # construct script processor context (eg for customresponse problems)
-        self.context = self._extract_context(self.tree)
+        self.context = self._extract_context(parsed_problem.script_code, parsed_problem.python_path)
 
-        # Pre-parse the XML tree: modifies it to add ID's and perform some in-place
-        # transformations.  This also creates the dict (self.responders) of Response
-        # instances for each question in the problem. The dict has keys = xml subtree of
-        # Response, values = Response instance
-        self._preprocess_problem(self.tree)
+        # Pre-parse the XML tree: modifies it to perform some in-place transformations.
+        # This also creates the dict (self.responders) of Response instances for each
+        # question in the problem. The dict has keys = xml subtree of Response,
+        # values = Response instance
+        self._preprocess_problem(self.tree, responses)
 
         if not self.student_answers:  # True when student_answers is an empty dict
             self.set_initial_display()
@@ -529,12 +608,52 @@ class LoncapaProblem(object):
 
     # ======= Private Methods Below ========
 
-    def _process_includes(self):
+    def _get_parsed_problem(self, problem_text):
+        """
+        Return the ParsedProblem of `problem_text`, from the cache if it has been
+        parsed already.
+
+        Problems with includes aren't cached, as the included files may change.
+        """
+        if isinstance(problem_text, unicode):
+            digest = hashlib.sha1(problem_text.encode('utf-8')).hexdigest()
+        else:
+            digest = hashlib.sha1(problem_text).hexdigest()
+        key = (self.problem_id, digest, getattr(self.capa_system.filestore, 'root_path', None))
+        parsed_problem = PARSED_PROBLEM_CACHE.get(key)
+        if parsed_problem is None:
+            parsed_problem = self._parse_problem(problem_text)
+            if not parsed_problem.has_includes:
+                PARSED_PROBLEM_CACHE.set(key, parsed_problem)
+        return parsed_problem
+
+    def _parse_problem(self, problem_text):
+        """
+        Parse and preprocess the seed-independent part of `problem_text`, and
+        return the resulting ParsedProblem.
+        """
+        # Convert startouttext and endouttext to proper <text></text>
+        problem_text = re.sub(r"startouttext\s*/", "text", problem_text)
+        problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
+
+        # parse problem XML file into an element tree
+        tree = etree.XML(problem_text)
+
+        # handle any <include file="foo"> tags
+        has_includes = self._process_includes(tree)
+
+        responses = self._assign_ids(tree)
+        script_code, python_path = self._extract_script_code(tree)
+        return ParsedProblem(problem_text, tree, responses, script_code, python_path, has_includes)
+
+    def _process_includes(self, tree):
         """
         Handle any <include file="foo"> tags by reading in the specified file and inserting it
-        into our XML tree.  Fail gracefully if debugging.
+        into the XML tree.  Fail gracefully if debugging.
+
+        Returns whether there were any includes.
         """
-        includes = self.tree.findall('.//include')
+        includes = tree.findall('.//include')
         for inc in includes:
             filename = inc.get('file')
             if filename is not None:
@@ -579,6 +698,8 @@ class LoncapaProblem(object):
                 parent.remove(inc)
                 log.debug('Included %s into %s' % (filename, self.problem_id))
 
+        return bool(includes)
+
     def _extract_system_path(self, script):
         """
         Extracts and normalizes additional paths for code execution.
@@ -613,17 +734,13 @@ class LoncapaProblem(object):
 
         return path
 
-    def _extract_context(self, tree):
+    def _extract_script_code(self, tree):
         """
-        Extract content of <script>...</script> from the problem.xml file, and exec it in the
-        context of this problem.  Provides ability to randomize problems, and also set
-        variables for problem answer checking.
+        Extract content of <script>...</script> from the problem.xml file, along with
+        the Python path needed to run it.
 
-        Problem XML goes to Python execution context. Runs everything in script tags.
+        Returns the code of all the Python script tags, and the Python path.
         """
-        context = {}
-        context['seed'] = self.seed
-        context['anonymous_student_id'] = self.capa_system.anonymous_student_id
         all_code = ''
 
         python_path = []
@@ -646,6 +763,22 @@ class LoncapaProblem(object):
             code = unescape(script.text, XMLESC)
             all_code += code
 
+        return all_code, python_path
+
+    def _extract_context(self, all_code, python_path):
+        """
+        Exec the code of the scripts of the problem (see _extract_script_code) in the
+        context of this problem.  Provides ability to randomize problems, and also set
+        variables for problem answer checking.
+
+        Problem XML goes to Python execution context. Runs everything in script tags.
+        """
+        context = {}
+        context['seed'] = self.seed
+        context['anonymous_student_id'] = self.capa_system.anonymous_student_id
+
+        # Don't add the zip lib to the cached Python path.
+        python_path = list(python_path)
         extra_files = []
         if all_code:
             # An asset named python_lib.zip can be imported by Python code.
@@ -777,19 +910,16 @@ class LoncapaProblem(object):
 
         return tree
 
-    def _preprocess_problem(self, tree):  # private
+    def _assign_ids(self, tree):
         """
         Assign IDs to all the responses
         Assign sub-IDs to all entries (textline, schematic, etc.)
-        Annoted correctness and value
         In-place transformation
 
-        Also create capa Response instances for each responsetype and save as self.responders
-
-        Obtain all responder answers and save as self.responder_answers dict (key = response)
+        Returns the list of the (response, inputfields) of the problem.
         """
         response_id = 1
-        self.responders = {}
+        responses = []
         for response in tree.xpath('//' + "|//".join(responsetypes.registry.registered_tags())):
             response_id_str = self.problem_id + "_" + str(response_id)
             # create and save ID for this response
@@ -810,6 +940,21 @@ class LoncapaProblem(object):
                 entry.attrib['id'] = "%s_%i_%i" % (self.problem_id, response_id, answer_id)
                 answer_id = answer_id + 1
 
+            responses.append((response, inputfields))
+        return responses
+
+    def _preprocess_problem(self, tree, responses):  # private
+        """
+        Annoted correctness and value
+        In-place transformation
+
+        Create capa Response instances for each of the (response, inputfields) of the
+        problem (see _assign_ids) and save as self.responders
+
+        Obtain all responder answers and save as self.responder_answers dict (key = response)
+        """
+        self.responders = {}
+        for response, inputfields in responses:
             # instantiate capa Response
             responsetype_cls = responsetypes.registry.get_class_for_tag(response.tag)
             responder = responsetype_cls(response, inputfields, self.context, self.capa_system)
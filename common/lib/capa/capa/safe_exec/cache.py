@@ -0,0 +1,135 @@
+"""
+A cache of the results of safe_exec, to pass to it as its `cache`.
+"""
+
+from collections import OrderedDict
+import cPickle as pickle
+import logging
+import threading
+import time
+import zlib
+
+# We don't want to force a dependency on datadog, so make the import conditional
+try:
+    import dogstats_wrapper as dog_stats_api
+except ImportError:
+    # pylint: disable=invalid-name
+    dog_stats_api = None
+
+log = logging.getLogger(__name__)
+
+# memcached refuses values larger than 1MB.
+DEFAULT_MAX_ENTRY_SIZE = 1024 * 1024
+
+
+class SafeExecCache(object):
+    """
+    A two-tier cache of the results of safe_exec: an in-process LRU of the
+    `local_size` most recently used results, in front of `shared_cache` (an
+    object with .get(key) and .set(key, value, timeout) methods, e.g. a Django
+    cache shared by all the processes).
+
+    Results are stored as compressed pickles, and only if they are no larger
+    than `max_entry_size` bytes. `timeout` is the timeout of the entries of the
+    shared cache, None for its default timeout.
+
+    The hits and misses of each tier, the lookup times and the sizes of the
+    keys and entries are reported to datadog.
+    """
+    def __init__(self, shared_cache, local_size=1000, max_entry_size=DEFAULT_MAX_ENTRY_SIZE, timeout=None):
+        self.shared_cache = shared_cache
+        self.local_size = local_size
+        self.max_entry_size = max_entry_size
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._local = OrderedDict()
+
+    def get(self, key):
+        """
+        Return the result cached under `key`, or None.
+        """
+        start = time.time()
+        tier = 'local'
+        data = self._get_local(key)
+        if data is None:
+            tier = 'shared'
+            data = self.shared_cache.get(key)
+            if data is not None:
+                self._set_local(key, data)
+
+        value = None
+        if data is not None:
+            try:
+                value = pickle.loads(zlib.decompress(data))
+            except Exception:  # pylint: disable=broad-except
+                # Most likely an entry set by a previous version, consider it a miss.
+                log.warning("Discarding the invalid safe_exec cache entry %s", key, exc_info=True)
+                self._delete_local(key)
+
+        tags = ['tier:{}'.format(tier), 'result:{}'.format('miss' if value is None else 'hit')]
+        _increment('capa.safe_exec.cache.get', tags=tags)
+        _histogram('capa.safe_exec.cache.get_time', (time.time() - start) * 1000, tags=tags)
+        return value
+
+    def set(self, key, value, timeout=None):
+        """
+        Cache `value` under `key`, unless it's too large.
+        """
+        data = zlib.compress(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        _histogram('capa.safe_exec.cache.key_size', len(key))
+        _histogram('capa.safe_exec.cache.entry_size', len(data))
+        if len(data) > self.max_entry_size:
+            _increment('capa.safe_exec.cache.too_large')
+            return
+
+        self._set_local(key, data)
+        timeout = timeout if timeout is not None else self.timeout
+        if timeout is None:
+            self.shared_cache.set(key, data)
+        else:
+            self.shared_cache.set(key, data, timeout)
+
+    def _get_local(self, key):
+        """
+        Return the data cached locally under `key`, marking it as the most
+        recently used, or None.
+        """
+        with self._lock:
+            data = self._local.pop(key, None)
+            if data is not None:
+                self._local[key] = data
+            return data
+
+    def _set_local(self, key, data):
+        """
+        Cache `data` locally under `key`, evicting the least recently used
+        entries beyond `local_size`.
+        """
+        with self._lock:
+            self._local.pop(key, None)
+            self._local[key] = data
+            while len(self._local) > self.local_size:
+                self._local.popitem(last=False)
+
+    def _delete_local(self, key):
+        """
+        Drop the data cached locally under `key`.
+        """
+        with self._lock:
+            self._local.pop(key, None)
+
+
+def _increment(metric_name, *args, **kwargs):
+    """
+    Increment the datadog metric `metric_name`, if datadog is available.
+    """
+    if dog_stats_api:
+        dog_stats_api.increment(metric_name, *args, **kwargs)
+
+
+def _histogram(metric_name, *args, **kwargs):
+    """
+    Add a value to the datadog histogram `metric_name`, if datadog is available.
+    """
+    if dog_stats_api:
+        dog_stats_api.histogram(metric_name, *args, **kwargs)
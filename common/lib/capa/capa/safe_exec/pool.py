@@ -0,0 +1,470 @@
+"""
+A pool of warm sandboxed Python workers to run the code of problems.
+
+Starting a sandboxed Python and importing numpy, scipy, etc. into it is most of
+the time it takes to run the code of a problem. The workers of this pool are
+started like codejail starts its sandboxed Python (same executable, user, and
+so AppArmor profile), import the modules of ASSUMED_IMPORTS once, and then fork
+a child for each piece of code they're sent over their stdin, which the child
+reads itself. The children run the code with codejail's resource limits, in a
+temporary directory of their own, and exit, so that nothing is shared between
+two executions but the warm modules. Workers are recycled after a number of
+executions, and replaced right away.
+"""
+
+import base64
+import json
+import logging
+import os
+import select
+import struct
+import subprocess
+import threading
+
+from codejail import jail_code
+from codejail.safe_exec import json_safe, SafeExecException
+
+log = logging.getLogger(__name__)
+
+# The modules the workers import before forking, i.e. those of ASSUMED_IMPORTS
+# in safe_exec.py.
+WARM_MODULES = [
+    "numpy",
+    "math",
+    "scipy",
+    "calc",
+    "eia",
+    "chem.chemcalc",
+    "chem.chemtools",
+    "chem.miller",
+    "verifiers.draganddrop",
+]
+
+# How long to wait for a worker, on top of the real time limit of the code,
+# before giving up on it.
+WORKER_TIMEOUT_MARGIN = 5
+
+# How long to wait for a new worker to import its modules.
+WORKER_STARTUP_TIMEOUT = 60
+
+# The script of the workers, passed the json list of the modules to import and
+# the real time limit of the code. Messages are json, preceded by their length
+# as a 4-byte big-endian integer; the first one tells that the worker is ready.
+#
+# The worker itself never reads a request: once one is waiting, it forks a
+# child, which reads the request from the request pipe, runs it and writes the
+# response to the response pipe, while the worker waits for it (killing it if
+# it runs out of time). Nothing of a request ever gets into the memory of the
+# worker, and so into the following children.
+WORKER_PY = r'''
+import json
+import os
+import random
+import resource
+import select
+import shutil
+import signal
+import struct
+import sys
+import tempfile
+import time
+import traceback
+
+# The exit status of a child which found no request: the pool is done with the worker.
+EXIT_NO_REQUEST = 3
+
+
+def read_exactly(fd, length):
+    chunks = []
+    while length:
+        chunk = os.read(fd, length)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        length -= len(chunk)
+    return ''.join(chunks)
+
+
+def read_message(fd):
+    header = read_exactly(fd, 4)
+    if header is None:
+        return None
+    length, = struct.unpack('>I', header)
+    data = read_exactly(fd, length)
+    if data is None:
+        return None
+    return json.loads(data)
+
+
+def write_message(fd, message):
+    data = json.dumps(message)
+    data = struct.pack('>I', len(data)) + data
+    while data:
+        data = data[os.write(fd, data):]
+
+
+class DevNull(object):
+    def write(self, *args, **kwargs):
+        pass
+
+
+def set_limits(limits):
+    if limits.get("CPU"):
+        resource.setrlimit(resource.RLIMIT_CPU, (limits["CPU"], limits["CPU"]))
+    if limits.get("VMEM"):
+        resource.setrlimit(resource.RLIMIT_AS, (limits["VMEM"], limits["VMEM"]))
+    if "FSIZE" in limits:
+        resource.setrlimit(resource.RLIMIT_FSIZE, (limits["FSIZE"], limits["FSIZE"]))
+    # No subprocesses.
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+
+
+def run(request_fd, response_fd, tmpdir):
+    # In the child: read the request, run its code, and write the resulting
+    # globals (or the error) as the response.
+    request = read_message(request_fd)
+    if request is None:
+        os._exit(EXIT_NO_REQUEST)
+    try:
+        for name, content in request['files']:
+            path = os.path.join(tmpdir, name)
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path, 'wb') as extra_file:
+                extra_file.write(content.decode('base64'))
+
+        # Don't share the random state of the worker among its children.
+        random.seed()
+        if 'numpy' in sys.modules:
+            sys.modules['numpy'].random.seed()
+
+        os.chdir(tmpdir)
+        for pydir in request['python_path']:
+            sys.path.append(pydir)
+        set_limits(request['limits'])
+
+        g_dict = request['globals']
+        sys.stdout = DevNull()
+        exec request['code'] in g_dict
+
+        ok_types = (type(None), int, long, float, str, unicode, list, tuple, dict)
+        bad_keys = ("__builtins__",)
+
+        def jsonable(v):
+            if not isinstance(v, ok_types):
+                return False
+            try:
+                json.dumps(v)
+            except Exception:
+                return False
+            return True
+
+        g_dict = dict((k, v) for k, v in g_dict.iteritems() if jsonable(v) and k not in bad_keys)
+        response = {'globals': g_dict}
+    except BaseException:
+        response = {'error': traceback.format_exc()}
+    write_message(response_fd, response)
+
+
+def wait(pid, realtime):
+    # In the worker: wait for the child to exit, killing it if it runs out of
+    # time, and return its exit status.
+    deadline = time.time() + realtime if realtime else None
+    delay = 0.001
+    while True:
+        waited_pid, status = os.waitpid(pid, os.WNOHANG)
+        if waited_pid:
+            return status
+        if deadline and time.time() > deadline:
+            os.kill(pid, signal.SIGKILL)
+            return os.waitpid(pid, 0)[1]
+        time.sleep(delay)
+        delay = min(delay * 2, 0.05)
+
+
+def main():
+    # Requests come in on stdin and responses go out on stdout, keep them away
+    # from the code.
+    request_fd = os.dup(0)
+    response_fd = os.dup(1)
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+
+    for modname in json.loads(sys.argv[1]):
+        try:
+            __import__(modname)
+        except Exception:
+            pass
+    realtime = json.loads(sys.argv[2])
+    write_message(response_fd, {'ready': True})
+
+    while True:
+        # Wait for a request, leaving it to the child to read.
+        select.select([request_fd], [], [])
+        tmpdir = tempfile.mkdtemp(prefix='codejail-')
+        try:
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    # Leave the child nothing but its request and response.
+                    low_fd, high_fd = sorted([request_fd, response_fd])
+                    os.closerange(3, low_fd)
+                    os.closerange(low_fd + 1, high_fd)
+                    os.closerange(high_fd + 1, 65536)
+                    run(request_fd, response_fd, tmpdir)
+                    os._exit(0)
+                finally:
+                    os._exit(1)
+            status = wait(pid, realtime)
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+        if os.WIFEXITED(status) and os.WEXITSTATUS(status) == EXIT_NO_REQUEST:
+            break
+        if not (os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0):
+            # The child may have been killed while writing its response, so
+            # the worker can't be trusted with another request.
+            write_message(response_fd, {'error': 'The code was killed (out of time or memory).', 'retire': True})
+            break
+
+main()
+'''
+
+
+class WorkerError(Exception):
+    """
+    A worker failed to execute a request, or isn't usable anymore.
+    """
+    pass
+
+
+def read_message(stream, timeout=None):
+    """
+    Read a message from `stream`, waiting at most `timeout` seconds for it.
+    """
+    if timeout is not None:
+        ready, _, _ = select.select([stream], [], [], timeout)
+        if not ready:
+            raise WorkerError("Timed out")
+    header = stream.read(4)
+    if len(header) < 4:
+        raise WorkerError("The worker exited")
+    length, = struct.unpack('>I', header)
+    return json.loads(stream.read(length))
+
+
+def write_message(stream, message):
+    """
+    Write `message` to `stream`.
+    """
+    data = json.dumps(message)
+    stream.write(struct.pack('>I', len(data)) + data)
+    stream.flush()
+
+
+class SandboxWorker(object):
+    """
+    A warm sandboxed Python, started with the command line `cmdline`, forking a
+    child to run each request, which it kills after `realtime` seconds.
+    """
+    def __init__(self, cmdline, modules, realtime=None):
+        with open(os.devnull, 'wb') as devnull:
+            self.process = subprocess.Popen(
+                cmdline + ['-c', WORKER_PY, json.dumps(modules), json.dumps(realtime)],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=devnull,
+                close_fds=True, env={},
+            )
+        self.ready = False
+        self.executions = 0
+        self.retired = False
+
+    def execute(self, request, timeout=None):
+        """
+        Execute `request` and return the response, which has the resulting
+        globals, or the error.
+        """
+        try:
+            if not self.ready:
+                read_message(self.process.stdout, WORKER_STARTUP_TIMEOUT)
+                self.ready = True
+            write_message(self.process.stdin, request)
+            response = read_message(self.process.stdout, timeout)
+        except (IOError, OSError, ValueError) as error:
+            raise WorkerError(error)
+        self.executions += 1
+        # The worker exits after a child which didn't finish.
+        self.retired = response.pop('retire', False)
+        return response
+
+    def close(self):
+        """
+        Stop the worker.
+        """
+        try:
+            self.process.stdin.close()
+            self.process.kill()
+            self.process.wait()
+        except (IOError, OSError):
+            pass
+
+
+class SandboxPool(object):
+    """
+    A pool of up to `size` idle SandboxWorkers, started with `cmdline`.
+
+    Workers are retired after `max_executions` executions.
+    """
+    def __init__(self, cmdline, size, max_executions=100, modules=None):
+        self.cmdline = cmdline
+        self.size = size
+        self.max_executions = max_executions
+        self.modules = WARM_MODULES if modules is None else modules
+        self._lock = threading.Lock()
+        self._idle = []
+
+    def warm(self):
+        """
+        Start idle workers until there are `size` of them. Their modules are
+        imported in the background, while they wait for their first request.
+        """
+        while True:
+            with self._lock:
+                if len(self._idle) >= self.size:
+                    return
+            self._release(self._start_worker())
+
+    def safe_exec(self, code, globals_dict, python_path=None, extra_files=None, slug=None):
+        """
+        Execute `code` like codejail's safe_exec, in a worker of the pool.
+
+        Raise a WorkerError if the worker failed, or a SafeExecException if the
+        code did.
+        """
+        limits = dict(jail_code.LIMITS)
+        extra_files = extra_files or []
+        request = {
+            'code': code,
+            'globals': json_safe(globals_dict),
+            'python_path': [],
+            'files': [(name, base64.b64encode(content)) for name, content in extra_files],
+            'limits': limits,
+        }
+        # Like codejail, copy the directories of the python path into the
+        # temporary directory of the code, which can't read them where they are.
+        for pydir in python_path or []:
+            pybase = os.path.basename(pydir)
+            request['python_path'].append(pybase)
+            if not any(pybase == name for name, _content in extra_files):
+                request['files'].extend(
+                    (name, base64.b64encode(content)) for name, content in _read_tree(pydir, pybase)
+                )
+
+        worker = self._acquire()
+        try:
+            timeout = limits['REALTIME'] + WORKER_TIMEOUT_MARGIN if limits.get('REALTIME') else None
+            response = worker.execute(request, timeout)
+        except WorkerError:
+            worker.close()
+            self.warm()
+            raise
+        self._release(worker)
+
+        if 'error' in response:
+            log.debug("Jailed code %s failed: %s", slug, response['error'])
+            raise SafeExecException("Couldn't execute jailed code: %s" % response['error'])
+        globals_dict.update(response['globals'])
+
+    def close(self):
+        """
+        Stop the idle workers.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.close()
+
+    def _acquire(self):
+        """
+        Return an idle worker, or a new one if there is none.
+        """
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self._start_worker()
+
+    def _start_worker(self):
+        """
+        Start a new worker, killing the code it runs after codejail's real
+        time limit.
+        """
+        return SandboxWorker(self.cmdline, self.modules, jail_code.LIMITS.get('REALTIME'))
+
+    def _release(self, worker):
+        """
+        Put `worker` back in the pool, unless it's due for recycling, in which
+        case it's replaced, or the pool is full.
+        """
+        worn_out = worker.retired or worker.executions >= self.max_executions
+        if not worn_out:
+            with self._lock:
+                if len(self._idle) < self.size:
+                    self._idle.append(worker)
+                    return
+        worker.close()
+        if worn_out:
+            self.warm()
+
+
+def _read_tree(path, name):
+    """
+    Yield the (name, content) of the files of the file or directory `path`,
+    named after `name`.
+    """
+    if not os.path.isdir(path):
+        if os.path.exists(path):
+            with open(path, 'rb') as path_file:
+                yield name, path_file.read()
+        return
+    for dirpath, _dirnames, filenames in os.walk(path):
+        for filename in filenames:
+            file_path = os.path.join(dirpath, filename)
+            with open(file_path, 'rb') as tree_file:
+                yield os.path.join(name, os.path.relpath(file_path, path)), tree_file.read()
+
+
+# The settings of the pool, see configure(), and the pool of this process.
+_POOL_SETTINGS = None
+_POOL = None
+_POOL_PID = None
+_POOL_LOCK = threading.Lock()
+
+
+def configure(size, max_executions=100):
+    """
+    Run the sandboxed code in a pool of workers (see SandboxPool) rather than
+    in a new sandboxed Python each time, once codejail is configured.
+    """
+    global _POOL_SETTINGS  # pylint: disable=global-statement
+    _POOL_SETTINGS = {'size': size, 'max_executions': max_executions}
+
+
+def get_pool():
+    """
+    Return the pool of workers of this process, or None if there is none
+    because the pool isn't configured, or codejail isn't.
+    """
+    global _POOL, _POOL_PID  # pylint: disable=global-statement
+    if _POOL_SETTINGS is None or not jail_code.is_configured("python"):
+        return None
+    with _POOL_LOCK:
+        # Workers can't be shared with the processes forked from this one.
+        if _POOL is None or _POOL_PID != os.getpid():
+            command = jail_code.COMMANDS["python"]
+            cmdline = list(command["cmdline_start"])
+            if command.get("user") and cmdline[0] != "sudo":
+                cmdline = ["sudo", "-u", command["user"]] + cmdline
+            _POOL = SandboxPool(cmdline, **_POOL_SETTINGS)
+            _POOL_PID = os.getpid()
+            _POOL.warm()
+        return _POOL
+
@@ -4,9 +4,13 @@ from codejail.safe_exec import safe_exec as codejail_safe_exec
 from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
 from codejail.safe_exec import json_safe, SafeExecException
 from . import lazymod
+from .pool import get_pool, WorkerError
 from dogapi import dog_stats_api
 
 import hashlib
+import logging
+
+log = logging.getLogger(__name__)
 
 # Establish the Python environment for Capa.
 # Capa assumes float-friendly division always.
@@ -127,9 +131,12 @@ def safe_exec(
     # Create the complete code we'll run.
     code_prolog = CODE_PROLOG % random_seed
 
-    # Decide which code executor to use.
+    # Decide which code executor to use: the warm workers of the pool, if
+    # there is one, or a new sandbox.
     if unsafely:
         exec_fn = codejail_not_safe_exec
+    elif get_pool() is not None:
+        exec_fn = pooled_safe_exec
     else:
         exec_fn = codejail_safe_exec
 
@@ -153,3 +160,15 @@ def safe_exec(
     # If an exception happened, raise it now.
     if emsg:
         raise e
+
+
+def pooled_safe_exec(code, globals_dict, python_path=None, extra_files=None, slug=None):
+    """
+    codejail's safe_exec, running the code in a worker of the pool. Should the
+    worker fail, the code is run in a new sandbox instead.
+    """
+    try:
+        get_pool().safe_exec(code, globals_dict, python_path=python_path, extra_files=extra_files, slug=slug)
+    except WorkerError:
+        log.exception("Sandbox worker failed running %s, running it in a new sandbox", slug)
+        codejail_safe_exec(code, globals_dict, python_path=python_path, extra_files=extra_files, slug=slug)
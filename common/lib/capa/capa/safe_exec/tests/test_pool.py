@@ -0,0 +1,100 @@
+"""Test pool.py"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from mock import patch
+
+from capa.safe_exec.pool import SandboxPool
+from codejail import jail_code
+from codejail.safe_exec import SafeExecException
+
+
+class TestSandboxPool(unittest.TestCase):
+    """Test running code in a pool of (unsandboxed, for testing) workers."""
+
+    def setUp(self):
+        super(TestSandboxPool, self).setUp()
+        self.pool = SandboxPool([sys.executable], size=1, max_executions=2, modules=["json"])
+        self.addCleanup(self.pool.close)
+
+    def test_set_values(self):
+        g = {'a': 17}
+        self.pool.safe_exec("b = a + 25", g)
+        self.assertEqual(g['b'], 42)
+
+    def test_extra_files(self):
+        g = {}
+        self.pool.safe_exec(
+            "import constants\nb = constants.a\nc = open('data.txt').read()", g,
+            python_path=["lib"], extra_files=[("constants.py", "a = 17\n"), ("data.txt", "hello")],
+        )
+        self.assertEqual(g['b'], 17)
+        self.assertEqual(g['c'], "hello")
+
+    def test_python_path_directories(self):
+        # Like codejail, the directories of the python path are copied for the code.
+        pydir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, pydir)
+        os.mkdir(os.path.join(pydir, "pkg"))
+        with open(os.path.join(pydir, "pkg", "__init__.py"), "w") as init_file:
+            init_file.write("a = 17\n")
+        g = {}
+        self.pool.safe_exec(
+            "import os, pkg\nb = pkg.a\nc = os.path.abspath(pkg.__file__).startswith(os.getcwd())", g,
+            python_path=[pydir],
+        )
+        self.assertEqual(g['b'], 17)
+        self.assertTrue(g['c'])
+
+    def test_raising_exceptions(self):
+        with self.assertRaises(SafeExecException) as cm:
+            self.pool.safe_exec("1/0", {})
+        self.assertIn("ZeroDivisionError", cm.exception.message)
+
+    def test_nothing_shared_between_executions(self):
+        self.pool.safe_exec("import json; json.shared = 1", {})
+        g = {}
+        self.pool.safe_exec("import json; shared = hasattr(json, 'shared')", g)
+        self.assertFalse(g['shared'])
+
+    def test_globals_not_shared_between_executions(self):
+        self.pool.safe_exec("b = a", {'a': ['secret']})
+        g = {}
+        self.pool.safe_exec(
+            "import gc\n"
+            "shared = any(isinstance(o, list) and o == ['secret'] for o in gc.get_objects())",
+            g,
+        )
+        self.assertFalse(g['shared'])
+
+    def test_timeout(self):
+        with patch.dict(jail_code.LIMITS, {'REALTIME': 1}):
+            pool = SandboxPool([sys.executable], size=1, modules=["json"])
+            self.addCleanup(pool.close)
+            with self.assertRaises(SafeExecException) as cm:
+                pool.safe_exec("while True: pass", {})
+            self.assertIn("killed", cm.exception.message)
+            # The worker whose child was killed was replaced.
+            pool.safe_exec("a = 1", {})
+
+    def test_warm(self):
+        self.pool.warm()
+        self.assertEqual(len(self.pool._idle), 1)  # pylint: disable=protected-access
+        worker = self.pool._idle[0]  # pylint: disable=protected-access
+        self.pool.safe_exec("a = 1", {})
+        self.assertEqual(self.pool._idle, [worker])  # pylint: disable=protected-access
+
+    def test_workers_recycled(self):
+        self.pool.safe_exec("a = 1", {})
+        worker = self.pool._idle[0]  # pylint: disable=protected-access
+        self.pool.safe_exec("a = 1", {})
+        # The worker ran its 2 executions, and was replaced.
+        self.assertIsNotNone(worker.process.poll())
+        self.assertEqual(len(self.pool._idle), 1)  # pylint: disable=protected-access
+        self.assertIsNot(self.pool._idle[0], worker)  # pylint: disable=protected-access
+        self.pool.safe_exec("a = 1", {})
+        self.assertEqual(len(self.pool._idle), 1)  # pylint: disable=protected-access
@@ -7,9 +7,10 @@ import random
 import textwrap
 import unittest
 
+from mock import patch
 from nose.plugins.skip import SkipTest
 
-from capa.safe_exec import safe_exec, update_hash
+from capa.safe_exec import safe_exec, update_hash, SafeExecCache
 from codejail.safe_exec import SafeExecException
 from codejail.jail_code import is_configured
 
@@ -177,6 +178,51 @@ class TestSafeExecCaching(unittest.TestCase):
                 self.fail("Tried executing code with non-ASCII unicode: {0}".format(code))
 
 
+class TestSafeExecCache(unittest.TestCase):
+    """Test the two-tier cache of safe_exec results."""
+
+    def test_local_then_shared(self):
+        shared = {}
+        cache = SafeExecCache(DictCache(shared), local_size=1)
+        cache.set("a", (None, {'a': 17}))
+        cache.set("b", (None, {'b': 42}))
+
+        # The shared cache has compressed pickles of both results.
+        self.assertEqual(len(shared), 2)
+        self.assertIsInstance(shared["a"], str)
+
+        # "a" was evicted from the local cache, but is still shared.
+        del shared["b"]
+        self.assertEqual(cache.get("b"), (None, {'b': 42}))
+        self.assertEqual(cache.get("a"), (None, {'a': 17}))
+        self.assertEqual(SafeExecCache(DictCache(shared)).get("a"), (None, {'a': 17}))
+        self.assertIsNone(cache.get("c"))
+
+    def test_too_large(self):
+        shared = {}
+        cache = SafeExecCache(DictCache(shared), max_entry_size=16)
+        cache.set("a", (None, {'a': os.urandom(100).encode('hex')}))
+        self.assertEqual(shared, {})
+        self.assertIsNone(cache.get("a"))
+
+    def test_invalid_entry(self):
+        cache = SafeExecCache(DictCache({"a": "not a compressed pickle"}))
+        self.assertIsNone(cache.get("a"))
+
+    def test_safe_exec(self):
+        cache = SafeExecCache(DictCache({}))
+        g = {}
+        safe_exec("a = int(math.pi)", g, cache=cache)
+        self.assertEqual(g['a'], 3)
+
+        # The second time, the result comes from the cache.
+        g = {}
+        with patch('capa.safe_exec.safe_exec.codejail_safe_exec') as mock_exec:
+            safe_exec("a = int(math.pi)", g, cache=cache)
+        self.assertFalse(mock_exec.called)
+        self.assertEqual(g['a'], 3)
+
+
 class TestUpdateHash(unittest.TestCase):
     """Test the safe_exec.update_hash function to be sure it canonicalizes properly."""
 
@@ -0,0 +1,58 @@
+"""
+Tests of the caching of the parsed problems of capa_problem.py
+"""
+import textwrap
+import unittest
+
+from lxml import etree
+import mock
+
+from capa.capa_problem import PARSED_PROBLEM_CACHE
+from . import new_loncapa_problem, test_capa_system
+
+
+class ParsedProblemCacheTest(unittest.TestCase):
+    """
+    Test that problems are only parsed once, whatever their seed.
+    """
+    xml = textwrap.dedent("""
+        <problem>
+            <script type="loncapa/python">answer = str(seed)</script>
+            <stringresponse answer="$answer">
+                <textline size="20"/>
+            </stringresponse>
+            <p>The answer is $answer</p>
+        </problem>
+    """)
+
+    def setUp(self):
+        super(ParsedProblemCacheTest, self).setUp()
+        PARSED_PROBLEM_CACHE.clear()
+
+    def test_parsed_once(self):
+        with mock.patch('capa.capa_problem.etree.XML', wraps=etree.XML) as mock_xml:
+            problem = new_loncapa_problem(self.xml, seed=1)
+            other_problem = new_loncapa_problem(self.xml, seed=2)
+        self.assertEqual(mock_xml.call_count, 1)
+
+        # The seed-independent preprocessing is the same...
+        self.assertEqual(problem.tree.find('.//textline').get('id'), '1_2_1')
+        self.assertEqual(other_problem.tree.find('.//textline').get('id'), '1_2_1')
+        self.assertEqual(problem.problem_text, other_problem.problem_text)
+
+        # ...but the problems have their own trees and contexts.
+        self.assertIsNot(problem.tree, other_problem.tree)
+        self.assertEqual(problem.context['answer'], '1')
+        self.assertEqual(other_problem.context['answer'], '2')
+        self.assertIn('The answer is 2', other_problem.get_html())
+
+    def test_includes_not_cached(self):
+        xml = '<problem><include file="test_include.xml"/></problem>'
+        capa_system = test_capa_system()
+        capa_system.filestore = mock.Mock()
+        capa_system.filestore.open.return_value.read.return_value = '<test>Test include</test>'
+        with mock.patch('capa.capa_problem.etree.XML', wraps=etree.XML) as mock_xml:
+            new_loncapa_problem(xml, capa_system=capa_system)
+            new_loncapa_problem(xml, capa_system=capa_system)
+        # The problem, and its include, were parsed for each problem.
+        self.assertEqual(mock_xml.call_count, 4)
@@ -23,6 +23,8 @@ import django.utils
 from xmodule.contentstore.django import contentstore
 from xmodule.modulestore.draft_and_published import BranchSettingMixin
 from xmodule.modulestore.mixed import MixedModuleStore
+from xmodule.modulestore.split_mongo.mongo_connection import StructureCache
+from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
 from xmodule.util.django import get_current_request_hostname
 import xblock.reference.plugins
 
@@ -151,6 +153,18 @@ def create_modulestore_instance(
     if issubclass(class_, BranchSettingMixin):
         _options['branch_setting_func'] = _get_modulestore_branch_setting
 
+    if issubclass(class_, SplitMongoModuleStore):
+        # Split structures are only cached if a cache is configured for them
+        try:
+            _options['structure_cache'] = StructureCache(
+                get_cache('course_structure_cache'),
+                max_entry_size=getattr(
+                    settings, 'COURSE_STRUCTURE_CACHE_MAX_ENTRY_SIZE', StructureCache.DEFAULT_MAX_ENTRY_SIZE
+                ),
+            )
+        except InvalidCacheBackendError:
+            pass
+
     if HAS_USER_SERVICE and not user_service:
         xb_user_service = DjangoXBlockUserService(get_current_user())
     else:
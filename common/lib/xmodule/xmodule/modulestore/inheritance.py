@@ -256,8 +256,46 @@ class InheritingFieldData(KvsFieldData):
         return super(InheritingFieldData, self).default(block, name)
 
 
-def inheriting_field_data(kvs):
-    """Create an InheritanceFieldData that inherits the names in InheritanceMixin."""
+class PrecomputedInheritingFieldData(InheritingFieldData):
+    """
+    An `InheritingFieldData` to which the values inherited from the ancestors
+    are given upfront, so that they are found without walking up the content
+    tree.
+    """
+
+    def __init__(self, inherited_settings, **kwargs):
+        """
+        `inherited_settings` maps the inheritable names set on an ancestor to
+        the json value set by the nearest such ancestor.
+        """
+        super(PrecomputedInheritingFieldData, self).__init__(**kwargs)
+        self.inherited_settings = inherited_settings
+
+    def default(self, block, name):
+        """
+        The default for an inheritable name is the one inherited from the
+        ancestors, if any.
+        """
+        if name in self.inheritable_names:
+            if name in self.inherited_settings:
+                return self.inherited_settings[name]
+            return KvsFieldData.default(self, block, name)
+        return super(PrecomputedInheritingFieldData, self).default(block, name)
+
+
+def inheriting_field_data(kvs, inherited_settings=None):
+    """
+    Create an InheritanceFieldData that inherits the names in InheritanceMixin.
+
+    If `inherited_settings` is given, it's the precomputed values the block
+    inherits (see `PrecomputedInheritingFieldData`).
+    """
+    if inherited_settings is not None:
+        return PrecomputedInheritingFieldData(
+            inherited_settings=inherited_settings,
+            inheritable_names=InheritanceMixin.fields.keys(),
+            kvs=kvs,
+        )
     return InheritingFieldData(
         inheritable_names=InheritanceMixin.fields.keys(),
         kvs=kvs,
@@ -265,11 +265,86 @@ class FindReportGen(ReportGenerator):
         return html
 
 
+class ReadReportGen(object):
+    """
+    Class which generates report for modulestore read performance test data.
+    """
+    METRICS = (
+        ('elapsed', 'Time Taken (ms)'),
+        ('queries', 'Mongo Queries'),
+        ('memory', 'RSS Growth (kB)'),
+    )
+
+    def __init__(self, db_name):
+        conn = sqlite3.connect(db_name)
+        conn.row_factory = sqlite3.Row
+        sel_sql = (
+            'select modulestore, num_blocks, operation, elapsed, queries, memory '
+            'FROM modulestore_reads ORDER BY timestamp DESC'
+        )
+        cur = conn.cursor()
+        cur.execute(sel_sql)
+        self.all_rows = cur.fetchall()
+        self._read_timing_data()
+
+    def _read_timing_data(self):
+        """
+        Read in the data from the sqlite DB and save the latest run of each
+        operation into a dict.
+        """
+        self.run_data = {}
+
+        self.all_modulestores = set()
+        for row in self.all_rows:
+            self.all_modulestores.add(row['modulestore'])
+
+            # Save the data in a multi-level dict - { operation1: { amount1: { modulestore1: row, ...}, ...}, ...}.
+            operation_data = self.run_data.setdefault(row['operation'], {})
+            amount_data = operation_data.setdefault(row['num_blocks'], {})
+            __ = amount_data.setdefault(row['modulestore'], row)
+
+    def generate_html(self):
+        """
+        Generate HTML.
+        """
+        html = HTMLDocument("Results")
+
+        # Output each operation to a different table.
+        for operation in sorted(self.run_data.keys()):
+            per_operation = self.run_data[operation]
+            html.add_header(1, operation)
+
+            # Make the table header columns and the table.
+            columns = ["Block Amount", ]
+            ms_keys = sorted(self.all_modulestores)
+            for __, title in self.METRICS:
+                for k in ms_keys:
+                    columns.append("{} ({})".format(title, k))
+            operation_table = HTMLTable(columns)
+
+            # Make a row for each amount of blocks.
+            for amount in sorted(per_operation.keys()):
+                per_amount = per_operation[amount]
+                row = [str(amount), ]
+                for metric, __ in self.METRICS:
+                    for modulestore in ms_keys:
+                        if modulestore in per_amount:
+                            row.append("{}".format(per_amount[modulestore][metric]))
+                        else:
+                            row.append("")
+                operation_table.add_row(row)
+            html.add_to_body(operation_table.table)
+
+        return html
+
+
 if click is not None:
     @click.command()
     @click.argument('outfile', type=click.File('w'), default='-', required=False)
     @click.option('--db_name', help='Name of sqlite database from which to read data.', default=DB_NAME)
-    @click.option('--data_type', help='Data type to process. One of: "imp_exp" or "find"', default="find")
+    @click.option(
+        '--data_type', help='Data type to process. One of: "imp_exp", "find" or "reads"', default="find"
+    )
     def cli(outfile, db_name, data_type):
         """
         Generate an HTML report from the sqlite timing data.
@@ -280,6 +355,9 @@ if click is not None:
         elif data_type == 'find':
             f_gen = FindReportGen(db_name)
             html = f_gen.generate_html()
+        elif data_type == 'reads':
+            r_gen = ReadReportGen(db_name)
+            html = r_gen.generate_html()
         click.echo(html.tostring(), file=outfile)
 
 if __name__ == '__main__':
@@ -0,0 +1,159 @@
+"""
+Performance test for the modulestore read paths which dominate LMS load.
+
+Each test builds a synthetic course of a given number of blocks and records,
+for each read operation, the wall time, the number of mongo queries and the
+resident set size growth into the `modulestore_reads` table of the sqlite database read
+by generate_report.py (use `--data_type reads`).
+"""
+from contextlib import contextmanager
+import datetime
+import itertools
+import math
+import sqlite3
+import time
+import unittest
+
+import ddt
+import psutil
+#from nose.plugins.attrib import attr
+
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.search import path_to_location
+from xmodule.modulestore.tests.factories import check_mongo_calls
+from xmodule.modulestore.tests.test_cross_modulestore_import_export import (
+    MIXED_MODULESTORE_SETUPS,
+    SHORT_NAME_MAP,
+)
+from xmodule.modulestore.perf_tests.generate_report import DB_NAME
+
+# Number of blocks in the synthetic courses.
+BLOCK_AMOUNT_PER_TEST = (1000, 10000, 50000)
+
+# The block types of each level of the synthetic courses, below the course.
+COURSE_LEVELS = ('chapter', 'sequential', 'vertical', 'problem')
+
+READS_TABLE = 'modulestore_reads'
+
+
+def make_synthetic_course(store, num_blocks):
+    """
+    Create a course of `num_blocks` blocks (besides the course itself) in `store`,
+    filling COURSE_LEVELS breadth first with the same number of children per
+    block, publish it and return its key along with the key of its last
+    (deepest) block.
+    """
+    children_per_block = int(math.ceil(num_blocks ** (1.0 / len(COURSE_LEVELS))))
+    user_id = ModuleStoreEnum.UserID.test
+    course = store.create_course('perf', 'reads{}'.format(num_blocks), 'run', user_id)
+    num_created = 0
+    last_location = None
+    with store.bulk_operations(course.id):
+        parents = [course.location]
+        for block_type in COURSE_LEVELS:
+            children = []
+            for parent, __ in itertools.product(parents, xrange(children_per_block)):
+                if num_created == num_blocks:
+                    break
+                child = store.create_child(
+                    user_id, parent, block_type,
+                    fields={'display_name': '{} {}'.format(block_type, num_created)},
+                )
+                children.append(child.location)
+                num_created += 1
+            parents = children
+            if children:
+                last_location = children[-1]
+    # The LMS reads the published blocks.
+    store.publish(course.location, user_id)
+    return course.id.for_branch(None), last_location.for_branch(None)
+
+
+class ReadStatsRecorder(object):
+    """
+    Records the statistics of the read operations of a test run into sqlite.
+    """
+    def __init__(self, db_name, modulestore, num_blocks):
+        self.conn = sqlite3.connect(db_name)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS {} ('
+            'id INTEGER PRIMARY KEY, modulestore TEXT, num_blocks INTEGER, operation TEXT, '
+            'elapsed REAL, queries INTEGER, memory INTEGER, timestamp TEXT)'.format(READS_TABLE)
+        )
+        self.modulestore = modulestore
+        self.num_blocks = num_blocks
+        self.process = psutil.Process()
+
+    @contextmanager
+    def measure(self, operation):
+        """
+        Measure the wall time (ms), the number of mongo queries and the growth of
+        the resident set size (kB) of the wrapped block.
+        """
+        start_memory = self.process.get_memory_info().rss
+        start_time = time.time()
+        with check_mongo_calls(None) as find_mocks:
+            yield
+        elapsed = (time.time() - start_time) * 1000
+        memory = (self.process.get_memory_info().rss - start_memory) / 1024
+        queries = sum(mock.call_count for mock in find_mocks.values())
+
+        self.conn.execute(
+            'INSERT INTO {} (modulestore, num_blocks, operation, elapsed, queries, memory, timestamp) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)'.format(READS_TABLE),
+            (self.modulestore, self.num_blocks, operation, elapsed, queries, memory,
+             datetime.datetime.now().isoformat())
+        )
+        self.conn.commit()
+
+    def close(self):
+        """Close the database connection."""
+        self.conn.close()
+
+
+@ddt.ddt
+# Eventually, exclude this attribute from regular unittests while running *only* tests
+# with this attribute during regular performance tests.
+# @attr("perf_test")
+@unittest.skip
+class ModulestoreReadTest(unittest.TestCase):
+    """
+    This class exists to time the common read operations of the Mongo-draft and
+    Split modulestores on courses with different amounts of blocks.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    @ddt.data(*itertools.product(
+        MIXED_MODULESTORE_SETUPS,
+        BLOCK_AMOUNT_PER_TEST,
+    ))
+    @ddt.unpack
+    def test_generate_read_stats(self, source_ms, num_blocks):
+        """
+        Generate read statistics for different modulestores and course sizes.
+        """
+        recorder = ReadStatsRecorder(DB_NAME, SHORT_NAME_MAP[source_ms], num_blocks)
+        self.addCleanup(recorder.close)
+
+        with source_ms.build() as (__, store):
+            course_key, leaf_location = make_synthetic_course(store, num_blocks)
+
+            with store.branch_setting(ModuleStoreEnum.Branch.published_only, course_key):
+                with recorder.measure('get_course'):
+                    course = store.get_course(course_key, depth=None)
+                self.assertIsNotNone(course)
+
+                with recorder.measure('get_item'):
+                    __ = store.get_item(leaf_location)
+
+                with recorder.measure('get_items'):
+                    items = store.get_items(course_key, qualifiers={'category': COURSE_LEVELS[-1]})
+                self.assertTrue(items)
+
+                with recorder.measure('get_parent_location'):
+                    __ = store.get_parent_location(leaf_location)
+
+                with recorder.measure('path_to_location'):
+                    __ = path_to_location(store, leaf_location)
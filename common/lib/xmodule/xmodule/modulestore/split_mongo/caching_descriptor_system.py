@@ -77,6 +77,8 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         self.default_class = default_class
         self.local_modules = {}
         self._services['library_tools'] = LibraryToolsService(modulestore)
+        # dict(BlockKey: dict(field_name: json value)), see _inherited_settings
+        self._inherited_settings_map = {}
 
     @lazy
     @contract(returns="dict(BlockKey: BlockKey)")
@@ -87,6 +89,36 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
                 parent_map[child] = block_key
         return parent_map
 
+    @contract(block_key=BlockKey)
+    def _inherited_settings(self, block_key):
+        """
+        Return the inheritable settings (in json format) that the block
+        `block_key` inherits from its ancestors in this structure, i.e. the
+        values set by the nearest ancestor setting each of them.
+
+        As for `_parent_map`, this is computed from the structure once, for
+        each block and all of its ancestors, and is then shared by all the
+        xblocks loaded by this system; blocks whose parent sets no inheritable
+        field share their parent's dict, which must not be modified.
+        """
+        inherited_settings = self._inherited_settings_map.get(block_key)
+        if inherited_settings is None:
+            parent_key = self._parent_map.get(block_key)
+            if parent_key is None:
+                inherited_settings = {}
+            else:
+                inherited_settings = self._inherited_settings(parent_key)
+                parent_fields = self.course_entry.structure['blocks'][parent_key].fields
+                parent_settings = {
+                    field_name: parent_fields[field_name]
+                    for field_name in InheritanceMixin.fields
+                    if field_name in parent_fields
+                }
+                if parent_settings:
+                    inherited_settings = dict(inherited_settings, **parent_settings)
+            self._inherited_settings_map[block_key] = inherited_settings
+        return inherited_settings
+
     @contract(usage_key="BlockUsageLocator | BlockKey", course_entry_override="CourseEnvelope | None")
     def _load_item(self, usage_key, course_entry_override=None, **kwargs):
         """
@@ -215,7 +247,13 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):
         )
 
         if InheritanceMixin in self.modulestore.xblock_mixins:
-            field_data = inheriting_field_data(kvs)
+            # Structures are modified in place during bulk operations, so only
+            # rely on the precomputed inherited settings outside of them
+            in_bulk_operation = self.modulestore._is_in_bulk_operation(course_key)  # pylint: disable=protected-access
+            if block_key in self._parent_map and not in_bulk_operation:
+                field_data = inheriting_field_data(kvs, self._inherited_settings(block_key))
+            else:
+                field_data = inheriting_field_data(kvs)
         else:
             field_data = KvsFieldData(kvs)
 
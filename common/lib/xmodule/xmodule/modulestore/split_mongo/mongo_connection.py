@@ -1,9 +1,14 @@
 """
 Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
 """
+import cPickle as pickle
 import re
+import threading
+import zlib
+from collections import OrderedDict
 from mongodb_proxy import autoretry_read, MongoProxy
 import pymongo
+import dogstats_wrapper as dog_stats_api
 
 # Import this just to export it
 from pymongo.errors import DuplicateKeyError  # pylint: disable=unused-import
@@ -26,6 +31,10 @@ def structure_from_mongo(structure):
     Converts 'root' from [block_type, block_id] to BlockKey.
     Converts 'blocks.*.fields.children' from [[block_type, block_id]] to [BlockKey].
     N.B. Does not convert any other ReferenceFields (because we don't know which fields they are at this level).
+
+    Each BlockKey, and each of the version guids and dates of the blocks' edit_info, is only
+    created once per structure and shared by all the blocks that refer to it, which keeps
+    the structures of large courses much smaller in memory.
     """
     check('seq[2]', structure['root'])
     check('list(dict)', structure['blocks'])
@@ -33,17 +42,37 @@ def structure_from_mongo(structure):
         if 'children' in block['fields']:
             check('list(list[2])', block['fields']['children'])
 
-    structure['root'] = BlockKey(*structure['root'])
+    interned = {}
+
+    def intern_value(value):
+        """
+        Return the first value equal to `value` seen in this structure.
+        """
+        return interned.setdefault(value, value)
+
+    structure['root'] = intern_value(BlockKey(*structure['root']))
     new_blocks = {}
     for block in structure['blocks']:
         if 'children' in block['fields']:
-            block['fields']['children'] = [BlockKey(*child) for child in block['fields']['children']]
-        new_blocks[BlockKey(block['block_type'], block.pop('block_id'))] = BlockData(**block)
+            block['fields']['children'] = [intern_value(BlockKey(*child)) for child in block['fields']['children']]
+        block_key = intern_value(BlockKey(block['block_type'], block.pop('block_id')))
+        block['block_type'] = block_key.type
+        edit_info = block.get('edit_info', {})
+        for field_name in _INTERNED_EDIT_INFO_FIELDS:
+            if edit_info.get(field_name) is not None:
+                edit_info[field_name] = intern_value(edit_info[field_name])
+        new_blocks[block_key] = BlockData(**block)
     structure['blocks'] = new_blocks
 
     return structure
 
 
+# The edit_info fields whose values are typically shared by many blocks of a structure
+_INTERNED_EDIT_INFO_FIELDS = (
+    'previous_version', 'update_version', 'source_version', 'edited_on', 'original_usage_version',
+)
+
+
 def structure_to_mongo(structure):
     """
     Converts the 'blocks' key from a map {BlockKey: block_data} to
@@ -70,17 +99,95 @@ def structure_to_mongo(structure):
     return new_structure
 
 
+class StructureCache(object):
+    """
+    A cache of structures keyed by their version guid. Structures are never
+    modified once they are stored, so entries never need to be invalidated.
+
+    Structures are kept pickled and compressed, both in a per-process LRU of
+    the `size` most recently used ones and, if given, in `shared_cache`, a
+    django-style cache (e.g. memcached) shared by all the processes. Each `get`
+    returns a new copy of the structure, so callers are free to modify it.
+
+    Structures larger than `max_entry_size` bytes once compressed are only
+    kept locally: memcached silently drops values above its item size limit
+    (1MB by default), so storing them would only cost a round trip.
+    """
+    KEY_PREFIX = 'split_structure.'
+    # Leave room under memcached's default 1MB limit for the key and flags
+    DEFAULT_MAX_ENTRY_SIZE = 1000 * 1000
+
+    def __init__(self, shared_cache=None, size=20, max_entry_size=DEFAULT_MAX_ENTRY_SIZE):
+        self.shared_cache = shared_cache
+        self.size = size
+        self.max_entry_size = max_entry_size
+        self._local_cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, version_guid):
+        """
+        Return the structure `version_guid`, or None if it isn't cached.
+        """
+        key = self.KEY_PREFIX + unicode(version_guid)
+        with self._lock:
+            data = self._local_cache.pop(key, None)
+            if data is not None:
+                # Move it back to the most recently used end
+                self._local_cache[key] = data
+
+        if data is None and self.shared_cache is not None:
+            data = self.shared_cache.get(key)
+            if data is not None:
+                self._add_local(key, data)
+
+        if data is None:
+            return None
+        return pickle.loads(zlib.decompress(data))
+
+    def set(self, version_guid, structure):
+        """
+        Cache `structure` as the structure `version_guid`.
+        """
+        key = self.KEY_PREFIX + unicode(version_guid)
+        # Compress at the fastest level: the structures are large, and this is
+        # done in the request that first reads them
+        data = zlib.compress(pickle.dumps(structure, pickle.HIGHEST_PROTOCOL), 1)
+        self._add_local(key, data)
+        if self.shared_cache is None:
+            return
+        if len(data) > self.max_entry_size:
+            dog_stats_api.increment('modulestore.split.structure_cache.too_large')
+            dog_stats_api.histogram('modulestore.split.structure_cache.too_large_size', len(data))
+            return
+        self.shared_cache.set(key, data)
+
+    def _add_local(self, key, data):
+        """
+        Add `data` to the local LRU, evicting the least recently used entries
+        beyond `self.size`.
+        """
+        with self._lock:
+            self._local_cache.pop(key, None)
+            self._local_cache[key] = data
+            while len(self._local_cache) > self.size:
+                self._local_cache.popitem(last=False)
+
+
 class MongoConnection(object):
     """
     Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
     """
     def __init__(
         self, db, collection, host, port=27017, tz_aware=True, user=None, password=None,
-        asset_collection=None, retry_wait_time=0.1, **kwargs
+        asset_collection=None, retry_wait_time=0.1, structure_cache=None, **kwargs
     ):
         """
         Create & open the connection, authenticate, and provide pointers to the collections
+
+        `structure_cache`: an optional StructureCache checked for structures
+            before reading them from the database.
         """
+        self.structure_cache = structure_cache
         self.database = MongoProxy(
             pymongo.database.Database(
                 pymongo.MongoClient(
@@ -122,7 +229,15 @@ class MongoConnection(object):
         """
         Get the structure from the persistence mechanism whose id is the given key
         """
-        return structure_from_mongo(self.structures.find_one({'_id': key}))
+        if self.structure_cache is not None:
+            structure = self.structure_cache.get(key)
+            if structure is not None:
+                return structure
+
+        structure = structure_from_mongo(self.structures.find_one({'_id': key}))
+        if self.structure_cache is not None:
+            self.structure_cache.set(key, structure)
+        return structure
 
     @autoretry_read()
     def find_structures_by_id(self, ids):
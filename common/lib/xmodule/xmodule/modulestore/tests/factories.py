@@ -323,7 +323,7 @@ def check_number_of_calls(object_with_method, method_name, maximum_calls, minimu
 def check_sum_of_calls(object_, methods, maximum_calls, minimum_calls=1):
     """
     Instruments the given methods on the given object to verify that the total sum of calls made to the
-    methods falls between minumum_calls and maximum_calls.
+    methods falls between minumum_calls and maximum_calls. Yields the mocks of the methods, by name.
     """
     mocks = {
         method: Mock(wraps=getattr(object_, method))
@@ -331,7 +331,7 @@ def check_sum_of_calls(object_, methods, maximum_calls, minimum_calls=1):
     }
 
     with patch.multiple(object_, **mocks):
-        yield
+        yield mocks
 
     call_count = sum(mock.call_count for mock in mocks.values())
     calls = pprint.pformat({
@@ -372,17 +372,22 @@ def check_mongo_calls(num_finds=0, num_sends=None):
     Instruments the given store to count the number of calls to find (incl find_one) and the number
     of calls to send_message which is for insert, update, and remove (if you provide num_sends). At the
     end of the with statement, it compares the counts to the num_finds and num_sends.
+    Yields the mocks of the find calls, by name.
 
-    :param num_finds: the exact number of find calls expected
+    :param num_finds: the exact number of find calls expected. If none, count them without comparing.
     :param num_sends: If none, don't instrument the send calls. If non-none, count and compare to
         the given int value.
     """
+    if num_finds is None:
+        max_finds, min_finds = float('inf'), 0
+    else:
+        max_finds, min_finds = num_finds, num_finds
     with check_sum_of_calls(
             pymongo.message,
             ['query', 'get_more'],
-            num_finds,
-            num_finds
-    ):
+            max_finds,
+            min_finds
+    ) as find_mocks:
         if num_sends is not None:
             with check_sum_of_calls(
                     pymongo.message,
@@ -391,9 +396,9 @@ def check_mongo_calls(num_finds=0, num_sends=None):
                     num_sends,
                     num_sends
             ):
-                yield
+                yield find_mocks
         else:
-            yield
+            yield find_mocks
 
 
 # This dict represents the attribute keys for a course's 'about' info.
@@ -0,0 +1,121 @@
+"""
+Tests for the loading and caching of split modulestore structures.
+"""
+import os
+import unittest
+from bson.objectid import ObjectId
+from mock import patch
+
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.mongo_connection import StructureCache, structure_from_mongo
+
+
+class DictCache(object):
+    """
+    A minimal stand-in for a django cache.
+    """
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value):
+        self.data[key] = value
+
+
+class TestStructureCache(unittest.TestCase):
+    """
+    Tests for StructureCache.
+    """
+    def setUp(self):
+        super(TestStructureCache, self).setUp()
+        self.shared_cache = DictCache()
+        self.cache = StructureCache(self.shared_cache, size=2)
+
+    def make_structure(self):
+        """
+        Return a new structure with a unique version guid.
+        """
+        return {'_id': ObjectId(), 'root': BlockKey('course', 'course'), 'blocks': {}}
+
+    def test_get_missing(self):
+        self.assertIsNone(self.cache.get(ObjectId()))
+
+    def test_get_returns_copy(self):
+        structure = self.make_structure()
+        self.cache.set(structure['_id'], structure)
+
+        cached = self.cache.get(structure['_id'])
+        self.assertEqual(structure, cached)
+        cached['blocks']['changed'] = True
+        self.assertEqual(structure, self.cache.get(structure['_id']))
+
+    def test_shared_between_processes(self):
+        structure = self.make_structure()
+        self.cache.set(structure['_id'], structure)
+
+        # Another process only shares the shared cache
+        other_cache = StructureCache(self.shared_cache)
+        self.assertEqual(structure, other_cache.get(structure['_id']))
+
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.dog_stats_api')
+    def test_too_large_for_shared_cache(self, mock_dog_stats_api):
+        cache = StructureCache(self.shared_cache, max_entry_size=1000)
+        small, large = self.make_structure(), self.make_structure()
+        # Random data doesn't compress
+        large['blocks']['data'] = os.urandom(2000)
+        cache.set(small['_id'], small)
+        cache.set(large['_id'], large)
+
+        # Both are cached locally, but only the small one is shared
+        self.assertEqual(large, cache.get(large['_id']))
+        self.assertEqual(small, StructureCache(self.shared_cache).get(small['_id']))
+        self.assertIsNone(StructureCache(self.shared_cache).get(large['_id']))
+        mock_dog_stats_api.increment.assert_called_once_with('modulestore.split.structure_cache.too_large')
+
+    def test_local_lru(self):
+        first, second, third = [self.make_structure() for __ in range(3)]
+        cache = StructureCache(size=2)
+        cache.set(first['_id'], first)
+        cache.set(second['_id'], second)
+        # Use the first structure, so that the second is evicted
+        self.assertEqual(first, cache.get(first['_id']))
+        cache.set(third['_id'], third)
+
+        self.assertEqual(first, cache.get(first['_id']))
+        self.assertIsNone(cache.get(second['_id']))
+        self.assertEqual(third, cache.get(third['_id']))
+
+
+class TestStructureFromMongo(unittest.TestCase):
+    """
+    Tests for structure_from_mongo.
+    """
+    def test_shared_values(self):
+        version = ObjectId()
+        structure = structure_from_mongo({
+            '_id': version,
+            'root': ['course', 'course'],
+            'blocks': [
+                {
+                    'block_type': block_type,
+                    'block_id': block_id,
+                    'fields': {'children': children},
+                    'edit_info': {'update_version': ObjectId(str(version))},
+                }
+                for block_type, block_id, children in [
+                    ('course', 'course', [['chapter', 'chapter']]),
+                    ('chapter', 'chapter', []),
+                ]
+            ],
+        })
+
+        root = structure['blocks'][BlockKey('course', 'course')]
+        chapter_key = root.fields['children'][0]
+        chapter = structure['blocks'][chapter_key]
+        # The same objects are shared by all the blocks that refer to them
+        self.assertIs(structure['root'], [key for key in structure['blocks'] if key.type == 'course'][0])
+        self.assertIs(chapter_key, [key for key in structure['blocks'] if key.type == 'chapter'][0])
+        self.assertIs(root.edit_info.update_version, chapter.edit_info.update_version)
+        self.assertEqual(version, chapter.edit_info.update_version)
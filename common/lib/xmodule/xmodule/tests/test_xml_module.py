@@ -11,7 +11,9 @@ from xblock.fields import Scope, String, Dict, Boolean, Integer, Float, Any, Lis
 from xblock.runtime import KvsFieldData, DictKeyValueStore
 
 from xmodule.fields import Date, Timedelta, RelativeTime
-from xmodule.modulestore.inheritance import InheritanceKeyValueStore, InheritanceMixin, InheritingFieldData
+from xmodule.modulestore.inheritance import (
+    InheritanceKeyValueStore, InheritanceMixin, InheritingFieldData, PrecomputedInheritingFieldData
+)
 from xmodule.xml_module import XmlDescriptor, serialize_field, deserialize_field
 from xmodule.course_module import CourseDescriptor
 from xmodule.seq_module import SequenceDescriptor
@@ -133,6 +135,42 @@ class InheritingFieldDataTest(unittest.TestCase):
         self.assertEqual(child.not_inherited, "nothing")
 
 
+class PrecomputedInheritingFieldDataTest(unittest.TestCase):
+    """Tests of PrecomputedInheritingFieldData."""
+
+    def get_a_block(self, inherited_settings):
+        """Construct an XBlock inheriting `inherited_settings`."""
+        field_data = PrecomputedInheritingFieldData(
+            inherited_settings=inherited_settings,
+            inheritable_names=['inherited'],
+            kvs=DictKeyValueStore({}),
+        )
+        system = get_test_descriptor_system()
+        # The parent is never needed
+        system.get_block = Mock(side_effect=AssertionError)
+        block = system.construct_xblock_from_class(
+            InheritingFieldDataTest.TestableInheritingXBlock,
+            field_data=field_data,
+            scope_ids=Mock(),
+        )
+        block.parent = "parent"
+        return block
+
+    def test_inherited(self):
+        block = self.get_a_block({'inherited': "Changed!"})
+        self.assertEqual(block.inherited, "Changed!")
+        self.assertEqual(block.not_inherited, "nothing")
+
+    def test_default_value(self):
+        block = self.get_a_block({})
+        self.assertEqual(block.inherited, "the default")
+
+    def test_set_value(self):
+        block = self.get_a_block({'inherited': "Changed!"})
+        block.inherited = "New Value!"
+        self.assertEqual(block.inherited, "New Value!")
+
+
 class EditableMetadataFieldsTest(unittest.TestCase):
     def test_display_name_field(self):
         editable_fields = self.get_xml_editable_fields(DictFieldData({}))
@@ -1,18 +1,23 @@
 # Compute grades using real division, with no integer truncation
 from __future__ import division
 from collections import defaultdict
+from datetime import datetime
+import hashlib
+from itertools import islice
 import json
 import random
 import logging
 
 from contextlib import contextmanager
 from django.conf import settings
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from django.test.client import RequestFactory
+from pytz import UTC
 
 import dogstats_wrapper as dog_stats_api
 
 from courseware import courses
+from courseware.access import has_access
 from courseware.model_data import FieldDataCache
 from student.models import anonymous_id_for_user
 from util.module_utils import yield_dynamic_descriptor_descendents
@@ -20,11 +25,12 @@ from xmodule import graders
 from xmodule.graders import Score
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import ItemNotFoundError
-from .models import StudentModule
+from xmodule.split_test_module import get_split_user_partitions
+from .models import PersistentSubsectionGrade, StudentModule
 from .module_render import get_module_for_descriptor
 from submissions import api as sub_api  # installed from the edx-submissions repository
 from opaque_keys import InvalidKeyError
-from opaque_keys.edx.keys import CourseKey
+from opaque_keys.edx.keys import CourseKey, UsageKey
 
 
 log = logging.getLogger("edx.courseware")
@@ -122,16 +128,16 @@ def answer_distributions(course_key):
 
 
 @transaction.commit_manually
-def grade(student, request, course, keep_raw_scores=False):
+def grade(student, request, course, keep_raw_scores=False, student_module_cache=None):
     """
     Wraps "_grade" with the manual_transaction context manager just in case
     there are unanticipated errors.
     """
     with manual_transaction():
-        return _grade(student, request, course, keep_raw_scores)
+        return _grade(student, request, course, keep_raw_scores, student_module_cache)
 
 
-def _grade(student, request, course, keep_raw_scores):
+def _grade(student, request, course, keep_raw_scores, student_module_cache=None):
     """
     Unwrapped version of "grade"
 
@@ -149,6 +155,8 @@ def _grade(student, request, course, keep_raw_scores):
       make up the final grade. (For display)
     - keep_raw_scores : if True, then value for key 'raw_scores' contains scores
       for every graded module
+    - student_module_cache : an optional StudentModuleScoreCache holding the
+      stored scores of the student, used instead of querying StudentModule
 
     More information on the format is in the docstring for CourseGrader.
     """
@@ -162,6 +170,9 @@ def _grade(student, request, course, keep_raw_scores):
         course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id)
     )
 
+    course_version = _course_version(student, course)
+    persisted_scores = _get_persisted_scores(student, course, course_version, submissions_scores)
+
     totaled_scores = {}
     # This next complicated loop is just to collect the totaled_scores, which is
     # passed to the grader
@@ -174,32 +185,41 @@ def _grade(student, request, course, keep_raw_scores):
             # some problems have state that is updated independently of interaction
             # with the LMS, so they need to always be scored. (E.g. foldit.,
             # combinedopenended)
-            should_grade_section = any(
+            always_recalculate = any(
                 descriptor.always_recalculate_grades for descriptor in section['xmoduledescriptors']
             )
+            # ...which also means that their scores cannot be persisted.
+            can_persist = persisted_scores is not None and not always_recalculate
+
+            scores = None
+            if can_persist:
+                scores = persisted_scores.get(section_descriptor.location)
+
+            should_grade_section = always_recalculate
 
             # If there are no problems that always have to be regraded, check to
             # see if any of our locations are in the scores from the submissions
             # API. If scores exist, we have to calculate grades for this section.
-            if not should_grade_section:
+            if scores is None and not should_grade_section:
                 should_grade_section = any(
                     descriptor.location.to_deprecated_string() in submissions_scores
                     for descriptor in section['xmoduledescriptors']
                 )
 
-            if not should_grade_section:
-                with manual_transaction():
-                    should_grade_section = StudentModule.objects.filter(
-                        student=student,
-                        module_state_key__in=[
-                            descriptor.location for descriptor in section['xmoduledescriptors']
-                        ]
-                    ).exists()
+            if scores is None and not should_grade_section:
+                section_locations = [descriptor.location for descriptor in section['xmoduledescriptors']]
+                if student_module_cache is not None:
+                    should_grade_section = student_module_cache.has_state(student, section_locations)
+                else:
+                    with manual_transaction():
+                        should_grade_section = StudentModule.objects.filter(
+                            student=student,
+                            module_state_key__in=section_locations
+                        ).exists()
 
             # If we haven't seen a single problem in the section, we don't have
             # to grade it at all! We can assume 0%
-            if should_grade_section:
-                scores = []
+            if scores is None and should_grade_section:
 
                 def create_module(descriptor):
                     '''creates an XModule instance given a descriptor'''
@@ -209,38 +229,36 @@ def _grade(student, request, course, keep_raw_scores):
                         field_data_cache = FieldDataCache([descriptor], course.id, student)
                     return get_module_for_descriptor(student, request, descriptor, field_data_cache, course.id)
 
-                for module_descriptor in yield_dynamic_descriptor_descendents(section_descriptor, create_module):
-
-                    (correct, total) = get_score(
-                        course.id, student, module_descriptor, create_module, scores_cache=submissions_scores
+                reservation = None
+                if can_persist and not _has_future_start([section_descriptor] + section['xmoduledescriptors']):
+                    reservation = _reserve_persisted_scores(
+                        student, course.id, section_descriptor.location,
+                        [descriptor.location for descriptor in section['xmoduledescriptors']]
                     )
-                    if correct is None and total is None:
-                        continue
+                scores = _compute_section_scores(
+                    course.id, student, section_descriptor, create_module, submissions_scores, student_module_cache
+                )
+                if reservation is not None:
+                    _persist_scores(reservation, course_version, scores)
 
+            if scores is not None:
+                graded_scores = []
+                for (correct, total, graded, display_name, location) in scores:
                     if settings.GENERATE_PROFILE_SCORES:  	# for debugging!
                         if total > 1:
                             correct = random.randrange(max(total - 2, 1), total + 1)
                         else:
                             correct = total
 
-                    graded = module_descriptor.graded
                     if not total > 0:
                         # We simply cannot grade a problem that is 12/0, because we might need it as a percentage
                         graded = False
 
-                    scores.append(
-                        Score(
-                            correct,
-                            total,
-                            graded,
-                            module_descriptor.display_name_with_default,
-                            module_descriptor.location
-                        )
-                    )
+                    graded_scores.append(Score(correct, total, graded, display_name, location))
 
-                _, graded_total = graders.aggregate_scores(scores, section_name)
+                _, graded_total = graders.aggregate_scores(graded_scores, section_name)
                 if keep_raw_scores:
-                    raw_scores += scores
+                    raw_scores += graded_scores
             else:
                 graded_total = Score(0.0, 1.0, True, section_name, None)
 
@@ -344,6 +362,9 @@ def _progress_summary(student, request, course):
 
     submissions_scores = sub_api.get_scores(course.id.to_deprecated_string(), anonymous_id_for_user(student, course.id))
 
+    course_version = _course_version(student, course)
+    persisted_scores = _get_persisted_scores(student, course, course_version, submissions_scores)
+
     chapters = []
     # Don't include chapters that aren't displayable (e.g. due to error)
     for chapter_module in course_module.get_display_items():
@@ -360,27 +381,37 @@ def _progress_summary(student, request, course):
                     continue
 
                 graded = section_module.graded
-                scores = []
 
-                module_creator = section_module.xmodule_runtime.get_module
+                raw_scores = None
+                if persisted_scores is not None:
+                    raw_scores = persisted_scores.get(section_module.location)
 
-                for module_descriptor in yield_dynamic_descriptor_descendents(section_module, module_creator):
-                    course_id = course.id
-                    (correct, total) = get_score(
-                        course_id, student, module_descriptor, module_creator, scores_cache=submissions_scores
-                    )
-                    if correct is None and total is None:
-                        continue
-
-                    scores.append(
-                        Score(
-                            correct,
-                            total,
-                            graded,
-                            module_descriptor.display_name_with_default,
-                            module_descriptor.location
+                if raw_scores is None:
+                    module_creator = section_module.xmodule_runtime.get_module
+
+                    reservation = None
+                    if persisted_scores is not None:
+                        scorable_descriptors = _scorable_descendents(
+                            getattr(section_module, 'descriptor', section_module)
                         )
+                        if not (
+                                any(descriptor.always_recalculate_grades for descriptor in scorable_descriptors) or
+                                _has_future_start([section_module] + scorable_descriptors)
+                        ):
+                            reservation = _reserve_persisted_scores(
+                                student, course.id, section_module.location,
+                                [descriptor.location for descriptor in scorable_descriptors]
+                            )
+                    raw_scores = _compute_section_scores(
+                        course.id, student, section_module, module_creator, submissions_scores
                     )
+                    if reservation is not None:
+                        _persist_scores(reservation, course_version, raw_scores)
+
+                scores = [
+                    Score(correct, total, graded, display_name, location)
+                    for (correct, total, _, display_name, location) in raw_scores
+                ]
 
                 scores.reverse()
                 section_total, _ = graders.aggregate_scores(
@@ -407,7 +438,174 @@ def _progress_summary(student, request, course):
     return chapters
 
 
-def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=None):
+def _compute_section_scores(course_id, student, section, module_creator, submissions_scores,
+                            student_module_cache=None):
+    """
+    Walk the blocks of `section` that are visible to `student` and return a
+    list of Scores for every block that has one. The `graded` flag of each
+    Score is the one of the block itself.
+    """
+    scores = []
+    for module_descriptor in yield_dynamic_descriptor_descendents(section, module_creator):
+        (correct, total) = get_score(
+            course_id, student, module_descriptor, module_creator,
+            scores_cache=submissions_scores, student_module_cache=student_module_cache
+        )
+        if correct is None and total is None:
+            continue
+
+        scores.append(
+            Score(
+                correct,
+                total,
+                module_descriptor.graded,
+                module_descriptor.display_name_with_default,
+                module_descriptor.location
+            )
+        )
+    return scores
+
+
+def _scorable_descendents(section_descriptor):
+    """
+    Return the descriptors of every block under `section_descriptor` (including
+    itself) that has a score, for any student. Mirrors the way
+    `CourseDescriptor.grading_context` collects `xmoduledescriptors`.
+    """
+    descriptors = [section_descriptor]
+    scorable = []
+    while descriptors:
+        descriptor = descriptors.pop()
+        if descriptor.has_score:
+            scorable.append(descriptor)
+        descriptors.extend(descriptor.get_children())
+    return scorable
+
+
+def _course_version(student, course):
+    """
+    Return an opaque string identifying the current version of the content of
+    `course` and of the access of `student` to it, or None if persistent grades
+    are not enabled or can't be used for this course.
+
+    The access of the student is what decides which blocks are scored besides
+    the content: their groups in the user partitions restricting access to the
+    content, and their staff access. Start dates are left out, as the scores
+    of the subsections which haven't fully started aren't persisted (see
+    `_has_future_start`).
+    """
+    if not settings.FEATURES.get('ENABLE_PERSISTENT_GRADES') or not student.is_authenticated():
+        return None
+    try:
+        edited_on = course.subtree_edited_on
+    except AttributeError:
+        # Not all modulestores keep track of edit info
+        return None
+    if not edited_on:
+        return None
+
+    access = [edited_on.isoformat(), unicode(bool(has_access(student, 'staff', course)))]
+    split_partitions = get_split_user_partitions(course.user_partitions)
+    for partition in course.user_partitions:
+        # split_test modules handle the access to their children themselves
+        if partition in split_partitions:
+            continue
+        group = partition.scheme.get_group_for_user(course.id, student, partition)
+        access.append(u'{}:{}'.format(partition.id, group.id if group is not None else u''))
+    return hashlib.sha1(u'|'.join(access).encode('utf-8')).hexdigest()
+
+
+def _has_future_start(descriptors):
+    """
+    Return whether any of `descriptors` starts in the future, in which case
+    the access of students to it, and so the scores of its subsection, will
+    change without any score changing.
+    """
+    now = datetime.now(UTC)
+    return any(descriptor.start is not None and descriptor.start > now for descriptor in descriptors)
+
+
+def _get_persisted_scores(student, course, course_version, submissions_scores):
+    """
+    Return a dict mapping subsection usage keys to the list of Scores persisted
+    for `student` at `course_version` (see `_course_version`), or None if
+    persistent grades are not enabled or can't be used for this course.
+
+    As in `get_score`, scores registered with the submissions API take
+    precedence over the persisted ones.
+    """
+    if course_version is None:
+        return None
+
+    persisted_scores = {}
+    with manual_transaction():
+        rows = PersistentSubsectionGrade.objects.filter(
+            user=student, course_id=course.id, course_version=course_version
+        )
+        for row in rows:
+            try:
+                scores = []
+                for (correct, total, graded, display_name, location) in json.loads(row.scores):
+                    location = UsageKey.from_string(location).map_into_course(course.id)
+                    correct, total = submissions_scores.get(location.to_deprecated_string(), (correct, total))
+                    scores.append(Score(correct, total, graded, display_name, location))
+                persisted_scores[row.usage_key.map_into_course(course.id)] = scores
+            except (ValueError, InvalidKeyError):
+                log.warning(u"Ignoring unparseable persisted scores: %s", row)
+    return persisted_scores
+
+
+def _reserve_persisted_scores(student, course_key, section_key, blocks):
+    """
+    Create an empty, not yet usable, persisted grade row for a subsection
+    that is about to be graded.
+
+    The row is created before the scores are computed, so that a score change
+    that happens while grading is in progress deletes it (through
+    `PersistentSubsectionGrade.invalidate`) and the scores computed from
+    the outdated state are never persisted.
+
+    Returns None if the subsection is concurrently being graded for the same
+    student (e.g. a grade report runs along the progress page): the scores
+    are then left to the other grading to persist.
+    """
+    with manual_transaction():
+        PersistentSubsectionGrade.objects.filter(
+            user=student, course_id=course_key, usage_key=section_key
+        ).delete()
+        savepoint = transaction.savepoint()
+        try:
+            reservation = PersistentSubsectionGrade.objects.create(
+                user=student,
+                course_id=course_key,
+                usage_key=section_key,
+                course_version='',
+                blocks=u'\n{}\n'.format(u'\n'.join(unicode(block) for block in blocks)),
+            )
+        except IntegrityError:
+            transaction.savepoint_rollback(savepoint)
+            log.info(u"Subsection %s is already being graded for student %s", section_key, student.id)
+            return None
+        transaction.savepoint_commit(savepoint)
+        return reservation
+
+
+def _persist_scores(reservation, course_version, scores):
+    """
+    Fill the row reserved with `_reserve_persisted_scores` with the computed
+    `scores`, unless it has been invalidated in the meantime.
+    """
+    with manual_transaction():
+        PersistentSubsectionGrade.objects.filter(pk=reservation.pk).update(
+            course_version=course_version,
+            scores=json.dumps([
+                [correct, total, graded, display_name, unicode(location)]
+                for (correct, total, graded, display_name, location) in scores
+            ]),
+        )
+
+
+def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=None, student_module_cache=None):
     """
     Return the score for a user on a problem, as a tuple (correct, total).
     e.g. (5,7) if you got 5 out of 7 points.
@@ -421,6 +619,8 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
            Can return None if user doesn't have access, or if something else went wrong.
     scores_cache: A dict of location names to (earned, possible) point tuples.
            If an entry is found in this cache, it takes precedence.
+    student_module_cache: An optional StudentModuleScoreCache holding the stored
+           grade and max_grade of the user's StudentModules.
     """
     scores_cache = scores_cache or {}
 
@@ -447,18 +647,22 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
         # These are not problems, and do not have a score
         return (None, None)
 
-    try:
-        student_module = StudentModule.objects.get(
-            student=user,
-            course_id=course_id,
-            module_state_key=problem_descriptor.location
-        )
-    except StudentModule.DoesNotExist:
-        student_module = None
+    if student_module_cache is not None and student_module_cache.has_location(problem_descriptor.location):
+        stored_grade, stored_max_grade = student_module_cache.get_score(user, problem_descriptor.location)
+    else:
+        try:
+            student_module = StudentModule.objects.get(
+                student=user,
+                course_id=course_id,
+                module_state_key=problem_descriptor.location
+            )
+            stored_grade, stored_max_grade = student_module.grade, student_module.max_grade
+        except StudentModule.DoesNotExist:
+            stored_grade, stored_max_grade = None, None
 
-    if student_module is not None and student_module.max_grade is not None:
-        correct = student_module.grade if student_module.grade is not None else 0
-        total = student_module.max_grade
+    if stored_max_grade is not None:
+        correct = stored_grade if stored_grade is not None else 0
+        total = stored_max_grade
     else:
         # If the problem was not in the cache, or hasn't been graded yet,
         # we need to instantiate the problem.
@@ -479,7 +683,9 @@ def get_score(course_id, user, problem_descriptor, module_creator, scores_cache=
     weight = problem_descriptor.weight
     if weight is not None:
         if total == 0:
-            log.exception("Cannot reweight a problem with zero total points. Problem: " + str(student_module))
+            log.exception(
+                "Cannot reweight a problem with zero total points. Problem: " + str(problem_descriptor.location)
+            )
             return (correct, total)
         correct = correct * weight / total
         total = weight
@@ -500,6 +706,67 @@ def manual_transaction():
         transaction.commit()
 
 
+class StudentModuleScoreCache(object):
+    """
+    The stored grade and max_grade of the StudentModules of a group of
+    students for a set of blocks of a course.
+
+    All the rows are fetched with a single query (and without the state
+    column), so that grading many students in a row doesn't cost one query
+    per student and problem.
+    """
+    def __init__(self, course_key, students, usage_keys):
+        self.course_key = course_key
+        self.usage_keys = set(usage_keys)
+        self._scores = {}
+
+        student_ids = [student.id for student in students]
+        if not student_ids or not self.usage_keys:
+            return
+
+        with manual_transaction():
+            rows = StudentModule.objects.filter(
+                course_id=course_key,
+                student__in=student_ids,
+                module_state_key__in=list(self.usage_keys),
+            ).values_list('student_id', 'module_state_key', 'grade', 'max_grade')
+
+            for student_id, module_state_key, stored_grade, max_grade in rows:
+                usage_key = UsageKey.from_string(module_state_key).map_into_course(course_key)
+                self._scores[(student_id, usage_key)] = (stored_grade, max_grade)
+
+    def has_location(self, usage_key):
+        """
+        Return whether the StudentModules of `usage_key` have been fetched.
+        """
+        return usage_key in self.usage_keys
+
+    def has_state(self, student, usage_keys):
+        """
+        Return whether `student` has a StudentModule for any of `usage_keys`.
+        """
+        return any((student.id, usage_key) in self._scores for usage_key in usage_keys)
+
+    def get_score(self, student, usage_key):
+        """
+        Return the stored (grade, max_grade) tuple of `student` for
+        `usage_key`, or (None, None) if there is no StudentModule.
+        """
+        return self._scores.get((student.id, usage_key), (None, None))
+
+
+def _chunks(iterable, chunk_size):
+    """
+    Yield lists of up to `chunk_size` consecutive items of `iterable`.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
 def iterate_grades_for(course_or_id, students, keep_raw_scores=False):
     """Given a course_id and an iterable of students (User), yield a tuple of:
 
@@ -528,25 +795,41 @@ def iterate_grades_for(course_or_id, students, keep_raw_scores=False):
     # grading that student.
     request = RequestFactory().get('/')
 
-    for student in students:
-        with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course.id)]):
-            try:
-                request.user = student
-                # Grading calls problem rendering, which calls masquerading,
-                # which checks session vars -- thus the empty session dict below.
-                # It's not pretty, but untangling that is currently beyond the
-                # scope of this feature.
-                request.session = {}
-                gradeset = grade(student, request, course, keep_raw_scores)
-                yield student, gradeset, ""
-            except Exception as exc:  # pylint: disable=broad-except
-                # Keep marching on even if this student couldn't be graded for
-                # some reason, but log it for future reference.
-                log.exception(
-                    'Cannot grade student %s (%s) in course %s because of exception: %s',
-                    student.username,
-                    student.id,
-                    course.id,
-                    exc.message
-                )
-                yield student, {}, exc.message
+    # The stored scores of the students are fetched in bulk, one chunk of
+    # students at a time, for every block that can affect grading.
+    scored_locations = [
+        descriptor.location for descriptor in course.grading_context['all_descriptors'] if descriptor.has_score
+    ]
+
+    for students_chunk in _chunks(students, settings.GRADES_STUDENT_CHUNK_SIZE):
+        student_module_cache = StudentModuleScoreCache(course.id, students_chunk, scored_locations)
+        for student in students_chunk:
+            yield _grade_for_iteration(student, request, course, keep_raw_scores, student_module_cache)
+
+
+def _grade_for_iteration(student, request, course, keep_raw_scores, student_module_cache):
+    """
+    Grade a single student for `iterate_grades_for`, returning a tuple of
+    (student, gradeset, err_msg).
+    """
+    with dog_stats_api.timer('lms.grades.iterate_grades_for', tags=[u'action:{}'.format(course.id)]):
+        try:
+            request.user = student
+            # Grading calls problem rendering, which calls masquerading,
+            # which checks session vars -- thus the empty session dict below.
+            # It's not pretty, but untangling that is currently beyond the
+            # scope of this feature.
+            request.session = {}
+            gradeset = grade(student, request, course, keep_raw_scores, student_module_cache=student_module_cache)
+            return student, gradeset, ""
+        except Exception as exc:  # pylint: disable=broad-except
+            # Keep marching on even if this student couldn't be graded for
+            # some reason, but log it for future reference.
+            log.exception(
+                'Cannot grade student %s (%s) in course %s because of exception: %s',
+                student.username,
+                student.id,
+                course.id,
+                exc.message
+            )
+            return student, {}, exc.message
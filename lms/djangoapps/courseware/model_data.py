@@ -3,7 +3,9 @@ Classes to provide the LMS runtime data storage to XBlocks
 """
 
 import json
-from collections import defaultdict
+import threading
+from collections import defaultdict, OrderedDict
+from contextlib import contextmanager
 from itertools import chain
 from .models import (
     StudentModule,
@@ -42,10 +44,108 @@ def chunks(items, chunk_size):
     return (items[i:i + chunk_size] for i in xrange(0, len(items), chunk_size))
 
 
+class _PendingWrites(threading.local):
+    """
+    A thread local holding the field objects whose writes are deferred by
+    `deferred_writes`, and the functions to call once they are saved, or None
+    if writes aren't being deferred.
+    """
+    field_objects = None
+    callbacks = None
+
+
+_PENDING_WRITES = _PendingWrites()
+
+
+@contextmanager
+def deferred_writes():
+    """
+    A context manager within which the field objects modified through a
+    `DjangoKeyValueStore` aren't saved right away, but once each when the
+    context exits, however many times they were modified. This coalesces the
+    writes (and StudentModuleHistory entries) of an XBlock that saves its
+    fields several times while handling a single request.
+
+    If an exception is raised within the context, the deferred writes (and
+    the functions registered with `call_after_writes`) are dropped, as the
+    request's transaction is rolled back anyway.
+    """
+    if _PENDING_WRITES.field_objects is not None:
+        # The outermost context saves the deferred writes.
+        yield
+        return
+
+    _PENDING_WRITES.field_objects = OrderedDict()
+    _PENDING_WRITES.callbacks = []
+    try:
+        yield
+        pending_writes = _PENDING_WRITES.field_objects.values()
+        callbacks = _PENDING_WRITES.callbacks
+    finally:
+        _PENDING_WRITES.field_objects = None
+        _PENDING_WRITES.callbacks = None
+    _save_field_objects(pending_writes)
+    for callback in callbacks:
+        callback()
+
+
+def defer_write(field_object, fields):
+    """
+    Add `field_object`, whose `fields` (`DjangoKeyValueStore.Key`s) were
+    modified, to the writes deferred by the enclosing `deferred_writes()`.
+
+    Returns False if writes aren't being deferred, in which case it's up to
+    the caller to save `field_object`.
+    """
+    pending_writes = _PENDING_WRITES.field_objects
+    if pending_writes is None:
+        return False
+    # Keyed by id, as distinct instances of the same row compare equal
+    pending_writes.setdefault(id(field_object), (field_object, []))[1].extend(fields)
+    return True
+
+
+def call_after_writes(callback):
+    """
+    Call `callback` once the writes deferred by the enclosing
+    `deferred_writes()` are saved, or right away if writes aren't being
+    deferred.
+    """
+    if _PENDING_WRITES.callbacks is None:
+        callback()
+    else:
+        _PENDING_WRITES.callbacks.append(callback)
+
+
+def _save_field_objects(field_objects):
+    """
+    Save each of `field_objects`, a list of pairs of a field object and the
+    list of `DjangoKeyValueStore.Key`s of the fields that were modified in it.
+
+    Raises a KeyValueMultiSaveError listing the fields that were saved if
+    any of the objects fails to save.
+    """
+    saved_fields = []
+    for field_object, fields in field_objects:
+        try:
+            # Save the field object that we made above
+            field_object.save()
+            # If save is successful on this scope, add the saved fields to
+            # the list of successful saves
+            saved_fields.extend([field.field_name for field in fields])
+        except DatabaseError:
+            log.exception('Error saving fields %r', fields)
+            raise KeyValueMultiSaveError(saved_fields)
+
+
 class FieldDataCache(object):
     """
     A cache of django model objects needed to supply the data
     for a module and its decendants
+
+    The cache can be extended with more descriptors at any time (see
+    `add_descriptors_to_cache`); only the data that it has not already
+    queried for is then loaded from the database.
     """
     def __init__(self, descriptors, course_id, user, select_for_update=False, asides=None):
         '''
@@ -62,6 +162,9 @@ class FieldDataCache(object):
         asides: The list of aside types to load, or None to prefetch no asides.
         '''
         self.cache = {}
+        # Maps each scope to the set of keys that have already been queried
+        # for in that scope, whether or not a matching object was found.
+        self._queried_keys = defaultdict(set)
         self.select_for_update = select_for_update
 
         if asides is None:
@@ -78,11 +181,14 @@ class FieldDataCache(object):
     def add_descriptors_to_cache(self, descriptors):
         """
         Add all `descriptors` to this FieldDataCache.
+
+        Objects that are already in the cache are kept as they are, since
+        they may have been updated since they were loaded.
         """
         if self.user.is_authenticated():
             for scope, fields in self._fields_to_cache(descriptors).items():
                 for field_object in self._retrieve_fields(scope, fields, descriptors):
-                    self.cache[self._cache_key_from_field_object(scope, field_object)] = field_object
+                    self.cache.setdefault(self._cache_key_from_field_object(scope, field_object), field_object)
 
     def add_descriptor_descendents(self, descriptor, depth=None, descriptor_filter=lambda descriptor: True):
         """
@@ -194,38 +300,69 @@ class FieldDataCache(object):
 
         return block_types
 
+    def _keys_to_query(self, scope, keys):
+        """
+        Return the subset of `keys` in `scope` that haven't been queried for
+        yet, and record them as queried.
+        """
+        keys = set(keys) - self._queried_keys[scope]
+        self._queried_keys[scope].update(keys)
+        return keys
+
     def _retrieve_fields(self, scope, fields, descriptors):
         """
         Queries the database for all of the fields in the specified scope
+        that haven't already been queried for
         """
+        field_names = set(field.name for field in fields)
+
         if scope == Scope.user_state:
+            usage_ids = self._keys_to_query(scope, self._all_usage_ids(descriptors))
+            if not usage_ids:
+                return []
             return self._chunked_query(
                 StudentModule,
                 'module_state_key__in',
-                self._all_usage_ids(descriptors),
+                usage_ids,
                 course_id=self.course_id,
                 student=self.user.pk,
             )
         elif scope == Scope.user_state_summary:
+            keys = self._keys_to_query(
+                scope,
+                ((usage_id, field_name) for usage_id in self._all_usage_ids(descriptors) for field_name in field_names)
+            )
+            if not keys:
+                return []
             return self._chunked_query(
                 XModuleUserStateSummaryField,
                 'usage_id__in',
-                self._all_usage_ids(descriptors),
-                field_name__in=set(field.name for field in fields),
+                set(usage_id for usage_id, __ in keys),
+                field_name__in=set(field_name for __, field_name in keys),
             )
         elif scope == Scope.preferences:
+            keys = self._keys_to_query(
+                scope,
+                ((block_type, field_name) for block_type in self._all_block_types(descriptors)
+                 for field_name in field_names)
+            )
+            if not keys:
+                return []
             return self._chunked_query(
                 XModuleStudentPrefsField,
                 'module_type__in',
-                self._all_block_types(descriptors),
+                set(block_type for block_type, __ in keys),
                 student=self.user.pk,
-                field_name__in=set(field.name for field in fields),
+                field_name__in=set(field_name for __, field_name in keys),
             )
         elif scope == Scope.user_info:
+            field_names = self._keys_to_query(scope, field_names)
+            if not field_names:
+                return []
             return self._query(
                 XModuleStudentInfoField,
                 student=self.user.pk,
-                field_name__in=set(field.name for field in fields),
+                field_name__in=field_names,
             )
         else:
             return []
@@ -378,10 +515,11 @@ class DjangoKeyValueStore(KeyValueStore):
         `kv_dict`: A dictionary of dirty fields that maps
           xblock.KvsFieldData._key : value
 
+        Within `deferred_writes()`, the modified field objects are only saved
+        when the context exits.
         """
-        saved_fields = []
         # field_objects maps a field_object to a list of associated fields
-        field_objects = dict()
+        field_objects = OrderedDict()
         for field in kv_dict:
             # Check field for validity
             if field.scope not in self._allowed_scopes:
@@ -404,16 +542,12 @@ class DjangoKeyValueStore(KeyValueStore):
                 # we don't have to worry about conflicts
                 field_object.value = json.dumps(kv_dict[field])
 
-        for field_object in field_objects:
-            try:
-                # Save the field object that we made above
-                field_object.save()
-                # If save is successful on this scope, add the saved fields to
-                # the list of successful saves
-                saved_fields.extend([field.field_name for field in field_objects[field_object]])
-            except DatabaseError:
-                log.exception('Error saving fields %r', field_objects[field_object])
-                raise KeyValueMultiSaveError(saved_fields)
+        if _PENDING_WRITES.field_objects is not None:
+            for field_object, fields in field_objects.items():
+                defer_write(field_object, fields)
+            return
+
+        _save_field_objects(field_objects.items())
 
     def delete(self, key):
         if key.scope not in self._allowed_scopes:
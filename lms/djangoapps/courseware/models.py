@@ -17,10 +17,12 @@ import logging
 from django.contrib.auth.models import User
 from django.conf import settings
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_init, post_save
 from django.dispatch import receiver, Signal
 
 from model_utils.models import TimeStampedModel
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey, UsageKey
 from student.models import user_by_anonymous_id
 from submissions.models import score_set, score_reset
 
@@ -239,6 +241,60 @@ class OfflineComputedGradeLog(models.Model):
         return "[OCGLog] %s: %s" % (self.course_id.to_deprecated_string(), self.created)  # pylint: disable=no-member
 
 
+class PersistentSubsectionGrade(models.Model):
+    """
+    Per-student scores for a single subsection, computed at a given version of
+    the course content.
+
+    Rows are written by `courseware.grades` the first time a subsection is
+    graded for a student and read back on subsequent gradings, so that only
+    subsections whose scores changed have to be walked again. A row is stale
+    (and ignored) once the version of the course content, or of the access of
+    the student to it, differs from the one it was computed against, and it is
+    deleted as soon as a score changes for any of the blocks listed in `blocks`.
+    """
+    class Meta(object):  # pylint: disable=missing-docstring
+        unique_together = (('user', 'course_id', 'usage_key'),)
+
+    user = models.ForeignKey(User, db_index=True)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+
+    # The subsection these scores belong to
+    usage_key = LocationKeyField(max_length=255, db_index=True)
+
+    # Opaque identifier of the versions of the course content and of the
+    # student's access to it the scores were computed against
+    course_version = models.CharField(max_length=255, blank=True)
+
+    # Usage keys of every scorable block that may contribute to this
+    # subsection, each followed and preceded by a newline; used to find the
+    # rows to invalidate on score changes.
+    blocks = models.TextField(blank=True)
+
+    # JSON list of [earned, possible, graded, display_name, location] entries
+    scores = models.TextField(default='[]')
+
+    modified = models.DateTimeField(auto_now=True, db_index=True)
+
+    @classmethod
+    def invalidate(cls, user_id, course_id, usage_key):
+        """
+        Delete the persisted subsection scores of the user that depend on the
+        block identified by `usage_key`.
+        """
+        if not settings.FEATURES.get('ENABLE_PERSISTENT_GRADES'):
+            return
+        cls.objects.filter(
+            user__id=user_id,
+            course_id=course_id,
+            # The delimiters keep the key from matching those it's a prefix of
+            blocks__contains=u'\n{}\n'.format(usage_key.map_into_course(course_id)),
+        ).delete()
+
+    def __unicode__(self):
+        return u"[PersistentSubsectionGrade] {}: {} ({})".format(self.user_id, self.usage_key, self.course_version)
+
+
 class StudentFieldOverride(TimeStampedModel):
     """
     Holds the value of a specific field overriden for a student.  This is used
@@ -352,3 +408,49 @@ def submissions_score_reset_handler(sender, **kwargs):  # pylint: disable=unused
             u"Failed to process score_reset signal from Submissions API. "
             "user: %s, course_id: %s, usage_id: %s", user, course_id, usage_id
         )
+
+
+@receiver(post_init, sender=StudentModule)
+def student_module_init_handler(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Remember the score a StudentModule was loaded with (none for a new one),
+    to tell whether saving it changes the score.
+    """
+    stored_score = (instance.grade, instance.max_grade) if instance.pk else (None, None)
+    instance._stored_score = stored_score  # pylint: disable=protected-access
+
+
+@receiver(post_save, sender=StudentModule)
+def student_module_save_persistent_grade_handler(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidate the persisted subsection scores that depend on a StudentModule
+    whenever it is saved with a new score.
+    """
+    score = (instance.grade, instance.max_grade)
+    if getattr(instance, '_stored_score', None) != score:
+        PersistentSubsectionGrade.invalidate(instance.student_id, instance.course_id, instance.module_state_key)
+    instance._stored_score = score  # pylint: disable=protected-access
+
+
+@receiver(post_delete, sender=StudentModule)
+def student_module_delete_persistent_grade_handler(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidate the persisted subsection scores that depend on a StudentModule
+    when it is deleted (e.g. when a student's state is reset).
+    """
+    PersistentSubsectionGrade.invalidate(instance.student_id, instance.course_id, instance.module_state_key)
+
+
+@receiver(SCORE_CHANGED)
+def score_changed_persistent_grade_handler(sender, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidate the persisted subsection scores that depend on a block whose
+    score changed outside of StudentModule (e.g. through the Submissions API).
+    """
+    try:
+        course_id = CourseKey.from_string(kwargs['course_id'])
+        usage_key = UsageKey.from_string(kwargs['usage_id'])
+    except (KeyError, InvalidKeyError):
+        log.exception(u"Unable to invalidate persisted grades for SCORE_CHANGED signal: %s", kwargs)
+        return
+    PersistentSubsectionGrade.invalidate(kwargs.get('user_id'), course_id, usage_key)
@@ -18,7 +18,6 @@ from opaque_keys import InvalidKeyError
 
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.cache import cache
 from django.core.context_processors import csrf
 from django.core.exceptions import PermissionDenied
 from django.core.urlresolvers import reverse
@@ -31,7 +30,9 @@ import newrelic.agent
 from capa.xqueue_interface import XQueueInterface
 from courseware.access import has_access, get_user_role
 from courseware.masquerade import setup_masquerade
-from courseware.model_data import FieldDataCache, DjangoKeyValueStore
+from courseware.model_data import (
+    FieldDataCache, DjangoKeyValueStore, deferred_writes, defer_write, call_after_writes
+)
 from courseware.models import SCORE_CHANGED
 from courseware.entrance_exams import (
     get_entrance_exam_score,
@@ -58,9 +59,7 @@ from xmodule.contentstore.django import contentstore
 from xmodule.modulestore.django import modulestore, ModuleI18nService
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from openedx.core.lib.xblock_utils import (
-    replace_course_urls,
-    replace_jump_to_id_urls,
-    replace_static_urls,
+    replace_urls,
     add_staff_markup,
     wrap_xblock,
     request_token
@@ -69,7 +68,7 @@ from xmodule.lti_module import LTIModule
 from xmodule.x_module import XModuleDescriptor
 from xblock_django.user_service import DjangoXBlockUserService
 from util.json_request import JsonResponse
-from util.sandboxing import can_execute_unsafe_code, get_python_lib_zip
+from util.sandboxing import can_execute_unsafe_code, get_python_lib_zip, get_safe_exec_cache
 from util import milestones_helpers
 from util.module_utils import yield_dynamic_descriptor_descendents
 from verify_student.services import ReverificationService
@@ -428,41 +427,50 @@ def get_module_system_for_user(user, field_data_cache,
         # Update the grades
         student_module.grade = event.get('value')
         student_module.max_grade = event.get('max_value')
-        # Save all changes to the underlying KeyValueStore
-        student_module.save()
-
-        # Bin score into range and increment stats
-        score_bucket = get_score_bucket(student_module.grade, student_module.max_grade)
-
-        tags = [
-            u"org:{}".format(course_id.org),
-            u"course:{}".format(course_id),
-            u"score_bucket:{0}".format(score_bucket)
-        ]
-
-        if grade_bucket_type is not None:
-            tags.append('type:%s' % grade_bucket_type)
-
-        dog_stats_api.increment("lms.courseware.question_answered", tags=tags)
+        # Save all changes to the underlying KeyValueStore, along with the
+        # state of the module if its writes are deferred
+        if not defer_write(student_module, [key]):
+            student_module.save()
+
+        def score_changed():
+            """
+            Report the new score, once it's saved.
+            """
+            # Bin score into range and increment stats
+            score_bucket = get_score_bucket(student_module.grade, student_module.max_grade)
+
+            tags = [
+                u"org:{}".format(course_id.org),
+                u"course:{}".format(course_id),
+                u"score_bucket:{0}".format(score_bucket)
+            ]
+
+            if grade_bucket_type is not None:
+                tags.append('type:%s' % grade_bucket_type)
+
+            dog_stats_api.increment("lms.courseware.question_answered", tags=tags)
+
+            # Cycle through the milestone fulfillment scenarios to see if any are now applicable
+            # thanks to the updated grading information that was just submitted
+            _fulfill_content_milestones(
+                user,
+                course_id,
+                descriptor.location,
+            )
 
-        # Cycle through the milestone fulfillment scenarios to see if any are now applicable
-        # thanks to the updated grading information that was just submitted
-        _fulfill_content_milestones(
-            user,
-            course_id,
-            descriptor.location,
-        )
+            # Send a signal out to any listeners who are waiting for score change
+            # events.
+            SCORE_CHANGED.send(
+                sender=None,
+                points_possible=event['max_value'],
+                points_earned=event['value'],
+                user_id=user_id,
+                course_id=unicode(course_id),
+                usage_id=unicode(descriptor.location)
+            )
 
-        # Send a signal out to any listeners who are waiting for score change
-        # events.
-        SCORE_CHANGED.send(
-            sender=None,
-            points_possible=event['max_value'],
-            points_earned=event['value'],
-            user_id=user_id,
-            course_id=unicode(course_id),
-            usage_id=unicode(descriptor.location)
-        )
+        # The milestones and the receivers of SCORE_CHANGED read the saved score
+        call_after_writes(score_changed)
 
     def publish(block, event_type, event):
         """A function that allows XModules to publish events."""
@@ -548,27 +556,23 @@ def get_module_system_for_user(user, field_data_cache,
     # prefix is going to have to be specific to the module, not the directory
     # that the xml was loaded from
 
-    # Rewrite urls beginning in /static to point to course-specific content
-    block_wrappers.append(partial(
-        replace_static_urls,
-        getattr(descriptor, 'data_dir', None),
-        course_id=course_id,
-        static_asset_path=static_asset_path or descriptor.static_asset_path
-    ))
-
-    # Allow URLs of the form '/course/' refer to the root of multicourse directory
+    # Rewrite, in a single pass:
+    # - urls beginning in /static to point to course-specific content
+    # - urls of the form '/course/' to refer to the root of multicourse directory
     #   hierarchy of this course
-    block_wrappers.append(partial(replace_course_urls, course_id))
-
-    # this will rewrite intra-courseware links (/jump_to_id/<id>). This format
-    # is an improvement over the /course/... format for studio authored courses,
-    # because it is agnostic to course-hierarchy.
+    # - intra-courseware links (/jump_to_id/<id>). This format is an improvement
+    #   over the /course/... format for studio authored courses, because it is
+    #   agnostic to course-hierarchy.
     # NOTE: module_id is empty string here. The 'module_id' will get assigned in the replacement
     # function, we just need to specify something to get the reverse() to work.
     block_wrappers.append(partial(
-        replace_jump_to_id_urls,
-        course_id,
-        reverse('jump_to_id', kwargs={'course_id': course_id.to_deprecated_string(), 'module_id': ''}),
+        replace_urls,
+        getattr(descriptor, 'data_dir', None),
+        course_id=course_id,
+        jump_to_id_base_url=reverse(
+            'jump_to_id', kwargs={'course_id': course_id.to_deprecated_string(), 'module_id': ''}
+        ),
+        static_asset_path=static_asset_path or descriptor.static_asset_path
     ))
 
     if settings.FEATURES.get('DISPLAY_DEBUG_INFO_TO_STAFF'):
@@ -629,7 +633,7 @@ def get_module_system_for_user(user, field_data_cache,
         course_id=course_id,
         open_ended_grading_interface=open_ended_grading_interface,
         s3_interface=s3_interface,
-        cache=cache,
+        cache=get_safe_exec_cache(),
         can_execute_unsafe_code=(lambda: can_execute_unsafe_code(course_id)),
         get_python_lib_zip=(lambda: get_python_lib_zip(contentstore, course_id)),
         # TODO: When we merge the descriptor and module systems, we can stop reaching into the mixologist (cpennington)
@@ -921,7 +925,8 @@ def _invoke_xblock_handler(request, course_id, usage_id, handler, suffix):
     tracking_context_name = 'module_callback_handler'
     req = django_to_webob_request(request)
     try:
-        with tracker.get_tracker().context(tracking_context_name, tracking_context):
+        # Fields saved several times by the handler are only written once
+        with tracker.get_tracker().context(tracking_context_name, tracking_context), deferred_writes():
             resp = instance.handle(handler, req, suffix)
 
     except NoSuchHandlerError:
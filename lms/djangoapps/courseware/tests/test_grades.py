@@ -2,6 +2,7 @@
 Test grade calculation.
 """
 from django.http import Http404
+from django.test.utils import override_settings
 from mock import patch
 from nose.plugins.attrib import attr
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
@@ -12,7 +13,7 @@ from xmodule.modulestore.tests.factories import CourseFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 
 
-def _grade_with_errors(student, request, course, keep_raw_scores=False):
+def _grade_with_errors(student, request, course, keep_raw_scores=False, student_module_cache=None):
     """This fake grade method will throw exceptions for student3 and
     student4, but allow any other students to go through normal grading.
 
@@ -23,7 +24,9 @@ def _grade_with_errors(student, request, course, keep_raw_scores=False):
     if student.username in ['student3', 'student4']:
         raise Exception("I don't like {}".format(student.username))
 
-    return grade(student, request, course, keep_raw_scores=keep_raw_scores)
+    return grade(
+        student, request, course, keep_raw_scores=keep_raw_scores, student_module_cache=student_module_cache
+    )
 
 
 @attr('shard_1')
@@ -74,6 +77,13 @@ class TestGradeIteration(ModuleStoreTestCase):
             self.assertIsNone(gradeset['grade'])
             self.assertEqual(gradeset['percent'], 0.0)
 
+    @override_settings(GRADES_STUDENT_CHUNK_SIZE=2)
+    def test_chunked_students(self):
+        """Students are graded in chunks smaller than the list of students"""
+        all_gradesets, all_errors = self._gradesets_and_errors_for(self.course.id, self.students)
+        self.assertEqual(len(all_errors), 0)
+        self.assertEqual(set(all_gradesets.keys()), set(self.students))
+
     @patch('courseware.grades.grade', _grade_with_errors)
     def test_grading_exception(self):
         """Test that we correctly capture exception messages that bubble up from
@@ -6,7 +6,7 @@ from mock import Mock, patch
 from nose.plugins.attrib import attr
 from functools import partial
 
-from courseware.model_data import DjangoKeyValueStore
+from courseware.model_data import DjangoKeyValueStore, deferred_writes, call_after_writes
 from courseware.model_data import InvalidScopeError, FieldDataCache
 from courseware.models import StudentModule
 from courseware.models import XModuleStudentInfoField, XModuleStudentPrefsField
@@ -119,6 +119,13 @@ class TestStudentModuleStorage(OtherUserFailureTestMixin, TestCase):
 
         self.kvs = DjangoKeyValueStore(self.field_data_cache)
 
+    def test_add_cached_descriptor(self):
+        "Test that adding a descriptor whose StudentModule has already been queried doesn't query it again"
+        with self.assertNumQueries(0):
+            self.field_data_cache.add_descriptors_to_cache(
+                [mock_descriptor([mock_field(Scope.user_state, 'b_field')])]
+            )
+
     def test_get_existing_field(self):
         "Test that getting an existing field in an existing StudentModule works"
         # This should only read from the cache, not the database
@@ -149,6 +156,43 @@ class TestStudentModuleStorage(OtherUserFailureTestMixin, TestCase):
         self.assertEquals(1, StudentModule.objects.all().count())
         self.assertEquals({'b_field': 'b_value', 'a_field': 'a_value', 'not_a_field': 'new_value'}, json.loads(StudentModule.objects.all()[0].state))
 
+    def test_deferred_writes(self):
+        "Test that a StudentModule modified several times within deferred_writes() is saved once"
+        with self.assertNumQueries(3):
+            with deferred_writes():
+                with self.assertNumQueries(0):
+                    self.kvs.set(user_state_key('a_field'), 'new_value')
+                    self.kvs.set(user_state_key('b_field'), 'other_value')
+
+        self.assertEquals(
+            {'a_field': 'new_value', 'b_field': 'other_value'},
+            json.loads(StudentModule.objects.all()[0].state)
+        )
+
+    def test_call_after_writes(self):
+        "Test that the functions passed to call_after_writes() within deferred_writes() are called once it saves"
+        states = []
+
+        def read_state():
+            "Record the saved value of a_field"
+            states.append(json.loads(StudentModule.objects.all()[0].state)['a_field'])
+
+        with deferred_writes():
+            self.kvs.set(user_state_key('a_field'), 'new_value')
+            call_after_writes(read_state)
+            self.assertEquals([], states)
+
+        self.assertEquals(['new_value'], states)
+
+    def test_deferred_writes_dropped_on_error(self):
+        "Test that writes deferred within deferred_writes() are dropped if an exception is raised"
+        with self.assertRaises(ValueError):
+            with deferred_writes():
+                self.kvs.set(user_state_key('a_field'), 'new_value')
+                raise ValueError
+
+        self.assertEquals('a_value', json.loads(StudentModule.objects.all()[0].state)['a_field'])
+
     def test_delete_existing_field(self):
         "Test that deleting an existing field removes it from the StudentModule"
         # We are updating a problem, so we write to courseware_studentmodulehistory
@@ -294,6 +338,17 @@ class StorageTestBase(object):
         with self.assertNumQueries(0):
             self.assertEquals('test_value', self.kvs.get(self.key_factory('existing_field')))
 
+    def test_add_cached_descriptor(self):
+        "Test that extending the cache only queries for the fields that haven't been queried yet"
+        with self.assertNumQueries(0):
+            self.field_data_cache.add_descriptors_to_cache([self.mock_descriptor])
+        with self.assertNumQueries(1):
+            self.field_data_cache.add_descriptors_to_cache(
+                [mock_descriptor([mock_field(self.scope, 'existing_field'), mock_field(self.scope, 'new_field')])]
+            )
+        with self.assertNumQueries(0):
+            self.assertEquals('old_value', self.kvs.get(self.key_factory('existing_field')))
+
     def test_get_existing_field(self):
         "Test that getting an existing field in an existing Storage Field works"
         with self.assertNumQueries(0):
@@ -30,9 +30,9 @@ from capa.tests.response_xml_factory import OptionResponseXMLFactory
 from courseware import module_render as render
 from courseware.courses import get_course_with_access, course_image_url, get_course_info_section
 from courseware.field_overrides import OverrideFieldData
-from courseware.model_data import FieldDataCache
+from courseware.model_data import FieldDataCache, deferred_writes
 from courseware.module_render import hash_resource, get_module_for_descriptor
-from courseware.models import StudentModule
+from courseware.models import StudentModule, StudentModuleHistory
 from courseware.tests.factories import StudentModuleFactory, UserFactory, GlobalStaffFactory
 from courseware.tests.tests import LoginEnrollmentTestCase
 from courseware.tests.test_submitting_problems import TestSubmittingProblems
@@ -1260,6 +1260,24 @@ class TestXmoduleRuntimeEvent(TestSubmittingProblems):
         }
         send_mock.assert_called_with(**expected_signal_kwargs)
 
+    @patch('courseware.module_render.SCORE_CHANGED.send')
+    def test_deferred_grade_saved_with_state(self, send_mock):
+        """Test that a grade published while writes are deferred is saved once, along with the state"""
+        module = self.get_module_for_user(self.student_user)
+        history = StudentModuleHistory.objects.filter(student_module__student=self.student_user).order_by('-id')
+        with deferred_writes():
+            module.system.publish(module, 'grade', self.grade_dict)
+            module.attempts = 1
+            module.save()
+            self.assertFalse(send_mock.called)
+            # The StudentModule is created right away
+            num_history = history.count()
+
+        self.assertEqual(history.count(), num_history + 1)
+        self.assertEqual(history[0].grade, self.grade_dict['value'])
+        self.assertEqual(json.loads(history[0].state)['attempts'], 1)
+        self.assertTrue(send_mock.called)
+
 
 @attr('shard_1')
 class TestRebindModule(TestSubmittingProblems):
@@ -2,6 +2,7 @@
 """
 Integration tests for submitting problem responses and getting grades.
 """
+from datetime import datetime, timedelta
 import json
 import os
 from textwrap import dedent
@@ -12,15 +13,17 @@ from django.core.urlresolvers import reverse
 from django.test.client import RequestFactory
 from mock import patch
 from nose.plugins.attrib import attr
+from pytz import UTC
 
 from capa.tests.response_xml_factory import (
     OptionResponseXMLFactory, CustomResponseXMLFactory, SchematicResponseXMLFactory,
     CodeResponseXMLFactory,
 )
 from courseware import grades
-from courseware.models import StudentModule
+from courseware.models import PersistentSubsectionGrade, StudentModule
 from courseware.tests.helpers import LoginEnrollmentTestCase
 from lms.djangoapps.lms_xblock.runtime import quote_slashes
+from student.roles import CourseStaffRole
 from student.tests.factories import UserFactory
 from student.models import anonymous_id_for_user
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
@@ -475,6 +478,22 @@ class TestCourseGrader(TestSubmittingProblems):
         self.check_grade_percent(0.67)
         self.assertEqual(self.get_grade_summary()['grade'], 'B')
 
+    def test_iterate_grades_for_stored_scores(self):
+        """
+        Check that grading students in bulk gives the same grades as grading
+        them one at a time.
+        """
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+        self.submit_question_answer('p2', {'2_1': 'Correct'})
+
+        gradesets = list(grades.iterate_grades_for(self.course, [self.student_user]))
+        self.assertEqual(len(gradesets), 1)
+        _, gradeset, err_msg = gradesets[0]
+        self.assertEqual(err_msg, "")
+        self.assertEqual(gradeset['percent'], 0.67)
+        self.assertEqual(gradeset['grade'], 'B')
+
     def test_submissions_api_overrides_scores(self):
         """
         Check that answering incorrectly is graded properly.
@@ -595,6 +614,131 @@ class TestCourseGrader(TestSubmittingProblems):
         self.assertEqual(self.score_for_hw('homework3'), [1.0, 1.0])
 
 
+@attr('shard_1')
+@patch.dict(settings.FEATURES, {'ENABLE_PERSISTENT_GRADES': True})
+class TestPersistentCourseGrader(TestCourseGrader):
+    """
+    Run the course grader suite with persistent grades enabled, and check that
+    persisted scores are reused and invalidated.
+    """
+    def persisted_grades(self):
+        """
+        Return the persisted grades of the homework section for the student.
+        """
+        return PersistentSubsectionGrade.objects.filter(
+            user=self.student_user,
+            course_id=self.course.id,
+            usage_key=self.homework.location,
+        )
+
+    def test_scores_are_persisted(self):
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+        self.check_grade_percent(0.33)
+
+        persisted_grades = self.persisted_grades()
+        self.assertEqual(len(persisted_grades), 1)
+        self.assertNotEqual(persisted_grades[0].course_version, '')
+        self.assertIn(unicode(self.problem_location('p3')), persisted_grades[0].blocks)
+
+    def test_persisted_scores_are_reused(self):
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+        self.check_grade_percent(0.33)
+
+        with patch('courseware.grades._compute_section_scores') as mock_compute:
+            self.check_grade_percent(0.33)
+            self.assertEqual(self.score_for_hw('homework'), [1.0, 0.0, 0.0])
+            self.assertFalse(mock_compute.called)
+
+    def test_concurrent_grading(self):
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+
+        create = PersistentSubsectionGrade.objects.create
+
+        def concurrent_create(**kwargs):
+            """
+            Let another grading of the student reserve the row first.
+            """
+            create(**kwargs)
+            return create(**kwargs)
+
+        with patch.object(PersistentSubsectionGrade.objects, 'create', side_effect=concurrent_create):
+            self.check_grade_percent(0.33)
+        # The scores are left to the other grading to persist
+        self.assertEqual(self.persisted_grades()[0].course_version, '')
+
+        self.check_grade_percent(0.33)
+        self.assertNotEqual(self.persisted_grades()[0].course_version, '')
+
+    def test_score_change_invalidates_persisted_scores(self):
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+        self.check_grade_percent(0.33)
+        self.assertTrue(self.persisted_grades().exists())
+
+        self.submit_question_answer('p2', {'2_1': 'Correct'})
+        self.assertFalse(self.persisted_grades().exists())
+        self.check_grade_percent(0.67)
+
+    def test_reset_invalidates_persisted_scores(self):
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+        self.check_grade_percent(0.33)
+
+        StudentModule.objects.filter(
+            student=self.student_user, module_state_key=self.problem_location('p1')
+        ).delete()
+        self.assertFalse(self.persisted_grades().exists())
+        self.check_grade_percent(0)
+
+    def test_state_change_keeps_persisted_scores(self):
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+        self.check_grade_percent(0.33)
+
+        # Saving a module without changing its score leaves the scores alone
+        student_module = StudentModule.objects.get(
+            student=self.student_user, module_state_key=self.problem_location('p1')
+        )
+        student_module.state = json.dumps({'viewed': True})
+        student_module.save()
+        self.assertTrue(self.persisted_grades().exists())
+
+    def test_invalidation_matches_whole_keys(self):
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+        self.check_grade_percent(0.33)
+
+        # A block whose key starts with that of p1
+        self.persisted_grades().update(blocks=u'\n{}0\n'.format(self.problem_location('p1')))
+        PersistentSubsectionGrade.invalidate(self.student_user.id, self.course.id, self.problem_location('p1'))
+        self.assertTrue(self.persisted_grades().exists())
+
+    def test_access_change_ignores_persisted_scores(self):
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+        self.check_grade_percent(0.33)
+
+        # Staff may be scored on blocks students can't load
+        CourseStaffRole(self.course.id).add_users(self.student_user)
+        with patch('courseware.grades._compute_section_scores', return_value=[]) as mock_compute:
+            self.get_grade_summary()
+        self.assertTrue(mock_compute.called)
+
+    def test_scores_not_persisted_before_start(self):
+        self.basic_setup()
+        self.submit_question_answer('p1', {'2_1': 'Correct'})
+
+        # The scores will change once the section starts
+        self.homework.start = datetime.now(UTC) + timedelta(days=1)
+        self.store.update_item(self.homework, self.student_user.id)
+        self.refresh_course()
+        self.get_grade_summary()
+        self.assertFalse(self.persisted_grades().exists())
+
+
 @attr('shard_1')
 class ProblemWithUploadedFilesTest(TestSubmittingProblems):
     """Tests of problems with uploaded files."""
@@ -763,6 +763,39 @@ class CategoryMapTestCase(CategoryMapTestMixin, ModuleStoreTestCase):
             ["Topic_A", "Topic_B", "Topic_C", "discussion1", "discussion2", "discussion3"]
         )
 
+    def test_ids_unstarted(self):
+        later = datetime.datetime(datetime.MAXYEAR, 1, 1, tzinfo=django_utc())
+        self.create_discussion("Chapter 1", "Discussion 1")
+        self.create_discussion("Chapter 1", "Discussion 2", start=later)
+        self.assertItemsEqual(utils.get_discussion_categories_ids(self.course, self.user), ["discussion1"])
+        self.assertItemsEqual(
+            utils.get_discussion_categories_ids(self.course, self.instructor),
+            ["discussion1", "discussion2"]
+        )
+
+    def test_discussion_modules_cached(self):
+        self.create_discussion("Chapter 1", "Discussion 1")
+        self.create_discussion("Chapter 2", "Discussion")
+        course = self.store.get_course(self.course.id)
+        with mock.patch(
+            'django_comment_client.utils.get_accessible_discussion_modules',
+            wraps=utils.get_accessible_discussion_modules
+        ) as mock_get_modules:
+            utils.get_discussion_category_map(course, self.user)
+            utils.get_discussion_id_map(course, self.user)
+            self.assertItemsEqual(
+                utils.get_discussion_categories_ids(course, self.user),
+                ["discussion1", "discussion2"]
+            )
+        self.assertEqual(mock_get_modules.call_count, 1)
+
+        # A new version of the course has its own discussion modules.
+        self.create_discussion("Chapter 3", "Discussion")
+        self.assertItemsEqual(
+            utils.get_discussion_categories_ids(self.store.get_course(self.course.id), self.user),
+            ["discussion1", "discussion2", "discussion3"]
+        )
+
 
 @attr('shard_1')
 class ContentGroupCategoryMapTestCase(CategoryMapTestMixin, ContentGroupTestCase):
@@ -4,21 +4,24 @@ import json
 import logging
 
 import pytz
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.db import connection
 from django.http import HttpResponse
 from django.utils.timezone import UTC
 import pystache_custom as pystache
 from opaque_keys.edx.locations import i4xEncoder
-from opaque_keys.edx.keys import CourseKey
+from opaque_keys.edx.keys import CourseKey, UsageKey
 from xmodule.modulestore.django import modulestore
 
 from django_comment_common.models import Role, FORUM_ROLE_STUDENT
 from django_comment_client.permissions import check_permissions_by_view, cached_has_permission
 from edxmako import lookup_template
 
-from courseware.access import has_access
+from courseware.access import has_access, in_preview_mode
+from courseware.masquerade import is_masquerading_as_student
 from openedx.core.djangoapps.course_groups.cohorts import (
     get_course_cohort_settings, get_cohort_by_id, get_cohort_id, is_commentable_cohorted, is_course_cohorted
 )
@@ -27,6 +30,9 @@ from openedx.core.djangoapps.course_groups.models import CourseUserGroup
 
 log = logging.getLogger(__name__)
 
+# How long (in seconds) the discussion modules of a version of a course are cached
+DISCUSSION_MODULES_CACHE_TIMEOUT = 24 * 60 * 60
+
 
 def extract(dic, keys):
     return {k: dic.get(k) for k in keys}
@@ -81,18 +87,109 @@ def get_accessible_discussion_modules(course, user, include_all=False):  # pylin
     ]
 
 
+def _discussion_modules_cache_key(course):
+    """
+    Return the cache key of the discussion modules of the current version of
+    `course`, or None if its version can't be determined.
+    """
+    try:
+        edited_on = course.subtree_edited_on
+    except AttributeError:
+        # Not all modulestores keep track of edit info
+        return None
+    if edited_on is None:
+        return None
+    return u'django_comment_client.discussion_modules.{}.{}'.format(course.id, edited_on.isoformat())
+
+
+def _get_discussion_module_infos(course):
+    """
+    Return the learner-independent information about the valid discussion
+    modules of `course`, cached per version of the course: a list of dicts
+    with their id, title, category, sort key, start date and location, and
+    whether the access to them must be checked on the module itself.
+    """
+    cache_key = _discussion_modules_cache_key(course)
+    infos = cache.get(cache_key) if cache_key else None
+    if infos is None:
+        infos = []
+        for module in get_accessible_discussion_modules(course, None, include_all=True):
+            group_access = getattr(module, 'merged_group_access', {})
+            infos.append({
+                "id": module.discussion_id,
+                "title": module.discussion_target,
+                "category": module.discussion_category,
+                "sort_key": module.sort_key,
+                "start": module.start,
+                "location": unicode(module.location),
+                # Start dates are the only restriction checked on the cached information
+                "check_module_access": bool(
+                    module.visible_to_staff_only or
+                    module.days_early_for_beta is not None or
+                    any(group_ids is not None for group_ids in group_access.values())
+                ),
+            })
+        if cache_key:
+            cache.set(cache_key, infos, DISCUSSION_MODULES_CACHE_TIMEOUT)
+    return infos
+
+
+def _get_accessible_discussion_module_infos(course, user, include_all=False):  # pylint: disable=invalid-name
+    """
+    Return the information (see _get_discussion_module_infos) about the valid
+    discussion modules of `course` which are accessible to `user`, as
+    get_accessible_discussion_modules would find them.
+    """
+    infos = _get_discussion_module_infos(course)
+    if include_all:
+        return infos
+
+    now = datetime.now(UTC())
+    ignore_start_dates = in_preview_mode() or (
+        settings.FEATURES['DISABLE_START_DATES'] and not is_masquerading_as_student(user, course.id)
+    )
+
+    def has_started(info):
+        """
+        Returns whether the module of `info` has started for `user`.
+        """
+        return ignore_start_dates or info["start"] is None or now > info["start"]
+
+    # Only staff can see the modules which haven't started yet.
+    unstarted = [info for info in infos if not info["check_module_access"] and not has_started(info)]
+    staff_access = bool(unstarted) and has_access(user, 'staff', course)
+
+    def can_load(info):
+        """
+        Returns whether `user` may load the module of `info`.
+        """
+        if info["check_module_access"]:
+            module = modulestore().get_item(_usage_key_for_info(course, info))
+            return has_access(user, 'load', module, course.id)
+        return staff_access or has_started(info)
+
+    return [info for info in infos if can_load(info)]
+
+
+def _usage_key_for_info(course, info):
+    """
+    Return the usage key of the discussion module of `info`.
+    """
+    return UsageKey.from_string(info["location"]).map_into_course(course.id)
+
+
 def get_discussion_id_map(course, user):
     """
     Transform the list of this course's discussion modules (visible to a given user) into a dictionary of metadata keyed
     by discussion_id.
     """
-    def get_entry(module):  # pylint: disable=missing-docstring
-        discussion_id = module.discussion_id
-        title = module.discussion_target
-        last_category = module.discussion_category.split("/")[-1].strip()
-        return (discussion_id, {"location": module.location, "title": last_category + " / " + title})
+    def get_entry(info):  # pylint: disable=missing-docstring
+        discussion_id = info["id"]
+        title = info["title"]
+        last_category = info["category"].split("/")[-1].strip()
+        return (discussion_id, {"location": _usage_key_for_info(course, info), "title": last_category + " / " + title})
 
-    return dict(map(get_entry, get_accessible_discussion_modules(course, user)))
+    return dict(map(get_entry, _get_accessible_discussion_module_infos(course, user)))
 
 
 def _filter_unstarted_categories(category_map):
@@ -192,17 +289,17 @@ def get_discussion_category_map(course, user, cohorted_if_in_list=False, exclude
     """
     unexpanded_category_map = defaultdict(list)
 
-    modules = get_accessible_discussion_modules(course, user)
+    infos = _get_accessible_discussion_module_infos(course, user)
 
     course_cohort_settings = get_course_cohort_settings(course.id)
 
-    for module in modules:
-        id = module.discussion_id
-        title = module.discussion_target
-        sort_key = module.sort_key
-        category = " / ".join([x.strip() for x in module.discussion_category.split("/")])
+    for info in infos:
+        id = info["id"]
+        title = info["title"]
+        sort_key = info["sort_key"]
+        category = " / ".join([x.strip() for x in info["category"].split("/")])
         # Handle case where module.start is None
-        entry_start_date = module.start if module.start else datetime.max.replace(tzinfo=pytz.UTC)
+        entry_start_date = info["start"] if info["start"] else datetime.max.replace(tzinfo=pytz.UTC)
         unexpanded_category_map[category].append({"title": title, "id": id, "sort_key": sort_key, "start_date": entry_start_date})
 
     category_map = {"entries": defaultdict(dict), "subcategories": defaultdict(dict)}
@@ -288,7 +385,7 @@ def get_discussion_categories_ids(course, user, include_all=False):
 
     """
     accessible_discussion_ids = [
-        module.discussion_id for module in get_accessible_discussion_modules(course, user, include_all=include_all)
+        info["id"] for info in _get_accessible_discussion_module_infos(course, user, include_all=include_all)
     ]
     return course.top_level_discussion_topic_ids + accessible_discussion_ids
 
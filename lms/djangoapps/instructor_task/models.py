@@ -12,13 +12,14 @@ file and check it in at the same time as your model changes. To do that,
 ASSUMPTIONS: modules have unique IDs, even across different module_types
 
 """
-from cStringIO import StringIO
 from gzip import GzipFile
 from uuid import uuid4
 import csv
 import json
 import hashlib
 import os.path
+import shutil
+import tempfile
 import urllib
 
 from boto.s3.connection import S3Connection
@@ -193,9 +194,8 @@ class InstructorTask(models.Model):
 class ReportStore(object):
     """
     Simple abstraction layer that can fetch and store CSV files for reports
-    download. Should probably refactor later to create a ReportFile object that
-    can simply be appended to for the sake of memory efficiency, rather than
-    passing in the whole dataset. Doing that for now just because it's simpler.
+    download. Rows are written out as they are consumed, so `store_rows()` can
+    be passed a generator and never needs to hold the whole dataset in memory.
     """
     @classmethod
     def from_config(cls):
@@ -218,6 +218,14 @@ class ReportStore(object):
         for row in rows:
             yield [unicode(item).encode('utf-8') for item in row]
 
+    def _get_utf8_decoded_rows(self, rows):
+        """
+        Given CSV `rows` of utf-8 encoded strings, as read back from a stored
+        file, return a new list of rows with those strings decoded to unicode.
+        """
+        for row in rows:
+            yield [item.decode('utf-8') for item in row]
+
 
 class S3ReportStore(ReportStore):
     """
@@ -308,19 +316,95 @@ class S3ReportStore(ReportStore):
     def store_rows(self, course_id, filename, rows):
         """
         Given a `course_id`, `filename`, and `rows` (each row is an iterable of
-        strings), create a buffer that is a gzip'd csv file, and then `store()`
-        that buffer.
+        strings), write a gzip'd csv file to a temporary file, one row at a
+        time, and then `store_file()` that file.
 
         Even though we store it in gzip format, browsers will transparently
         download and decompress it. Filenames should end in `.csv`, not `.gz`.
         """
-        output_buffer = StringIO()
-        gzip_file = GzipFile(fileobj=output_buffer, mode="wb")
+        with tempfile.TemporaryFile() as temp_file:
+            self._write_gzipped_rows(temp_file, rows)
+            self.store_file(course_id, filename, temp_file)
+
+    def store_file(self, course_id, filename, fp):
+        """
+        Store the gzip-encoded contents of the file object `fp` the same way
+        `store()` does, reading it from the start in chunks rather than all
+        at once.
+        """
+        key = self.key_for(course_id, filename)
+        key.content_encoding = "gzip"
+        key.content_type = "text/csv"
+        key.set_contents_from_file(
+            fp,
+            headers={
+                "Content-Encoding": "gzip",
+                "Content-Type": "text/csv",
+            },
+            rewind=True
+        )
+
+    def _write_gzipped_rows(self, fp, rows):
+        """
+        Write `rows` to the file object `fp` as a gzip'd csv file, one row at
+        a time.
+        """
+        gzip_file = GzipFile(fileobj=fp, mode="wb")
         csvwriter = csv.writer(gzip_file)
         csvwriter.writerows(self._get_utf8_encoded_rows(rows))
         gzip_file.close()
 
-        self.store(course_id, filename, output_buffer)
+    def partial_key_for(self, course_id, task_id, filename):
+        """Return the S3 key used to store the partial file `filename` of the
+        task `task_id`. Partial files are kept outside of the course directory
+        so that they are never listed by `links_for()`."""
+        hashed_course_id = hashlib.sha1(course_id.to_deprecated_string())
+
+        key = Key(self.bucket)
+        key.key = "{}/_partials/{}/{}/{}".format(
+            self.root_path,
+            hashed_course_id.hexdigest(),
+            task_id,
+            filename
+        )
+
+        return key
+
+    def store_partial_rows(self, course_id, task_id, filename, rows):
+        """
+        Store `rows` as the partial file `filename` of the task `task_id`,
+        to be later combined with the other partial files of the task.
+        """
+        key = self.partial_key_for(course_id, task_id, filename)
+        with tempfile.TemporaryFile() as temp_file:
+            self._write_gzipped_rows(temp_file, rows)
+            key.set_contents_from_file(temp_file, rewind=True)
+
+    def partial_rows_for(self, course_id, task_id, prefix=''):
+        """
+        Yield, in the order of their filenames, an iterator over the rows of
+        each partial file of the task `task_id` whose name starts with `prefix`.
+        """
+        task_dir = self.partial_key_for(course_id, task_id, '')
+        keys = sorted(self.bucket.list(prefix=task_dir.key + prefix), key=lambda k: k.key)
+        for key in keys:
+            yield self._read_gzipped_rows(key)
+
+    def _read_gzipped_rows(self, key):
+        """
+        Yield the rows of the gzip'd csv file stored at `key`, downloading it
+        to a temporary file rather than in memory.
+        """
+        with tempfile.TemporaryFile() as temp_file:
+            key.get_contents_to_file(temp_file)
+            temp_file.seek(0)
+            for row in self._get_utf8_decoded_rows(csv.reader(GzipFile(fileobj=temp_file, mode="rb"))):
+                yield row
+
+    def delete_partials(self, course_id, task_id):
+        """Delete all the partial files of the task `task_id`."""
+        task_dir = self.partial_key_for(course_id, task_id, '')
+        self.bucket.delete_keys([key.key for key in self.bucket.list(prefix=task_dir.key)])
 
     def links_for(self, course_id):
         """
@@ -389,13 +473,68 @@ class LocalFSReportStore(ReportStore):
     def store_rows(self, course_id, filename, rows):
         """
         Given a course_id, filename, and rows (each row is an iterable of strings),
-        write this data out.
+        write this data out, one row at a time.
         """
-        output_buffer = StringIO()
-        csvwriter = csv.writer(output_buffer)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
+        full_path = self.path_to(course_id, filename)
+        directory = os.path.dirname(full_path)
+        if not os.path.exists(directory):
+            os.mkdir(directory)
+
+        # Write to a temporary file first so that the report only shows up in
+        # `links_for()` once it is complete.
+        temp_file = tempfile.NamedTemporaryFile(dir=self.root_path, delete=False)
+        try:
+            with temp_file:
+                csv.writer(temp_file).writerows(self._get_utf8_encoded_rows(rows))
+            os.rename(temp_file.name, full_path)
+        except Exception:
+            os.remove(temp_file.name)
+            raise
+
+    def partial_path_to(self, course_id, task_id, filename):
+        """Return the full path to the partial file `filename` of the task
+        `task_id`. Partial files are kept outside of the course directory so
+        that they are never listed by `links_for()`."""
+        return os.path.join(
+            self.root_path, '_partials', urllib.quote(course_id.to_deprecated_string(), safe=''), task_id, filename
+        )
 
-        self.store(course_id, filename, output_buffer)
+    def store_partial_rows(self, course_id, task_id, filename, rows):
+        """
+        Store `rows` as the partial file `filename` of the task `task_id`,
+        to be later combined with the other partial files of the task.
+        """
+        full_path = self.partial_path_to(course_id, task_id, filename)
+        directory = os.path.dirname(full_path)
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+        with open(full_path, "wb") as f:
+            csv.writer(f).writerows(self._get_utf8_encoded_rows(rows))
+
+    def partial_rows_for(self, course_id, task_id, prefix=''):
+        """
+        Yield, in the order of their filenames, an iterator over the rows of
+        each partial file of the task `task_id` whose name starts with `prefix`.
+        """
+        task_dir = self.partial_path_to(course_id, task_id, '')
+        if not os.path.exists(task_dir):
+            return
+        for filename in sorted(os.listdir(task_dir)):
+            if filename.startswith(prefix):
+                yield self._read_rows(os.path.join(task_dir, filename))
+
+    def _read_rows(self, full_path):
+        """Yield the rows of the csv file at `full_path`."""
+        with open(full_path, "rb") as f:
+            for row in self._get_utf8_decoded_rows(csv.reader(f)):
+                yield row
+
+    def delete_partials(self, course_id, task_id):
+        """Delete all the partial files of the task `task_id`."""
+        task_dir = self.partial_path_to(course_id, task_id, '')
+        if os.path.exists(task_dir):
+            shutil.rmtree(task_dir)
 
     def links_for(self, course_id):
         """
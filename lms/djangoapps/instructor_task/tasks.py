@@ -31,11 +31,15 @@ from instructor_task.tasks_helper import (
     run_main_task,
     BaseInstructorTask,
     perform_module_state_update,
+    perform_module_state_batch_update,
+    perform_module_state_update_part,
     rescore_problem_module_state,
+    rescore_problem_module_states,
     reset_attempts_module_state,
     delete_problem_module_state,
     upload_grades_csv,
     upload_problem_grade_report,
+    generate_report_part,
     upload_students_csv,
     cohort_students_and_upload
 )
@@ -65,14 +69,24 @@ def rescore_problem(entry_id, xmodule_instance_args):
     """
     # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
     action_name = ugettext_noop('rescored')
-    update_fcn = partial(rescore_problem_module_state, xmodule_instance_args)
+    visit_fcn = partial(
+        _rescore_problem_visit_fcn(xmodule_instance_args),
+        create_subtask_fcn=partial(_create_module_state_subtask, entry_id, 'rescore_problem', xmodule_instance_args),
+    )
+    return run_main_task(entry_id, visit_fcn, action_name)
 
+
+def _rescore_problem_visit_fcn(xmodule_instance_args):
+    """Returns the function visiting the StudentModules to rescore."""
     def filter_fcn(modules_to_update):
         """Filter that matches problems which are marked as being done"""
         return modules_to_update.filter(state__contains='"done": true')
 
-    visit_fcn = partial(perform_module_state_update, update_fcn, filter_fcn)
-    return run_main_task(entry_id, visit_fcn, action_name)
+    if settings.FEATURES.get('ENABLE_BULK_RESCORE'):
+        update_batch_fcn = partial(rescore_problem_module_states, xmodule_instance_args)
+        return partial(perform_module_state_batch_update, update_batch_fcn, filter_fcn)
+    update_fcn = partial(rescore_problem_module_state, xmodule_instance_args)
+    return partial(perform_module_state_update, update_fcn, filter_fcn)
 
 
 @task(base=BaseInstructorTask)  # pylint: disable=not-callable
@@ -92,11 +106,21 @@ def reset_problem_attempts(entry_id, xmodule_instance_args):
     """
     # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
     action_name = ugettext_noop('reset')
-    update_fcn = partial(reset_attempts_module_state, xmodule_instance_args)
-    visit_fcn = partial(perform_module_state_update, update_fcn, None)
+    visit_fcn = partial(
+        _reset_problem_attempts_visit_fcn(xmodule_instance_args),
+        create_subtask_fcn=partial(
+            _create_module_state_subtask, entry_id, 'reset_problem_attempts', xmodule_instance_args
+        ),
+    )
     return run_main_task(entry_id, visit_fcn, action_name)
 
 
+def _reset_problem_attempts_visit_fcn(xmodule_instance_args):
+    """Returns the function visiting the StudentModules whose attempts to reset."""
+    update_fcn = partial(reset_attempts_module_state, xmodule_instance_args)
+    return partial(perform_module_state_update, update_fcn, None)
+
+
 @task(base=BaseInstructorTask)  # pylint: disable=not-callable
 def delete_problem_state(entry_id, xmodule_instance_args):
     """Deletes problem state entirely for all students on a particular problem in a course.
@@ -114,11 +138,49 @@ def delete_problem_state(entry_id, xmodule_instance_args):
     """
     # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
     action_name = ugettext_noop('deleted')
-    update_fcn = partial(delete_problem_module_state, xmodule_instance_args)
-    visit_fcn = partial(perform_module_state_update, update_fcn, None)
+    visit_fcn = partial(
+        _delete_problem_state_visit_fcn(xmodule_instance_args),
+        create_subtask_fcn=partial(
+            _create_module_state_subtask, entry_id, 'delete_problem_state', xmodule_instance_args
+        ),
+    )
     return run_main_task(entry_id, visit_fcn, action_name)
 
 
+def _delete_problem_state_visit_fcn(xmodule_instance_args):
+    """Returns the function visiting the StudentModules to delete."""
+    update_fcn = partial(delete_problem_module_state, xmodule_instance_args)
+    return partial(perform_module_state_update, update_fcn, None)
+
+
+# The functions returning the function visiting the StudentModules of each
+# type of task, which may split its updates into `update_module_state_part`
+# subtasks.
+MODULE_STATE_VISIT_FCNS = {
+    'rescore_problem': _rescore_problem_visit_fcn,
+    'reset_problem_attempts': _reset_problem_attempts_visit_fcn,
+    'delete_problem_state': _delete_problem_state_visit_fcn,
+}
+
+
+@task  # pylint: disable=not-callable
+def update_module_state_part(entry_id, task_type, xmodule_instance_args, id_range, num_modules, subtask_status_dict):
+    """
+    Update the StudentModules of a range of ids, as a subtask of `rescore_problem`,
+    `reset_problem_attempts` or `delete_problem_state`.
+    """
+    visit_fcn = MODULE_STATE_VISIT_FCNS[task_type](xmodule_instance_args)
+    return perform_module_state_update_part(visit_fcn, entry_id, id_range, num_modules, subtask_status_dict)
+
+
+def _create_module_state_subtask(entry_id, task_type, xmodule_instance_args, id_range, num_modules, subtask_status):
+    """Creates an `update_module_state_part` subtask for a given range of ids."""
+    return update_module_state_part.subtask(
+        (entry_id, task_type, xmodule_instance_args, id_range, num_modules, subtask_status.to_dict()),
+        task_id=subtask_status.task_id,
+    )
+
+
 @task(base=BaseInstructorTask)  # pylint: disable=not-callable
 def send_bulk_course_email(entry_id, _xmodule_instance_args):
     """Sends emails to recipients enrolled in a course.
@@ -152,7 +214,7 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
         xmodule_instance_args.get('task_id'), entry_id, action_name
     )
 
-    task_fn = partial(upload_grades_csv, xmodule_instance_args)
+    task_fn = partial(upload_grades_csv, xmodule_instance_args, create_subtask_fcn=_create_report_part_subtask)
     return run_main_task(entry_id, task_fn, action_name)
 
 
@@ -169,10 +231,30 @@ def calculate_problem_grade_report(entry_id, xmodule_instance_args):
         xmodule_instance_args.get('task_id'), entry_id, action_name
     )
 
-    task_fn = partial(upload_problem_grade_report, xmodule_instance_args)
+    task_fn = partial(
+        upload_problem_grade_report, xmodule_instance_args, create_subtask_fcn=_create_report_part_subtask
+    )
     return run_main_task(entry_id, task_fn, action_name)
 
 
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
+def calculate_report_part(entry_id, report_name, action_name, student_list, start_time, subtask_status_dict):
+    """
+    Compute the part of a grade report for a list of students, as a subtask
+    of `calculate_grades_csv` or `calculate_problem_grade_report`.
+    """
+    return generate_report_part(entry_id, report_name, action_name, student_list, start_time, subtask_status_dict)
+
+
+def _create_report_part_subtask(entry_id, report_name, action_name, student_list, start_time, subtask_status):
+    """Creates a `calculate_report_part` subtask for a given list of students."""
+    return calculate_report_part.subtask(
+        (entry_id, report_name, action_name, student_list, start_time, subtask_status.to_dict()),
+        task_id=subtask_status.task_id,
+        routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+    )
+
+
 @task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)  # pylint: disable=not-callable
 def calculate_students_features_csv(entry_id, xmodule_instance_args):
     """
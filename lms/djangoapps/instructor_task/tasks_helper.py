@@ -3,44 +3,62 @@ This file contains tasks that are designed to perform background operations on t
 running state of a course.
 
 """
+import copy
 import json
 from collections import OrderedDict
 from datetime import datetime
 from eventtracking import tracker
 from itertools import chain
 from time import time
+import traceback
 import unicodecsv
 import logging
 
 from celery import Task, current_task
 from celery.states import SUCCESS, FAILURE
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.files.storage import DefaultStorage
 from django.db import transaction, reset_queries
 import dogstats_wrapper as dog_stats_api
 from pytz import UTC
 
+from capa.capa_problem import LoncapaProblem, LoncapaSystem
+from capa.responsetypes import StudentInputError, ResponseError, LoncapaProblemError
+from edxmako.shortcuts import render_to_string
 from track.views import task_track
 from util.file import course_filename_prefix_generator, UniversalNewlineIterator
-from xmodule.modulestore.django import modulestore
+from util.sandboxing import can_execute_unsafe_code, get_python_lib_zip, get_safe_exec_cache
+from xmodule.capa_base import unmask_problem_event
+from xmodule.capa_module import CapaDescriptor
+from xmodule.contentstore.django import contentstore
+from xmodule.exceptions import NotFoundError
+from xmodule.modulestore.django import modulestore, ModuleI18nService
 from xmodule.split_test_module import get_split_user_partitions
 
 from certificates.models import CertificateWhitelist, certificate_info_for_user
+from courseware.access import has_access
 from courseware.courses import get_course_by_id, get_problems_in_section
 from courseware.grades import iterate_grades_for
-from courseware.models import StudentModule
+from courseware.models import StudentModule, StudentModuleHistory, SCORE_CHANGED
 from courseware.model_data import FieldDataCache
-from courseware.module_render import get_module_for_descriptor_internal
+from courseware.module_render import get_module_for_descriptor_internal, get_score_bucket
 from instructor_analytics.basic import enrolled_students_features
 from instructor_analytics.csvs import format_dictlist
 from instructor_task.models import ReportStore, InstructorTask, PROGRESS
+from instructor_task.subtasks import (
+    SubtaskStatus,
+    check_subtask_is_valid,
+    queue_subtasks_for_query,
+    update_subtask_status,
+)
 from lms.djangoapps.lms_xblock.runtime import LmsPartitionService
 from openedx.core.djangoapps.course_groups.cohorts import get_cohort
 from openedx.core.djangoapps.course_groups.models import CourseUserGroup
 from openedx.core.djangoapps.content.course_structures.models import CourseStructure
 from opaque_keys.edx.keys import UsageKey
 from openedx.core.djangoapps.course_groups.cohorts import add_user_to_cohort, is_course_cohorted
-from student.models import CourseEnrollment
+from student.models import CourseEnrollment, anonymous_id_for_user
 from verify_student.models import SoftwareSecurePhotoVerification
 
 
@@ -154,6 +172,14 @@ class UpdateProblemModuleStateError(Exception):
     pass
 
 
+class ReportPartsError(Exception):
+    """
+    Error signaling that some of the subtasks computing the parts of a report
+    failed, so that the report cannot be published.
+    """
+    pass
+
+
 def _get_current_task():
     """
     Stub to make it easier to test without actually running Celery.
@@ -272,7 +298,8 @@ def run_main_task(entry_id, task_fcn, action_name):
     return task_progress
 
 
-def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name):
+def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name,
+                                create_subtask_fcn=None, id_range=None):
     """
     Performs generic update by visiting StudentModule instances with the update_fcn provided.
 
@@ -301,12 +328,94 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
               Pass-through of input `action_name`.
           'duration_ms': how long the task has (or had) been running.
 
+    If `create_subtask_fcn` is provided and there are more than settings.MODULE_STATE_UPDATES_PER_TASK
+    StudentModule instances to update, they are instead split into subtasks (see
+    `delegate_module_state_updates`), which each update the instances whose id is in their `id_range`.
+
     Because this is run internal to a task, it does not catch exceptions.  These are allowed to pass up to the
     next level, so that it can set the failure modes and capture the error trace in the InstructorTask and the
     result object.
 
     """
     start_time = time()
+    problems, modules_to_update = _get_modules_to_update(course_id, task_input, filter_fcn, id_range)
+    total_num_modules = modules_to_update.count()
+
+    if create_subtask_fcn is not None and _should_delegate_module_state_update(total_num_modules):
+        return delegate_module_state_updates(
+            create_subtask_fcn, _entry_id, modules_to_update, action_name, total_num_modules
+        )
+
+    task_progress = TaskProgress(action_name, total_num_modules, start_time)
+    task_progress.update_task_state()
+
+    for module_to_update in modules_to_update:
+        task_progress.attempted += 1
+        module_descriptor = problems[unicode(module_to_update.module_state_key)]
+        # There is no try here:  if there's an error, we let it throw, and the task will
+        # be marked as FAILED, with a stack trace.
+        with dog_stats_api.timer('instructor_tasks.module.time.step', tags=[u'action:{name}'.format(name=action_name)]):
+            update_status = update_fcn(module_descriptor, module_to_update)
+            _record_update_status(task_progress, update_status)
+
+    return task_progress.update_task_state()
+
+
+def perform_module_state_batch_update(update_batch_fcn, filter_fcn, _entry_id, course_id, task_input, action_name,
+                                      create_subtask_fcn=None, id_range=None):
+    """
+    Performs generic update by visiting StudentModule instances in batches with the update_batch_fcn provided.
+
+    The StudentModule instances are those perform_module_state_update would visit, see its
+    description of `filter_fcn`, `task_input`, `create_subtask_fcn`, `id_range` and of the return value.
+
+    The `update_batch_fcn` is called on batches of up to settings.BULK_RESCORE_BATCH_SIZE
+    StudentModules of the same problem, with their students already fetched.  It is passed two
+    arguments:  the module_descriptor for the problem, and the list of StudentModules to update.
+    It returns the list of the update statuses of the StudentModules, in the same order.  The
+    progress of the task is updated after each batch.
+    """
+    start_time = time()
+    problems, modules_to_update = _get_modules_to_update(course_id, task_input, filter_fcn, id_range)
+    total_num_modules = modules_to_update.count()
+
+    if create_subtask_fcn is not None and _should_delegate_module_state_update(total_num_modules):
+        return delegate_module_state_updates(
+            create_subtask_fcn, _entry_id, modules_to_update, action_name, total_num_modules
+        )
+
+    task_progress = TaskProgress(action_name, total_num_modules, start_time)
+    task_progress.update_task_state()
+
+    for usage_key, module_descriptor in problems.iteritems():
+        # Fetch the modules of the problem batch by batch, rather than all
+        # of them (with their state) at once.
+        problem_modules = modules_to_update.filter(
+            module_state_key=UsageKey.from_string(usage_key)
+        ).select_related('student').order_by('id')
+        last_id = 0
+        while True:
+            batch = list(problem_modules.filter(id__gt=last_id)[:settings.BULK_RESCORE_BATCH_SIZE])
+            if not batch:
+                break
+            last_id = batch[-1].id
+            task_progress.attempted += len(batch)
+            timer_tags = [u'action:{name}'.format(name=action_name)]
+            with dog_stats_api.timer('instructor_tasks.module.time.batch', tags=timer_tags):
+                update_statuses = update_batch_fcn(module_descriptor, batch)
+            for update_status in update_statuses:
+                _record_update_status(task_progress, update_status)
+            task_progress.update_task_state()
+
+    return task_progress.update_task_state()
+
+
+def _get_modules_to_update(course_id, task_input, filter_fcn, id_range=None):
+    """
+    Returns the descriptors of the problems of `task_input`, by usage key string,
+    and the query for the StudentModules of these problems to update, limited to
+    those whose id is in `id_range` (first id, last id) if it's provided.
+    """
     usage_keys = []
     problem_url = task_input.get('problem_url')
     entrance_exam_url = task_input.get('entrance_exam_url')
@@ -347,28 +456,117 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     if filter_fcn is not None:
         modules_to_update = filter_fcn(modules_to_update)
 
-    task_progress = TaskProgress(action_name, modules_to_update.count(), start_time)
-    task_progress.update_task_state()
+    if id_range is not None:
+        modules_to_update = modules_to_update.filter(id__range=id_range)
 
-    for module_to_update in modules_to_update:
-        task_progress.attempted += 1
-        module_descriptor = problems[unicode(module_to_update.module_state_key)]
-        # There is no try here:  if there's an error, we let it throw, and the task will
-        # be marked as FAILED, with a stack trace.
-        with dog_stats_api.timer('instructor_tasks.module.time.step', tags=[u'action:{name}'.format(name=action_name)]):
-            update_status = update_fcn(module_descriptor, module_to_update)
-            if update_status == UPDATE_STATUS_SUCCEEDED:
-                # If the update_fcn returns true, then it performed some kind of work.
-                # Logging of failures is left to the update_fcn itself.
-                task_progress.succeeded += 1
-            elif update_status == UPDATE_STATUS_FAILED:
-                task_progress.failed += 1
-            elif update_status == UPDATE_STATUS_SKIPPED:
-                task_progress.skipped += 1
-            else:
-                raise UpdateProblemModuleStateError("Unexpected update_status returned: {}".format(update_status))
+    return problems, modules_to_update
 
-    return task_progress.update_task_state()
+
+def _record_update_status(task_progress, update_status):
+    """Counts the `update_status` returned by an update function in `task_progress`."""
+    if update_status == UPDATE_STATUS_SUCCEEDED:
+        # If the update_fcn returns true, then it performed some kind of work.
+        # Logging of failures is left to the update_fcn itself.
+        task_progress.succeeded += 1
+    elif update_status == UPDATE_STATUS_FAILED:
+        task_progress.failed += 1
+    elif update_status == UPDATE_STATUS_SKIPPED:
+        task_progress.skipped += 1
+    else:
+        raise UpdateProblemModuleStateError("Unexpected update_status returned: {}".format(update_status))
+
+
+def _should_delegate_module_state_update(total_num_modules):
+    """
+    Return whether the update of `total_num_modules` StudentModules should be
+    split into subtasks.
+    """
+    modules_per_task = settings.MODULE_STATE_UPDATES_PER_TASK
+    return bool(modules_per_task) and total_num_modules > modules_per_task
+
+
+def delegate_module_state_updates(create_subtask_fcn, entry_id, modules_to_update, action_name, total_num_modules):
+    """
+    Split the StudentModules of `modules_to_update` into ranges of ids of no
+    more than settings.MODULE_STATE_UPDATES_PER_TASK modules, and queue a
+    subtask updating each range, the same way bulk emails are sent.
+
+    `create_subtask_fcn` is called with the (first id, last id) range of the
+    subtask, its number of modules and its SubtaskStatus, and returns the
+    subtask to queue (see `perform_module_state_update_part`).  The progress
+    of the subtasks is aggregated in the InstructorTask's task_output.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+
+    # As for bulk emails, if the subtasks have already been defined (e.g. the
+    # task has been requeued after a loss of connection to the broker), there
+    # is no need to define them again.
+    if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+        TASK_LOG.warning(u"Task %s has already been processed for %s!", entry.task_id, action_name)
+        return json.loads(entry.task_output)
+
+    def _create_module_state_subtask(module_list, initial_subtask_status):
+        """Creates a subtask updating the range of ids of a given list of modules."""
+        id_range = (module_list[0]['pk'], module_list[-1]['pk'])
+        return create_subtask_fcn(id_range, len(module_list), initial_subtask_status)
+
+    TASK_LOG.info(
+        u"Task %s: Preparing to queue subtasks to update %s modules for course %s",
+        entry.task_id, total_num_modules, entry.course_id
+    )
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_module_state_subtask,
+        [modules_to_update.order_by('id')],
+        [],
+        settings.MODULE_STATE_UPDATES_PER_TASK,
+        total_num_modules,
+    )
+
+
+def perform_module_state_update_part(visit_fcn, entry_id, id_range, num_modules, subtask_status_dict):
+    """
+    Update the StudentModules whose id is in `id_range` with `visit_fcn` (e.g.
+    `perform_module_state_update` with its update and filter functions), as a
+    subtask queued by `delegate_module_state_updates` for `num_modules` modules.
+
+    The progress of the subtask is recorded in the parent InstructorTask, which
+    is marked as done once all of its subtasks are.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+    action_name = json.loads(entry.task_output)['action_name']
+
+    TASK_LOG.info(
+        u"Task %s: updating %s modules with ids in %s as subtask %s",
+        entry.task_id, num_modules, id_range, current_task_id
+    )
+    subtask_exception = None
+    try:
+        task_progress = visit_fcn(entry_id, entry.course_id, json.loads(entry.task_input), action_name,
+                                  id_range=id_range)
+        subtask_status.increment(
+            succeeded=task_progress['succeeded'],
+            failed=task_progress['failed'],
+            skipped=task_progress['skipped'],
+            state=SUCCESS,
+        )
+        # Unlike emails, skipped modules count as attempted (see TaskProgress).
+        subtask_status.attempted += task_progress['skipped']
+    except Exception as exc:  # pylint: disable=broad-except
+        TASK_LOG.exception(u"Task %s: subtask %s failed unexpectedly!", entry.task_id, current_task_id)
+        subtask_exception = exc
+        subtask_status.increment(failed=num_modules, state=FAILURE)
+
+    update_subtask_status(entry_id, current_task_id, subtask_status)
+
+    if subtask_exception is not None:
+        raise subtask_exception  # pylint: disable=raising-bad-type
+    return subtask_status.to_dict()
 
 
 def _get_task_id_from_xmodule_args(xmodule_instance_args):
@@ -490,6 +688,240 @@ def rescore_problem_module_state(xmodule_instance_args, module_descriptor, stude
         return UPDATE_STATUS_SUCCEEDED
 
 
+class ProblemRescorer(object):
+    """
+    Rescores the submissions to the capa problem `module_descriptor` straight from the state
+    of their StudentModules, the way CapaModule.rescore_problem does, but without instantiating
+    the problem's XModule (with its FieldDataCache and module system) for each student.
+
+    The LoncapaProblems of the students share the parsed definition of the problem (see
+    capa.capa_problem.PARSED_PROBLEM_CACHE), and the tracking events are sent through the
+    track function of the task, like those of the XModules instantiated for the task.
+    """
+    def __init__(self, course_id, module_descriptor, xmodule_instance_args=None):
+        self.course_id = course_id
+        self.module_descriptor = module_descriptor
+        self.xmodule_instance_args = xmodule_instance_args
+        self.i18n = ModuleI18nService()
+        self.cache = get_safe_exec_cache()
+
+    @classmethod
+    def for_problem(cls, course_id, module_descriptor, xmodule_instance_args=None):
+        """
+        Returns a ProblemRescorer for `module_descriptor`, or None if its submissions have
+        to be rescored through its XModule: it isn't a capa problem, it doesn't support
+        rescoring (which the XModule reports), or scoring it has side effects which aren't
+        reproduced here (psychometrics, entrance exam milestones).
+        """
+        if not isinstance(module_descriptor, CapaDescriptor):
+            return None
+        if settings.FEATURES.get('ENABLE_PSYCHOMETRICS'):
+            return None
+        if settings.FEATURES.get('ENTRANCE_EXAMS') and getattr(module_descriptor, 'in_entrance_exam', False):
+            return None
+
+        rescorer = cls(course_id, module_descriptor, xmodule_instance_args)
+        try:
+            supports_rescoring = rescorer.new_lcp(None, {}, seed=1).supports_rescoring()
+        except Exception:  # pylint: disable=broad-except
+            # e.g. problems which need the xqueue of a student's module system
+            TASK_LOG.info(u"problem %s can't be rescored in bulk", module_descriptor.location, exc_info=True)
+            return None
+        return rescorer if supports_rescoring else None
+
+    def new_lcp(self, student, state, seed=None):
+        """
+        Returns the LoncapaProblem of `student` (None for no student) for the `state` of its
+        StudentModule, with the capa system the LMS would give it.
+        """
+        capa_system = LoncapaSystem(
+            ajax_url=None,
+            anonymous_student_id=anonymous_id_for_user(student, None, save=False) if student else None,
+            cache=self.cache,
+            can_execute_unsafe_code=(lambda: can_execute_unsafe_code(self.course_id)),
+            get_python_lib_zip=(lambda: get_python_lib_zip(contentstore, self.course_id)),
+            DEBUG=settings.DEBUG,
+            filestore=self.module_descriptor.runtime.resources_fs,
+            i18n=self.i18n,
+            node_path=settings.NODE_PATH,
+            render_template=render_to_string,
+            seed=student.id if student else 0,
+            STATIC_URL=settings.STATIC_URL,
+            xqueue=None,
+            matlab_api_key=self.module_descriptor.matlab_api_key,
+        )
+        return LoncapaProblem(
+            problem_text=self.module_descriptor.data,
+            id=self.module_descriptor.location.html_id(),
+            state=state,
+            seed=seed if seed is not None else state.get('seed'),
+            capa_system=capa_system,
+        )
+
+    def rescore(self, student_module):
+        """
+        Rescores the submission of `student_module`, and returns its update status and,
+        if it was rescored, its new state (a dict) and score (a dict with 'score' and 'total').
+
+        Raises the exceptions CapaModule.rescore_problem would.
+        """
+        student = student_module.student
+        state = json.loads(student_module.state or '{}')
+        lcp = self.new_lcp(student, state)
+        track_function = _get_track_function_for_task(student, self.xmodule_instance_args)
+        _ = self.i18n.ugettext
+
+        def track(event_type, event_info):
+            """Sends the event, unmasked like CapaModule.track_function_unmask does."""
+            event_unmasked = copy.deepcopy(event_info)
+            unmask_problem_event(lcp, event_unmasked)
+            track_function(event_type, event_unmasked)
+
+        event_info = {'state': lcp.get_state(), 'problem_id': self.module_descriptor.location.to_deprecated_string()}
+
+        if not lcp.done:
+            event_info['failure'] = 'unanswered'
+            track('problem_rescore_fail', event_info)
+            raise NotFoundError(_("Problem must be answered before it can be graded again."))
+
+        orig_score = lcp.get_score()
+        event_info['orig_score'] = orig_score['score']
+        event_info['orig_total'] = orig_score['total']
+
+        try:
+            correct_map = lcp.rescore_existing_answers()
+        except (StudentInputError, ResponseError, LoncapaProblemError) as inst:
+            event_info['failure'] = 'input_error'
+            track('problem_rescore_fail', event_info)
+            TASK_LOG.warning(u"error processing rescore call for course {course}, problem {loc} and student {student}: "
+                             u"{msg}".format(msg=inst.message, course=self.course_id,
+                                             loc=student_module.module_state_key, student=student))
+            return UPDATE_STATUS_FAILED, None, None
+        except Exception:
+            event_info['failure'] = 'unexpected'
+            track('problem_rescore_fail', event_info)
+            if settings.DEBUG:
+                TASK_LOG.warning(u"error processing rescore call for course {course}, problem {loc} and student "
+                                 u"{student}: {msg}".format(msg=traceback.format_exc(), course=self.course_id,
+                                                           loc=student_module.module_state_key, student=student))
+                return UPDATE_STATUS_FAILED, None, None
+            raise
+
+        # rescoring has no effect on attempts, nor on being done.
+        state.update(lcp.get_state())
+        new_score = lcp.get_score()
+        event_info['new_score'] = new_score['score']
+        event_info['new_total'] = new_score['total']
+
+        # success = correct if ALL questions in this problem are correct
+        success = 'correct'
+        for answer_id in correct_map:
+            if not correct_map.is_correct(answer_id):
+                success = 'incorrect'
+
+        event_info['correct_map'] = correct_map.get_dict()
+        event_info['success'] = success
+        event_info['attempts'] = state.get('attempts', 0)
+        track('problem_rescore', event_info)
+
+        TASK_LOG.debug(u"successfully processed rescore call for course {course}, problem {loc} and student {student}: "
+                       u"{msg}".format(msg=success, course=self.course_id, loc=student_module.module_state_key,
+                                       student=student))
+        return UPDATE_STATUS_SUCCEEDED, state, new_score
+
+
+def rescore_problem_module_states(xmodule_instance_args, module_descriptor, student_modules):
+    '''
+    Rescores the submissions of a batch of StudentModules to the problem `module_descriptor`,
+    and returns their update statuses, like rescore_problem_module_state does one by one.
+
+    The submissions are rescored by a ProblemRescorer when the problem allows it, and their new
+    state and grade are then written back in a single transaction, with the history and the
+    notifications the LMS would record for each of them.  Otherwise, the submissions are
+    rescored one by one through the problem's XModule, as are those of the students who
+    can't load the problem, which fail like they do there.
+    '''
+    course_id = student_modules[0].course_id
+    rescorer = ProblemRescorer.for_problem(course_id, module_descriptor, xmodule_instance_args)
+    if rescorer is None:
+        return [
+            rescore_problem_module_state(xmodule_instance_args, module_descriptor, student_module)
+            for student_module in student_modules
+        ]
+
+    update_statuses = []
+    rescored = []
+    try:
+        for student_module in student_modules:
+            state = json.loads(student_module.state or '{}')
+            # the XModule picks the seed of the problem, and denies access to it
+            if 'seed' not in state or not has_access(student_module.student, 'load', module_descriptor, course_id):
+                update_statuses.append(
+                    rescore_problem_module_state(xmodule_instance_args, module_descriptor, student_module)
+                )
+                continue
+            update_status, state, score = rescorer.rescore(student_module)
+            update_statuses.append(update_status)
+            if state is not None:
+                rescored.append((student_module, state, score))
+    finally:
+        # Like those rescored one by one, the modules rescored before a fatal error are saved
+        _save_rescored_module_states(rescored)
+    return update_statuses
+
+
+def _save_rescored_module_states(rescored):
+    """
+    Saves the new state and score of the (student_module, state, score) tuples of `rescored`
+    in a single transaction, and records what the LMS records when a problem is graded:
+    the history of the modules, and the score changes.
+    """
+    modified = datetime.now(UTC)
+    with transaction.commit_on_success():
+        history_entries = []
+        for student_module, state, score in rescored:
+            student_module.state = json.dumps(state)
+            student_module.grade = score['score']
+            student_module.max_grade = score['total']
+            student_module.modified = modified
+            # update() rather than save(), which would send post_save for each of the modules
+            StudentModule.objects.filter(id=student_module.id).update(
+                state=student_module.state,
+                grade=student_module.grade,
+                max_grade=student_module.max_grade,
+                modified=modified,
+            )
+            if student_module.module_type in StudentModuleHistory.HISTORY_SAVING_TYPES:
+                history_entries.append(StudentModuleHistory(
+                    student_module=student_module,
+                    version=None,
+                    created=modified,
+                    state=student_module.state,
+                    grade=student_module.grade,
+                    max_grade=student_module.max_grade,
+                ))
+        StudentModuleHistory.objects.bulk_create(history_entries)
+
+    for student_module, _state, _score in rescored:
+        course_id = student_module.course_id
+        tags = [
+            u"org:{}".format(course_id.org),
+            u"course:{}".format(course_id),
+            u"score_bucket:{0}".format(get_score_bucket(student_module.grade, student_module.max_grade)),
+            u"type:rescore",
+        ]
+        dog_stats_api.increment("lms.courseware.question_answered", tags=tags)
+        # also invalidates the persisted grades which depend on the module
+        SCORE_CHANGED.send(
+            sender=None,
+            points_possible=student_module.max_grade,
+            points_earned=student_module.grade,
+            user_id=student_module.student_id,
+            course_id=unicode(course_id),
+            usage_id=unicode(student_module.module_state_key)
+        )
+
+
 @transaction.autocommit
 def reset_attempts_module_state(xmodule_instance_args, _module_descriptor, student_module):
     """
@@ -538,7 +970,8 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp):
 
     Arguments:
         rows: CSV data in the following format (first column may be a
-            header):
+            header), as a list or any other iterable, e.g. a generator of
+            rows, which is consumed as the CSV is written:
             [
                 [row1_colum1, row1_colum2, ...],
                 ...
@@ -559,7 +992,8 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp):
     tracker.emit(REPORT_REQUESTED_EVENT_NAME, {"report_type": csv_name, })
 
 
-def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):  # pylint: disable=too-many-statements
+def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name,
+                      create_subtask_fcn=None):
     """
     For a given `course_id`, generate a grades CSV file for all students that
     are enrolled, and store using a `ReportStore`. Once created, the files can
@@ -568,15 +1002,25 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     buffered, so we'll never write part of a CSV file to S3 -- i.e. any files
     that are visible in ReportStore will be complete ones.
 
+    If `create_subtask_fcn` is provided and the course has more than
+    settings.GRADES_REPORT_STUDENTS_PER_TASK enrolled students, the students
+    are instead split into subtasks (see `delegate_report_batches`).
+
     As we start to add more CSV downloads, it will probably be worthwhile to
     make a more general CSVDoc class instead of building out the rows like we
     do here.
     """
     start_time = time()
     start_date = datetime.now(UTC)
-    status_interval = 100
     enrolled_students = CourseEnrollment.users_enrolled_in(course_id)
-    task_progress = TaskProgress(action_name, enrolled_students.count(), start_time)
+    total_enrolled_students = enrolled_students.count()
+
+    if create_subtask_fcn is not None and _should_delegate_report(total_enrolled_students):
+        return delegate_report_batches(
+            create_subtask_fcn, GRADE_REPORT, _entry_id, course_id, action_name, total_enrolled_students
+        )
+
+    task_progress = TaskProgress(action_name, total_enrolled_students, start_time)
 
     fmt = u'Task: {task_id}, InstructorTask ID: {entry_id}, Course: {course_id}, Input: {task_input}'
     task_info_string = fmt.format(
@@ -587,6 +1031,39 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
     )
     TASK_LOG.info(u'%s, Task type: %s, Starting task execution', task_info_string, action_name)
 
+    # The rows are generated as the students are graded, and written out to
+    # the report as they are generated, so that they never all sit in memory.
+    current_step = {'step': 'Calculating Grades'}
+    err_rows = [["id", "username", "error_msg"]]
+    rows = _grade_report_rows(
+        course_id, enrolled_students, task_progress, task_info_string, action_name, current_step, err_rows
+    )
+    upload_csv_to_report_store(rows, 'grade_report', course_id, start_date)
+
+    # By this point, we've written out the grades of all the students.
+    current_step = {'step': 'Uploading CSVs'}
+    task_progress.update_task_state(extra_meta=current_step)
+    TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
+
+    # If there are any error rows (don't count the header), write them out as well
+    if len(err_rows) > 1:
+        upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, start_date)
+
+    # One last update before we close out...
+    TASK_LOG.info(u'%s, Task type: %s, Finalizing grade task', task_info_string, action_name)
+    return task_progress.update_task_state(extra_meta=current_step)
+
+
+def _grade_report_rows(  # pylint: disable=too-many-statements
+        course_id, students, task_progress, task_info_string, action_name, current_step, err_rows
+):
+    """
+    Grade `students` and yield the rows of the grade report, starting with
+    its header unless no student could be graded. The rows of the students
+    who could not be graded are appended to the list `err_rows` instead.
+    """
+    status_interval = 100
+
     course = get_course_by_id(course_id)
     course_is_cohorted = is_course_cohorted(course.id)
     cohorts_header = ['Cohort Name'] if course_is_cohorted else []
@@ -600,20 +1077,17 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
 
     # Loop over all our students and build our CSV lists in memory
     header = None
-    rows = []
-    err_rows = [["id", "username", "error_msg"]]
-    current_step = {'step': 'Calculating Grades'}
 
-    total_enrolled_students = enrolled_students.count()
+    total_students = task_progress.total
     student_counter = 0
     TASK_LOG.info(
         u'%s, Task type: %s, Current step: %s, Starting grade calculation for total students: %s',
         task_info_string,
         action_name,
         current_step,
-        total_enrolled_students
+        total_students
     )
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students):
+    for student, gradeset, err_msg in iterate_grades_for(course, students):
         # Periodically update task status (this is a cache write)
         if task_progress.attempted % status_interval == 0:
             task_progress.update_task_state(extra_meta=current_step)
@@ -628,7 +1102,7 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
             action_name,
             current_step,
             student_counter,
-            total_enrolled_students
+            total_students
         )
 
         if gradeset:
@@ -636,7 +1110,7 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
             task_progress.succeeded += 1
             if not header:
                 header = [section['label'] for section in gradeset[u'section_breakdown']]
-                rows.append(
+                yield (
                     ["id", "email", "username", "grade"] + header + cohorts_header +
                     group_configs_header + ['Enrollment Track', 'Verification Status'] + certificate_info_header
                 )
@@ -677,7 +1151,7 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
             # possible for a student to have a 0.0 show up in their row but
             # still have 100% for the course.
             row_percents = [percents.get(label, 0.0) for label in header]
-            rows.append(
+            yield (
                 [student.id, student.email, student.username, gradeset['percent']] +
                 row_percents + cohorts_group_name + group_configs_group_names +
                 [enrollment_mode] + [verification_status] + certificate_info
@@ -693,25 +1167,9 @@ def upload_grades_csv(_xmodule_instance_args, _entry_id, course_id, _task_input,
         action_name,
         current_step,
         student_counter,
-        total_enrolled_students
+        total_students
     )
 
-    # By this point, we've got the rows we're going to stuff into our CSV files.
-    current_step = {'step': 'Uploading CSVs'}
-    task_progress.update_task_state(extra_meta=current_step)
-    TASK_LOG.info(u'%s, Task type: %s, Current step: %s', task_info_string, action_name, current_step)
-
-    # Perform the actual upload
-    upload_csv_to_report_store(rows, 'grade_report', course_id, start_date)
-
-    # If there are any error rows (don't count the header), write them out as well
-    if len(err_rows) > 1:
-        upload_csv_to_report_store(err_rows, 'grade_report_err', course_id, start_date)
-
-    # One last update before we close out...
-    TASK_LOG.info(u'%s, Task type: %s, Finalizing grade task', task_info_string, action_name)
-    return task_progress.update_task_state(extra_meta=current_step)
-
 
 def _order_problems(blocks):
     """
@@ -763,37 +1221,68 @@ def _order_problems(blocks):
     return problems
 
 
-def upload_problem_grade_report(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
+def upload_problem_grade_report(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name,
+                                create_subtask_fcn=None):
     """
     Generate a CSV containing all students' problem grades within a given
     `course_id`.
+
+    If `create_subtask_fcn` is provided and the course has more than
+    settings.GRADES_REPORT_STUDENTS_PER_TASK enrolled students, the students
+    are instead split into subtasks (see `delegate_report_batches`).
     """
     start_time = time()
     start_date = datetime.now(UTC)
-    status_interval = 100
     enrolled_students = CourseEnrollment.users_enrolled_in(course_id)
-    task_progress = TaskProgress(action_name, enrolled_students.count(), start_time)
+    total_enrolled_students = enrolled_students.count()
+    task_progress = TaskProgress(action_name, total_enrolled_students, start_time)
+
+    if not CourseStructure.objects.filter(course_id=course_id).exists():
+        return task_progress.update_task_state(
+            extra_meta={'step': 'Generating course structure. Please refresh and try again.'}
+        )
+
+    if create_subtask_fcn is not None and _should_delegate_report(total_enrolled_students):
+        return delegate_report_batches(
+            create_subtask_fcn, PROBLEM_GRADE_REPORT, _entry_id, course_id, action_name, total_enrolled_students
+        )
+
+    error_rows = []
+    rows = _rows_with_data(_problem_grade_report_rows(course_id, enrolled_students, task_progress, error_rows))
+
+    # Perform the upload if any students have been successfully graded
+    if rows is not None:
+        upload_csv_to_report_store(rows, 'problem_grade_report', course_id, start_date)
+    # If there are any error rows, write them out as well
+    if len(error_rows) > 1:
+        upload_csv_to_report_store(error_rows, 'problem_grade_report_err', course_id, start_date)
+
+    return task_progress.update_task_state(extra_meta={'step': 'Uploading CSV'})
+
+
+def _problem_grade_report_rows(course_id, students, task_progress, error_rows):
+    """
+    Grade `students` and yield the rows of the problem grade report, starting
+    with its header. The header of the error report, then the rows of the
+    students who could not be graded, are appended to the list `error_rows`.
+    """
+    status_interval = 100
 
     # This struct encapsulates both the display names of each static item in the
     # header row as values as well as the django User field names of those items
     # as the keys.  It is structured in this way to keep the values related.
     header_row = OrderedDict([('id', 'Student ID'), ('email', 'Email'), ('username', 'Username')])
 
-    try:
-        course_structure = CourseStructure.objects.get(course_id=course_id)
-        blocks = course_structure.ordered_blocks
-        problems = _order_problems(blocks)
-    except CourseStructure.DoesNotExist:
-        return task_progress.update_task_state(
-            extra_meta={'step': 'Generating course structure. Please refresh and try again.'}
-        )
+    course_structure = CourseStructure.objects.get(course_id=course_id)
+    blocks = course_structure.ordered_blocks
+    problems = _order_problems(blocks)
 
     # Just generate the static fields for now.
-    rows = [list(header_row.values()) + ['Final Grade'] + list(chain.from_iterable(problems.values()))]
-    error_rows = [list(header_row.values()) + ['error_msg']]
+    error_rows.append(list(header_row.values()) + ['error_msg'])
+    yield list(header_row.values()) + ['Final Grade'] + list(chain.from_iterable(problems.values()))
     current_step = {'step': 'Calculating Grades'}
 
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students, keep_raw_scores=True):
+    for student, gradeset, err_msg in iterate_grades_for(course_id, students, keep_raw_scores=True):
         student_fields = [getattr(student, field_name) for field_name in header_row]
         task_progress.attempted += 1
 
@@ -818,20 +1307,223 @@ def upload_problem_grade_report(_xmodule_instance_args, _entry_id, course_id, _t
                 # the case that the student does not have access to it (e.g. A/B
                 # test or cohorted courseware).
                 earned_possible_values.append(['N/A', 'N/A'])
-        rows.append(student_fields + [final_grade] + list(chain.from_iterable(earned_possible_values)))
+        yield student_fields + [final_grade] + list(chain.from_iterable(earned_possible_values))
 
         task_progress.succeeded += 1
         if task_progress.attempted % status_interval == 0:
             task_progress.update_task_state(extra_meta=current_step)
 
-    # Perform the upload if any students have been successfully graded
-    if len(rows) > 1:
-        upload_csv_to_report_store(rows, 'problem_grade_report', course_id, start_date)
-    # If there are any error rows, write them out as well
-    if len(error_rows) > 1:
-        upload_csv_to_report_store(error_rows, 'problem_grade_report_err', course_id, start_date)
 
-    return task_progress.update_task_state(extra_meta={'step': 'Uploading CSV'})
+def _rows_with_data(rows):
+    """
+    Return an iterable over the rows of the iterable `rows`, or None if
+    `rows` has no row after its header. Only the header and the first row
+    are consumed to tell, so `rows` may be a generator.
+    """
+    rows = iter(rows)
+    header = next(rows, None)
+    first_row = next(rows, None)
+    if first_row is None:
+        return None
+    return chain([header, first_row], rows)
+
+
+# The reports that can be split into subtasks. The names are also used as the
+# names of the resulting CSV files.
+GRADE_REPORT = 'grade_report'
+PROBLEM_GRADE_REPORT = 'problem_grade_report'
+
+
+def _grade_report_rows_for_subtask(course_id, students, task_progress, err_rows):
+    """Generate the grade report rows for the students of a subtask."""
+    task_info_string = u'Course: {course_id}'.format(course_id=course_id)
+    err_rows.append(["id", "username", "error_msg"])
+    return _grade_report_rows(
+        course_id, students, task_progress, task_info_string, task_progress.action_name,
+        {'step': 'Calculating Grades'}, err_rows
+    )
+
+
+# Maps each report that can be split into subtasks to the function generating
+# its rows for a list of students, and appending its error rows to a list.
+REPORT_ROWS_FUNCTIONS = {
+    GRADE_REPORT: _grade_report_rows_for_subtask,
+    PROBLEM_GRADE_REPORT: _problem_grade_report_rows,
+}
+
+
+def _should_delegate_report(total_num_students):
+    """
+    Return whether a report on `total_num_students` students should be split
+    into subtasks.
+    """
+    students_per_task = settings.GRADES_REPORT_STUDENTS_PER_TASK
+    return bool(students_per_task) and total_num_students > students_per_task
+
+
+def delegate_report_batches(create_subtask_fcn, report_name, entry_id, course_id, action_name, total_num_students):
+    """
+    Split the enrolled students of `course_id` into chunks of no more than
+    settings.GRADES_REPORT_STUDENTS_PER_TASK, and queue a subtask computing
+    the report `report_name` for each chunk, the same way bulk emails are sent.
+
+    `create_subtask_fcn` is called with the arguments of
+    `generate_report_part` (except for the subtask status dict, which is
+    passed as a SubtaskStatus) and returns the subtask to queue.
+
+    Each subtask stores its rows as partial files of the ReportStore; the
+    subtask that completes last combines them into the final report (see
+    `generate_report_part`).
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+
+    # As for bulk emails, if the subtasks have already been defined (e.g. the
+    # task has been requeued after a loss of connection to the broker), there
+    # is no need to define them again.
+    if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+        TASK_LOG.warning(u"Task %s has already been processed for %s!", entry.task_id, report_name)
+        return json.loads(entry.task_output)
+
+    start_time = time()
+    students = CourseEnrollment.users_enrolled_in(course_id).order_by('id')
+
+    def _create_report_subtask(student_list, initial_subtask_status):
+        """Creates a subtask computing the report for a given list of students."""
+        return create_subtask_fcn(
+            entry_id, report_name, action_name, student_list, start_time, initial_subtask_status
+        )
+
+    TASK_LOG.info(
+        u"Task %s: Preparing to queue subtasks for %s for course %s",
+        entry.task_id, report_name, course_id
+    )
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_report_subtask,
+        [students],
+        [],
+        settings.GRADES_REPORT_STUDENTS_PER_TASK,
+        total_num_students,
+    )
+
+
+def generate_report_part(entry_id, report_name, action_name, student_list, start_time, subtask_status_dict):
+    """
+    Compute the part of the report `report_name` for the students of
+    `student_list` (a list of dicts with a 'pk' key), and store it as partial
+    files of the ReportStore.
+
+    The progress of the subtask is recorded in the parent InstructorTask. The
+    subtask that completes last combines all the partial files into the final
+    report files, and marks the InstructorTask as done.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+    course_id = entry.course_id
+    report_store = ReportStore.from_config()
+    # Partial files are named after the first student of the subtask, so
+    # that they can be combined in the order of the students.
+    part_name = u'{:012d}.csv'.format(student_list[0]['pk'])
+
+    TASK_LOG.info(
+        u"Task %s: computing %s for %s students as subtask %s",
+        entry.task_id, report_name, len(student_list), current_task_id
+    )
+    subtask_exception = None
+    try:
+        students = User.objects.filter(id__in=[student['pk'] for student in student_list]).order_by('id')
+        task_progress = TaskProgress(action_name, len(student_list), time())
+        err_rows = []
+        rows = REPORT_ROWS_FUNCTIONS[report_name](course_id, students, task_progress, err_rows)
+        report_store.store_partial_rows(course_id, entry.task_id, u'rows_' + part_name, rows)
+        report_store.store_partial_rows(course_id, entry.task_id, u'errors_' + part_name, err_rows)
+        subtask_status.increment(succeeded=task_progress.succeeded, failed=task_progress.failed, state=SUCCESS)
+    except Exception as exc:  # pylint: disable=broad-except
+        TASK_LOG.exception(u"Task %s: subtask %s failed unexpectedly!", entry.task_id, current_task_id)
+        subtask_exception = exc
+        subtask_status.increment(failed=len(student_list), state=FAILURE)
+
+    all_done = update_subtask_status(entry_id, current_task_id, subtask_status, mark_complete=False)
+    if all_done:
+        _combine_report_parts(entry_id, report_name, datetime.fromtimestamp(start_time, UTC))
+
+    if subtask_exception is not None:
+        raise subtask_exception  # pylint: disable=raising-bad-type
+    return subtask_status.to_dict()
+
+
+def _combined_partial_rows(report_store, course_id, task_id, prefix):
+    """
+    Yield the rows of all the partial files of `task_id` whose name starts
+    with `prefix`, keeping the (first non-empty) header of the parts only once.
+    """
+    header = None
+    for part_rows in report_store.partial_rows_for(course_id, task_id, prefix):
+        part_header = next(part_rows, [])
+        if header is None and part_header:
+            header = part_header
+            yield header
+        for row in part_rows:
+            yield row
+
+
+def _combine_report_parts(entry_id, report_name, start_date):
+    """
+    Upload the report `report_name` made of the partial files stored by the
+    subtasks of the InstructorTask `entry_id`, then mark the task as done.
+
+    If any of the subtasks failed, the report is incomplete: nothing is
+    uploaded and the task is marked as failed.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    course_id = entry.course_id
+    report_store = ReportStore.from_config()
+
+    # A failed subtask stored no part, so the report would silently miss
+    # all of its students: don't publish it.
+    num_failed_subtasks = json.loads(entry.subtasks)['failed']
+    if num_failed_subtasks:
+        exc = ReportPartsError(
+            u"{} of the subtasks computing {} failed".format(num_failed_subtasks, report_name)
+        )
+        TASK_LOG.error(u"Task %s: %s, not uploading it", entry.task_id, exc.message)
+        report_store.delete_partials(course_id, entry.task_id)
+        entry.task_output = InstructorTask.create_output_for_failure(exc, None)
+        entry.task_state = FAILURE
+        entry.save_now()
+        return
+
+    try:
+        rows = _combined_partial_rows(report_store, course_id, entry.task_id, u'rows_')
+        if report_name == GRADE_REPORT:
+            # As when it is not split, the grade report is uploaded even if
+            # no student could be graded.
+            upload_csv_to_report_store(rows, report_name, course_id, start_date)
+        else:
+            rows = _rows_with_data(rows)
+            if rows is not None:
+                upload_csv_to_report_store(rows, report_name, course_id, start_date)
+
+        err_rows = _rows_with_data(_combined_partial_rows(report_store, course_id, entry.task_id, u'errors_'))
+        if err_rows is not None:
+            upload_csv_to_report_store(err_rows, report_name + '_err', course_id, start_date)
+
+        report_store.delete_partials(course_id, entry.task_id)
+    except Exception as exc:
+        TASK_LOG.exception(u"Task %s: failed to combine the parts of %s", entry.task_id, report_name)
+        entry = InstructorTask.objects.get(pk=entry_id)
+        entry.task_output = InstructorTask.create_output_for_failure(exc, traceback.format_exc())
+        entry.task_state = FAILURE
+        entry.save_now()
+        raise
+
+    entry = InstructorTask.objects.get(pk=entry_id)
+    entry.task_state = SUCCESS
+    entry.save_now()
 
 
 def upload_students_csv(_xmodule_instance_args, _entry_id, course_id, task_input, action_name):
@@ -11,8 +11,10 @@ from mock import patch
 import textwrap
 
 from celery.states import SUCCESS, FAILURE
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.urlresolvers import reverse
+from django.test.utils import override_settings
 
 from openedx.core.djangoapps.util.testing import TestConditionalContent
 from capa.tests.response_xml_factory import (CodeResponseXMLFactory,
@@ -21,7 +23,9 @@ from xmodule.modulestore.tests.factories import ItemFactory
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.partitions.partitions import Group, UserPartition
 
+from courseware import access
 from courseware.model_data import StudentModule
+from courseware.models import StudentModuleHistory
 
 from instructor_task.api import (submit_rescore_problem_for_all_students,
                                  submit_rescore_problem_for_student,
@@ -334,6 +338,67 @@ class TestRescoringTask(TestIntegrationTask):
             self.check_state(username, descriptor, 0, 1, 2)
 
 
+@patch.dict(settings.FEATURES, {'ENABLE_BULK_RESCORE': True})
+@override_settings(BULK_RESCORE_BATCH_SIZE=3)
+class TestBulkRescoringTask(TestRescoringTask):
+    """
+    Runs the rescoring scenarios with the submissions rescored in bulk.
+    """
+
+    def test_rescoring_without_modules(self):
+        """Check that capa problems are rescored without instantiating their modules"""
+        problem_url_name = 'H1P1'
+        self.define_option_problem(problem_url_name)
+        location = InstructorTaskModuleTestCase.problem_location(problem_url_name)
+        descriptor = self.module_store.get_item(location)
+        self.submit_student_answer('u1', problem_url_name, [OPTION_1, OPTION_1])
+        self.submit_student_answer('u2', problem_url_name, [OPTION_2, OPTION_2])
+        history_count = StudentModuleHistory.objects.count()
+
+        self.redefine_option_problem(problem_url_name)
+        with patch('instructor_task.tasks_helper._get_module_instance_for_task') as mock_get_module:
+            with patch('instructor_task.tasks_helper.task_track') as mock_track:
+                instructor_task = self.submit_rescore_all_student_answers('instructor', problem_url_name)
+        self.assertFalse(mock_get_module.called)
+
+        status = json.loads(InstructorTask.objects.get(id=instructor_task.id).task_output)
+        self.assertEqual(status['succeeded'], 2)
+        self.check_state('u1', descriptor, 0, 2, 1)
+        self.check_state('u2', descriptor, 2, 2, 1)
+        # one history entry, and one tracking event, per rescored submission
+        self.assertEqual(StudentModuleHistory.objects.count(), history_count + 2)
+        event_types = [call[0][2] for call in mock_track.call_args_list]
+        self.assertEqual(event_types, ['problem_rescore', 'problem_rescore'])
+
+    def test_rescoring_without_access(self):
+        """Check that the submissions of students who can't load the problem fail like when rescored one by one"""
+        problem_url_name = 'H1P1'
+        self.define_option_problem(problem_url_name)
+        location = InstructorTaskModuleTestCase.problem_location(problem_url_name)
+        descriptor = self.module_store.get_item(location)
+        self.submit_student_answer('u1', problem_url_name, [OPTION_1, OPTION_1])
+        self.submit_student_answer('u2', problem_url_name, [OPTION_1, OPTION_1])
+
+        def has_access(user, action, obj, course_key=None):
+            """u2 can't load the problem anymore"""
+            if user.username == 'u2' and action == 'load':
+                return False
+            return access.has_access(user, action, obj, course_key)
+
+        self.redefine_option_problem(problem_url_name)
+        with patch('instructor_task.tasks_helper.has_access', side_effect=has_access):
+            with patch('courseware.module_render.has_access', side_effect=has_access):
+                instructor_task = self.submit_rescore_all_student_answers('instructor', problem_url_name)
+
+        instructor_task = InstructorTask.objects.get(id=instructor_task.id)
+        self.assertEqual(instructor_task.task_state, FAILURE)
+        status = json.loads(instructor_task.task_output)
+        self.assertEqual(status['exception'], 'UpdateProblemModuleStateError')
+        # the submission rescored before the failure is saved, as it would be one by one
+        self.check_state('u1', descriptor, 0, 2, 1)
+        self.check_state('u2', descriptor, 2, 2, 1)
+
+
 class TestResetAttemptsTask(TestIntegrationTask):
     """
     Integration-style tests for resetting problem attempts in a background task.
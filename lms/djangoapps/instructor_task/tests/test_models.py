@@ -23,8 +23,20 @@ class MockKey(object):
 
     def set_contents_from_string(self, contents, headers):  # pylint: disable=unused-argument
         """ Expected method on a Key object. """
+        self.contents = contents
         self.bucket.store_key(self)
 
+    def set_contents_from_file(self, fp, headers=None, rewind=False):  # pylint: disable=unused-argument
+        """ Expected method on a Key object. """
+        if rewind:
+            fp.seek(0)
+        self.contents = fp.read()
+        self.bucket.store_key(self)
+
+    def get_contents_to_file(self, fp):
+        """ Expected method on a Key object. """
+        fp.write(self.contents)
+
     def generate_url(self, expires_in):  # pylint: disable=unused-argument
         """ Expected method on a Key object. """
         return "http://fake-edx-s3.edx.org/"
@@ -39,9 +51,13 @@ class MockBucket(object):
         """ Not a Bucket method, created just to store the keys in the Bucket for testing purposes. """
         self.keys.append(key)
 
-    def list(self, prefix):  # pylint: disable=unused-argument
+    def list(self, prefix):
         """ Expected method on a Bucket object. """
-        return self.keys
+        return [key for key in self.keys if key.key.startswith(prefix)]
+
+    def delete_keys(self, key_names):
+        """ Expected method on a Bucket object. """
+        self.keys = [key for key in self.keys if key.key not in key_names]
 
 
 class MockS3Connection(object):
@@ -84,6 +100,36 @@ class ReportStoreTestMixin(object):
             ['new_file', 'middle_file', 'old_file']
         )
 
+    def test_store_rows_from_generator(self):
+        """
+        Test that ReportStore.store_rows() accepts a generator of rows, and
+        that only the complete report is listed by links_for().
+        """
+        report_store = self.create_report_store()
+        report_store.store_rows(self.course_id, 'report.csv', ([i, u'r\xe9sum\xe9'] for i in range(3)))
+
+        self.assertEqual([link[0] for link in report_store.links_for(self.course_id)], ['report.csv'])
+
+    def test_partial_rows(self):
+        """
+        Test that partial files are read back in the order of their names,
+        filtered by prefix, and deleted with delete_partials().
+        """
+        report_store = self.create_report_store()
+        report_store.store_partial_rows(self.course_id, 'task-id', 'rows_2.csv', [['id'], [2]])
+        report_store.store_partial_rows(self.course_id, 'task-id', 'rows_1.csv', [['id'], [1]])
+        report_store.store_partial_rows(self.course_id, 'task-id', 'errors_1.csv', [['id', 'error_msg']])
+
+        self.assertEqual(
+            [list(rows) for rows in report_store.partial_rows_for(self.course_id, 'task-id', 'rows_')],
+            [[['id'], ['1']], [['id'], ['2']]]
+        )
+        # Partial files are never listed as reports
+        self.assertEqual(report_store.links_for(self.course_id), [])
+
+        report_store.delete_partials(self.course_id, 'task-id')
+        self.assertEqual(list(report_store.partial_rows_for(self.course_id, 'task-id')), [])
+
 
 class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, TestCase):
     """
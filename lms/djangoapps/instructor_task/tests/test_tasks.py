@@ -11,6 +11,7 @@ from uuid import uuid4
 from mock import Mock, MagicMock, patch
 
 from celery.states import SUCCESS, FAILURE
+from django.test.utils import override_settings
 
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from opaque_keys.edx.locations import i4xEncoder
@@ -347,6 +348,25 @@ class TestResetAttemptsInstructorTask(TestInstructorTasks):
         # check that entries were reset
         self._assert_num_attempts(students, 0)
 
+    @override_settings(MODULE_STATE_UPDATES_PER_TASK=3)
+    def test_reset_with_subtasks(self):
+        initial_attempts = 3
+        input_state = json.dumps({'attempts': initial_attempts})
+        num_students = 10
+        students = self._create_students_with_state(num_students, input_state)
+        task_entry = self._create_input_entry()
+        self._run_task_with_mock_celery(reset_problem_attempts, task_entry.id, task_entry.task_id)
+        # the subtasks have aggregated their progress in the entry:
+        entry = InstructorTask.objects.get(id=task_entry.id)
+        self.assertEquals(entry.task_state, SUCCESS)
+        self.assertEquals(json.loads(entry.subtasks)['succeeded'], 4)
+        output = json.loads(entry.task_output)
+        self.assertEquals(output.get('attempted'), num_students)
+        self.assertEquals(output.get('succeeded'), num_students)
+        self.assertEquals(output.get('total'), num_students)
+        self.assertEquals(output.get('action_name'), 'reset')
+        self._assert_num_attempts(students, 0)
+
     def _test_reset_with_student(self, use_email):
         """Run a reset task for one student, with several StudentModules for the problem defined."""
         num_students = 10
@@ -7,9 +7,14 @@ Tests that CSV grade report generation works with unicode emails.
 
 """
 import ddt
+import json
 from mock import Mock, patch
 import tempfile
 import unicodecsv
+from uuid import uuid4
+
+from celery.states import SUCCESS, FAILURE
+from django.test.utils import override_settings
 
 from capa.tests.response_xml_factory import MultipleChoiceResponseXMLFactory
 from certificates.tests.factories import GeneratedCertificateFactory, CertificateWhitelistFactory
@@ -24,10 +29,12 @@ from student.models import CourseEnrollment
 from verify_student.tests.factories import SoftwareSecurePhotoVerificationFactory
 from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 from xmodule.partitions.partitions import Group, UserPartition
-from instructor_task.models import ReportStore
+from instructor_task.models import InstructorTask, ReportStore
 from instructor_task.tasks_helper import (
-    cohort_students_and_upload, upload_grades_csv, upload_problem_grade_report, upload_students_csv
+    cohort_students_and_upload, upload_grades_csv, upload_problem_grade_report, upload_students_csv,
+    delegate_report_batches, generate_report_part, GRADE_REPORT
 )
+from instructor_task.tests.factories import InstructorTaskFactory
 from openedx.core.djangoapps.util.testing import ContentGroupTestCase, TestConditionalContent
 
 
@@ -925,3 +932,86 @@ class TestGradeReportEnrollmentAndCertificateInfo(TestReportMixin, InstructorTas
         )
 
         self._verify_csv_data(user.username, expected_output)
+
+
+@override_settings(GRADES_REPORT_STUDENTS_PER_TASK=2)
+@patch('instructor_task.tasks_helper._get_current_task')
+class TestReportSubtasks(TestReportMixin, InstructorTaskCourseTestCase):
+    """
+    Tests that grade reports split into subtasks are combined into a single
+    report, and are not published when a subtask fails.
+    """
+    def setUp(self):
+        super(TestReportSubtasks, self).setUp()
+        self.course = CourseFactory.create()
+        self.students = [self.create_student('student{}'.format(i)) for i in range(5)]
+        self.entry = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_id=str(uuid4()),
+            task_key='dummy_task_key',
+            task_type='grade_course',
+        )
+
+    def _delegate(self):
+        """
+        Split the grade report into subtasks, and return the arguments each
+        one would be called with.
+        """
+        mock_create_subtask_fcn = Mock()
+        delegate_report_batches(
+            mock_create_subtask_fcn, GRADE_REPORT, self.entry.id, self.course.id, 'graded', len(self.students)
+        )
+        return [
+            call_args[:-1] + (call_args[-1].to_dict(),)
+            for call_args, _kwargs in mock_create_subtask_fcn.call_args_list
+        ]
+
+    def test_delegate_report_batches(self, _mock_current_task):
+        subtasks_args = self._delegate()
+
+        self.assertEqual([len(args[3]) for args in subtasks_args], [2, 2, 1])
+        self.assertEqual(
+            [student['pk'] for args in subtasks_args for student in args[3]],
+            [student.id for student in self.students]
+        )
+        subtasks = json.loads(InstructorTask.objects.get(pk=self.entry.id).subtasks)
+        self.assertEqual(subtasks['total'], 3)
+
+    def test_generate_report_parts(self, _mock_current_task):
+        for args in self._delegate():
+            generate_report_part(*args)
+
+        entry = InstructorTask.objects.get(pk=self.entry.id)
+        self.assertEqual(entry.task_state, SUCCESS)
+        self.assertDictContainsSubset({'attempted': 5, 'succeeded': 5, 'failed': 0}, json.loads(entry.task_output))
+
+        report_store = ReportStore.from_config()
+        links = report_store.links_for(self.course.id)
+        self.assertEqual(len(links), 1)
+        self.assertIn('grade_report', links[0][0])
+        with open(report_store.path_to(self.course.id, links[0][0])) as csv_file:
+            self.assertEqual(
+                [int(row['id']) for row in unicodecsv.DictReader(csv_file)],
+                [student.id for student in self.students]
+            )
+        # The partial files are cleaned up
+        self.assertEqual(list(report_store.partial_rows_for(self.course.id, self.entry.task_id)), [])
+
+    def test_failed_subtask(self, _mock_current_task):
+        subtasks_args = self._delegate()
+        generate_report_part(*subtasks_args[0])
+        with patch.dict(
+            'instructor_task.tasks_helper.REPORT_ROWS_FUNCTIONS', {GRADE_REPORT: Mock(side_effect=Exception('boom'))}
+        ):
+            with self.assertRaises(Exception):
+                generate_report_part(*subtasks_args[1])
+        generate_report_part(*subtasks_args[2])
+
+        # The report would miss the students of the failed subtask
+        entry = InstructorTask.objects.get(pk=self.entry.id)
+        self.assertEqual(entry.task_state, FAILURE)
+        self.assertEqual(json.loads(entry.task_output)['exception'], 'ReportPartsError')
+
+        report_store = ReportStore.from_config()
+        self.assertEqual(report_store.links_for(self.course.id), [])
+        self.assertEqual(list(report_store.partial_rows_for(self.course.id, self.entry.task_id)), [])
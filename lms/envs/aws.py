@@ -177,6 +177,9 @@ if 'loc_cache' not in CACHES:
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'edx_location_mem_cache',
     }
+COURSE_STRUCTURE_CACHE_MAX_ENTRY_SIZE = ENV_TOKENS.get(
+    'COURSE_STRUCTURE_CACHE_MAX_ENTRY_SIZE', COURSE_STRUCTURE_CACHE_MAX_ENTRY_SIZE
+)
 
 # Email overrides
 DEFAULT_FROM_EMAIL = ENV_TOKENS.get('DEFAULT_FROM_EMAIL', DEFAULT_FROM_EMAIL)
@@ -257,6 +260,10 @@ VIRTUAL_UNIVERSITIES = ENV_TOKENS.get('VIRTUAL_UNIVERSITIES', [])
 META_UNIVERSITIES = ENV_TOKENS.get('META_UNIVERSITIES', {})
 COMMENTS_SERVICE_URL = ENV_TOKENS.get("COMMENTS_SERVICE_URL", '')
 COMMENTS_SERVICE_KEY = ENV_TOKENS.get("COMMENTS_SERVICE_KEY", '')
+COMMENTS_SERVICE_POOL_SIZE = ENV_TOKENS.get("COMMENTS_SERVICE_POOL_SIZE", COMMENTS_SERVICE_POOL_SIZE)
+COMMENTS_SERVICE_CONCURRENCY = ENV_TOKENS.get("COMMENTS_SERVICE_CONCURRENCY", COMMENTS_SERVICE_CONCURRENCY)
+COMMENTS_SERVICE_REQUEST_CACHE = ENV_TOKENS.get("COMMENTS_SERVICE_REQUEST_CACHE", COMMENTS_SERVICE_REQUEST_CACHE)
+COMMENTS_SERVICE_CACHE_TIMEOUTS = ENV_TOKENS.get("COMMENTS_SERVICE_CACHE_TIMEOUTS", COMMENTS_SERVICE_CACHE_TIMEOUTS)
 CERT_QUEUE = ENV_TOKENS.get("CERT_QUEUE", 'test-pull')
 ZENDESK_URL = ENV_TOKENS.get("ZENDESK_URL")
 FEEDBACK_SUBMISSION_EMAIL = ENV_TOKENS.get("FEEDBACK_SUBMISSION_EMAIL")
@@ -275,6 +282,10 @@ for name, value in ENV_TOKENS.get("CODE_JAIL", {}).items():
         CODE_JAIL[name] = value
 
 COURSES_WITH_UNSAFE_CODE = ENV_TOKENS.get("COURSES_WITH_UNSAFE_CODE", [])
+CODE_JAIL_WORKER_POOL.update(ENV_TOKENS.get('CODE_JAIL_WORKER_POOL', {}))
+SAFE_EXEC_CACHE_LOCAL_SIZE = ENV_TOKENS.get('SAFE_EXEC_CACHE_LOCAL_SIZE', SAFE_EXEC_CACHE_LOCAL_SIZE)
+SAFE_EXEC_CACHE_MAX_ENTRY_SIZE = ENV_TOKENS.get('SAFE_EXEC_CACHE_MAX_ENTRY_SIZE', SAFE_EXEC_CACHE_MAX_ENTRY_SIZE)
+SAFE_EXEC_CACHE_TIMEOUT = ENV_TOKENS.get('SAFE_EXEC_CACHE_TIMEOUT', SAFE_EXEC_CACHE_TIMEOUT)
 
 ASSET_IGNORE_REGEX = ENV_TOKENS.get('ASSET_IGNORE_REGEX', ASSET_IGNORE_REGEX)
 
@@ -402,6 +413,10 @@ XQUEUE_INTERFACE = AUTH_TOKENS['XQUEUE_INTERFACE']
 # use the one from common.py
 MODULESTORE = convert_module_store_setting_if_needed(AUTH_TOKENS.get('MODULESTORE', MODULESTORE))
 CONTENTSTORE = AUTH_TOKENS.get('CONTENTSTORE', CONTENTSTORE)
+STATIC_CONTENT_CACHE_TTL = ENV_TOKENS.get('STATIC_CONTENT_CACHE_TTL', STATIC_CONTENT_CACHE_TTL)
+STATIC_CONTENT_COURSE_CACHE_TTLS = ENV_TOKENS.get(
+    'STATIC_CONTENT_COURSE_CACHE_TTLS', STATIC_CONTENT_COURSE_CACHE_TTLS
+)
 DOC_STORE_CONFIG = AUTH_TOKENS.get('DOC_STORE_CONFIG', DOC_STORE_CONFIG)
 MONGODB_LOG = AUTH_TOKENS.get('MONGODB_LOG', {})
 
@@ -456,6 +471,7 @@ STUDENT_FILEUPLOAD_MAX_SIZE = ENV_TOKENS.get("STUDENT_FILEUPLOAD_MAX_SIZE", STUD
 
 # Event tracking
 TRACKING_BACKENDS.update(AUTH_TOKENS.get("TRACKING_BACKENDS", {}))
+TRACKING_ASYNC_SHIPPING.update(ENV_TOKENS.get("TRACKING_ASYNC_SHIPPING", {}))
 EVENT_TRACKING_BACKENDS['tracking_logs']['OPTIONS']['backends'].update(AUTH_TOKENS.get("EVENT_TRACKING_BACKENDS", {}))
 EVENT_TRACKING_BACKENDS['segmentio']['OPTIONS']['processors'][0]['OPTIONS']['whitelist'].extend(
     AUTH_TOKENS.get("EVENT_TRACKING_SEGMENTIO_EMIT_WHITELIST", []))
@@ -477,6 +493,10 @@ VERIFY_STUDENT = AUTH_TOKENS.get("VERIFY_STUDENT", VERIFY_STUDENT)
 GRADES_DOWNLOAD_ROUTING_KEY = HIGH_MEM_QUEUE
 
 GRADES_DOWNLOAD = ENV_TOKENS.get("GRADES_DOWNLOAD", GRADES_DOWNLOAD)
+GRADES_STUDENT_CHUNK_SIZE = ENV_TOKENS.get("GRADES_STUDENT_CHUNK_SIZE", GRADES_STUDENT_CHUNK_SIZE)
+GRADES_REPORT_STUDENTS_PER_TASK = ENV_TOKENS.get("GRADES_REPORT_STUDENTS_PER_TASK", GRADES_REPORT_STUDENTS_PER_TASK)
+MODULE_STATE_UPDATES_PER_TASK = ENV_TOKENS.get("MODULE_STATE_UPDATES_PER_TASK", MODULE_STATE_UPDATES_PER_TASK)
+BULK_RESCORE_BATCH_SIZE = ENV_TOKENS.get("BULK_RESCORE_BATCH_SIZE", BULK_RESCORE_BATCH_SIZE)
 
 ##### ORA2 ######
 # Prefix for uploads of example-based assessment AI classifiers
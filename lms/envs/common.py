@@ -59,6 +59,22 @@ DISCUSSION_SETTINGS = {
     'MAX_COMMENT_DEPTH': 2,
 }
 
+# The number of keep-alive connections to the comments service kept by each process
+COMMENTS_SERVICE_POOL_SIZE = 10
+
+# The number of independent requests to the comments service a view may make
+# concurrently (1 to make them one after the other)
+COMMENTS_SERVICE_CONCURRENCY = 4
+
+# Whether to reuse the responses to identical reads from the comments service
+# during a request
+COMMENTS_SERVICE_REQUEST_CACHE = True
+
+# How long (in seconds) to cache the read-mostly resources of the comments
+# service, by type, e.g. {'user': 30, 'commentable': 300}. They are dropped
+# from the cache when they are written to.
+COMMENTS_SERVICE_CACHE_TIMEOUTS = {}
+
 
 # Features
 FEATURES = {
@@ -269,6 +285,11 @@ FEATURES = {
     # only edX superusers can perform the downloads)
     'ALLOW_COURSE_STAFF_GRADE_DOWNLOADS': False,
 
+    # Persist per-student subsection scores so that grading and the progress
+    # page only recompute the subsections whose scores changed since the last
+    # time they were graded, or whose course content has been edited.
+    'ENABLE_PERSISTENT_GRADES': False,
+
     'ENABLED_PAYMENT_REPORTS': [
         "refund_report",
         "itemized_purchase_report",
@@ -386,6 +407,14 @@ FEATURES = {
 
     # Software secure fake page feature flag
     'ENABLE_SOFTWARE_SECURE_FAKE': False,
+
+    # Run the sandboxed code of problems in a pool of warm sandboxed Python
+    # workers (see capa.safe_exec.pool and CODE_JAIL_WORKER_POOL)
+    'ENABLE_CODE_JAIL_WORKER_POOL': False,
+
+    # Rescore the submissions to capa problems in batches, without
+    # instantiating the problem for each student (see BULK_RESCORE_BATCH_SIZE)
+    'ENABLE_BULK_RESCORE': False,
 }
 
 # Ignore static asset files on import which match this pattern
@@ -587,6 +616,26 @@ TRACKING_BACKENDS = {
     }
 }
 
+# Ship the events to TRACKING_BACKENDS from a background thread, in batches,
+# rather than on the thread of the request (see track.shipper).
+TRACKING_ASYNC_SHIPPING = {
+    'ENABLED': False,
+    # The maximum number of events waiting to be shipped
+    'QUEUE_SIZE': 10000,
+    # The maximum number of events shipped together
+    'BATCH_SIZE': 100,
+    # How long (in seconds) the events wait for their batch to fill up
+    'FLUSH_INTERVAL': 1,
+    # What happens to the events when the queue is full: 'drop' them, 'sync'
+    # (send them on the thread of the request), or 'block' until there is room
+    'OVERFLOW_POLICY': 'drop',
+    # How long (in seconds) the 'block' policy waits for room before dropping an event
+    'BLOCK_TIMEOUT': 1,
+    # How long (in seconds) the queued events may take to be shipped when the
+    # process exits, before they're dropped
+    'EXIT_TIMEOUT': 5,
+}
+
 # We're already logging events, and we don't want to capture user
 # names/passwords.  Heartbeat events are likely not interesting.
 TRACKING_IGNORE_URL_PATTERNS = [r'^/event', r'^/login', r'^/heartbeat', r'^/segmentio/event', r'^/performance']
@@ -682,6 +731,18 @@ XBLOCK_SELECT_FUNCTION = prefer_xmodules
 
 MODULESTORE_BRANCH = 'published-only'
 CONTENTSTORE = None
+
+# Lifetime (in seconds) of the unlocked contentstore assets in browsers' and CDNs' caches,
+# for the courses not mapped to a specific lifetime in STATIC_CONTENT_COURSE_CACHE_TTLS.
+# Locked assets are only cached privately.
+STATIC_CONTENT_CACHE_TTL = 60 * 60 * 24
+STATIC_CONTENT_COURSE_CACHE_TTLS = {}
+
+# Largest size (in bytes, once compressed) of the split modulestore structures
+# stored in the 'course_structure_cache' cache; larger ones are only cached in
+# each process. Keep it below the item size limit of the cache backend, e.g.
+# memcached's 1MB default, which drops larger values without any error.
+COURSE_STRUCTURE_CACHE_MAX_ENTRY_SIZE = 1000 * 1000
 DOC_STORE_CONFIG = {
     'host': 'localhost',
     'db': 'xmodule',
@@ -754,6 +815,23 @@ CODE_JAIL = {
 #   ]
 COURSES_WITH_UNSAFE_CODE = []
 
+# The pool of warm sandboxed Python workers of each process, when
+# FEATURES['ENABLE_CODE_JAIL_WORKER_POOL'] is on: how many idle workers are
+# kept, and after how many executions a worker is replaced by a new one.
+CODE_JAIL_WORKER_POOL = {
+    'size': 4,
+    'max_executions': 100,
+}
+
+# The results of the sandboxed code of problems are cached (see
+# util.sandboxing.get_safe_exec_cache): each process keeps the most recently
+# used ones in memory, in front of the 'safe_exec' cache if there is one, else
+# of the default cache. Results larger than SAFE_EXEC_CACHE_MAX_ENTRY_SIZE bytes
+# (compressed) aren't cached; None as a timeout means the cache's default timeout.
+SAFE_EXEC_CACHE_LOCAL_SIZE = 1000
+SAFE_EXEC_CACHE_MAX_ENTRY_SIZE = 1024 * 1024
+SAFE_EXEC_CACHE_TIMEOUT = None
+
 ############################### DJANGO BUILT-INS ###############################
 # Change DEBUG/TEMPLATE_DEBUG in your environment settings files, not here
 DEBUG = False
@@ -1905,6 +1983,24 @@ GRADES_DOWNLOAD = {
     'ROOT_PATH': '/tmp/edx-s3/grades',
 }
 
+# Number of students whose stored scores are fetched with a single query when
+# grading many students in a row (e.g. for grade reports)
+GRADES_STUDENT_CHUNK_SIZE = 100
+
+# Grade reports for courses with more enrolled students than this are split
+# into subtasks computing the report for this many students each, which are
+# combined once they are all done. None disables the split.
+GRADES_REPORT_STUDENTS_PER_TASK = None
+
+# Rescores, resets of attempts and deletions of the state of problems which
+# concern more StudentModules than this are split into subtasks updating this
+# many modules each. None disables the split.
+MODULE_STATE_UPDATES_PER_TASK = None
+
+# Number of submissions loaded, rescored and written back at once when
+# rescoring in bulk (see FEATURES['ENABLE_BULK_RESCORE'])
+BULK_RESCORE_BATCH_SIZE = 500
+
 
 #### PASSWORD POLICY SETTINGS #####
 PASSWORD_MIN_LENGTH = 8
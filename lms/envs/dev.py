@@ -94,6 +94,23 @@ CACHES = {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'edx_location_mem_cache',
     },
+    # Split modulestore structures never change once stored, so they can
+    # be kept for as long as the cache allows. Structures larger than
+    # COURSE_STRUCTURE_CACHE_MAX_ENTRY_SIZE bytes once compressed are not
+    # stored here: with memcached, keep that setting below the item size
+    # limit (-I, 1MB by default), which otherwise drops them silently.
+    'course_structure_cache': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': '/var/tmp/course_structure_cache',
+        'TIMEOUT': 7 * 24 * 60 * 60,
+        'KEY_FUNCTION': 'util.memcache.safe_key',
+    },
+    # The chunks of the large static contents served from the contentstore.
+    'content_chunks': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': '/var/tmp/content_chunks',
+        'KEY_FUNCTION': 'util.memcache.safe_key',
+    },
 }
 
 
@@ -52,6 +52,12 @@ FEATURES['DISABLE_START_DATES'] = True
 # the one in cms/envs/test.py
 FEATURES['ENABLE_DISCUSSION_SERVICE'] = False
 
+# Make the (mocked) requests to the comments service one after the other, in a predictable order.
+COMMENTS_SERVICE_CONCURRENCY = 1
+# The views are often called directly, without the middleware clearing the
+# request cache, so don't reuse the (mocked) responses of the comments service.
+COMMENTS_SERVICE_REQUEST_CACHE = False
+
 FEATURES['ENABLE_SERVICE_STATUS'] = True
 
 FEATURES['ENABLE_HINTER_INSTRUCTOR_VIEW'] = True
@@ -1,6 +1,6 @@
 import logging
 
-from .utils import extract, perform_request, CommentClientRequestError
+from .utils import cache_timeout_for, extract, perform_request, CommentClientRequestError
 
 
 log = logging.getLogger(__name__)
@@ -73,7 +73,8 @@ class Model(object):
             url,
             self.default_retrieve_params,
             metric_tags=self._metric_tags,
-            metric_action='model.retrieve'
+            metric_action='model.retrieve',
+            cache_timeout=cache_timeout_for(self.type),
         )
         self._update_from_response(response)
 
@@ -0,0 +1,127 @@
+"""
+Tests of the helpers of the comments service client
+"""
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import translation
+from mock import Mock, patch
+
+from lms.lib import comment_client as cc
+from lms.lib.comment_client import utils
+from lms.lib.comment_client.settings import PREFIX
+from request_cache.middleware import RequestCache
+
+
+@override_settings(COMMENTS_SERVICE_CONCURRENCY=2)
+class PerformConcurrentlyTestCase(TestCase):
+    """
+    Tests of perform_concurrently
+    """
+    def setUp(self):
+        super(PerformConcurrentlyTestCase, self).setUp()
+        # Use a pool of the overridden size.
+        utils._THREAD_POOL = None  # pylint: disable=protected-access
+        self.addCleanup(setattr, utils, '_THREAD_POOL', None)
+
+    def test_results_in_order(self):
+        results = utils.perform_concurrently(lambda: 1, lambda: 2, lambda: 3)
+        self.assertEqual(results, [1, 2, 3])
+
+    def test_exception_raised(self):
+        def fail():
+            """Fail like a request to the comments service."""
+            raise utils.CommentClientRequestError("Not found", 404)
+
+        with self.assertRaises(utils.CommentClientRequestError) as context:
+            utils.perform_concurrently(lambda: 1, fail)
+        self.assertEqual(context.exception.status_code, 404)
+
+    def test_language_of_caller(self):
+        with translation.override('eo'):
+            languages = utils.perform_concurrently(translation.get_language, translation.get_language)
+        self.assertEqual(languages, ['eo', 'eo'])
+
+    def test_nested_calls(self):
+        results = utils.perform_concurrently(
+            lambda: utils.perform_concurrently(lambda: 1, lambda: 2),
+            lambda: utils.perform_concurrently(lambda: 3, lambda: 4),
+        )
+        self.assertEqual(results, [[1, 2], [3, 4]])
+
+
+class GetSessionTestCase(TestCase):
+    """
+    Tests of get_session
+    """
+    def test_shared_session(self):
+        self.assertIs(utils.get_session(), utils.get_session())
+
+
+@override_settings(COMMENTS_SERVICE_REQUEST_CACHE=True, COMMENTS_SERVICE_CACHE_TIMEOUTS={'user': 60})
+@patch('requests.Session.request')
+class PerformRequestCacheTestCase(TestCase):
+    """
+    Tests of the caching of the responses of perform_request
+    """
+    url = PREFIX + '/threads/dummy'
+
+    def setUp(self):
+        super(PerformRequestCacheTestCase, self).setUp()
+        RequestCache().clear_request_cache()
+        self.addCleanup(RequestCache().clear_request_cache)
+        cache.clear()
+
+    def set_response(self, mock_request, data):
+        """
+        Make the mocked comments service respond `data`.
+        """
+        mock_request.return_value = Mock(status_code=200, text='', json=Mock(return_value=data))
+
+    def test_identical_requests_made_once(self, mock_request):
+        self.set_response(mock_request, {'id': 'dummy'})
+        self.assertEqual(utils.perform_request('get', self.url, {'recursive': True}), {'id': 'dummy'})
+        self.assertEqual(utils.perform_request('get', self.url, {'recursive': True}), {'id': 'dummy'})
+        self.assertEqual(mock_request.call_count, 1)
+
+        utils.perform_request('get', self.url, {'recursive': False})
+        self.assertEqual(mock_request.call_count, 2)
+
+    def test_cached_responses_copied(self, mock_request):
+        self.set_response(mock_request, {'children': []})
+        utils.perform_request('get', self.url)['children'].append('changed')
+        self.assertEqual(utils.perform_request('get', self.url), {'children': []})
+
+    def test_write_drops_responses(self, mock_request):
+        self.set_response(mock_request, {'id': 'dummy'})
+        utils.perform_request('get', self.url)
+        utils.perform_request('put', self.url, {'title': 'new title'})
+        utils.perform_request('get', self.url)
+        self.assertEqual(mock_request.call_count, 3)
+
+    @override_settings(COMMENTS_SERVICE_REQUEST_CACHE=False)
+    def test_request_cache_disabled(self, mock_request):
+        self.set_response(mock_request, {'id': 'dummy'})
+        utils.perform_request('get', self.url)
+        utils.perform_request('get', self.url)
+        self.assertEqual(mock_request.call_count, 2)
+
+    def test_user_cached_across_requests(self, mock_request):
+        self.set_response(mock_request, {'id': '1', 'default_sort_key': 'votes'})
+        self.assertEqual(cc.User(id='1').to_dict()['default_sort_key'], 'votes')
+        RequestCache().clear_request_cache()
+        self.assertEqual(cc.User(id='1').to_dict()['default_sort_key'], 'votes')
+        self.assertEqual(mock_request.call_count, 1)
+
+        # Following a thread changes the user.
+        cc.User(id='1').follow(cc.Thread(id='dummy'))
+        RequestCache().clear_request_cache()
+        cc.User(id='1').to_dict()
+        self.assertEqual(mock_request.call_count, 3)
+
+    def test_threads_not_cached_across_requests(self, mock_request):
+        self.set_response(mock_request, {'id': 'dummy'})
+        cc.Thread(id='dummy').retrieve()
+        RequestCache().clear_request_cache()
+        cc.Thread(id='dummy').retrieve()
+        self.assertEqual(mock_request.call_count, 2)
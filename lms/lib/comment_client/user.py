@@ -1,4 +1,4 @@
-from .utils import merge_dict, perform_request, CommentClientRequestError
+from .utils import cache_timeout_for, merge_dict, perform_request, CommentClientRequestError
 
 import models
 import settings
@@ -130,6 +130,7 @@ class User(models.Model):
                 retrieve_params,
                 metric_action='model.retrieve',
                 metric_tags=self._metric_tags,
+                cache_timeout=cache_timeout_for(self.type),
             )
         except CommentClientRequestError as e:
             if e.status_code == 404:
@@ -142,6 +143,7 @@ class User(models.Model):
                     retrieve_params,
                     metric_action='model.retrieve',
                     metric_tags=self._metric_tags,
+                    cache_timeout=cache_timeout_for(self.type),
                 )
             else:
                 raise
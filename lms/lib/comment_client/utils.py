@@ -1,14 +1,40 @@
 from contextlib import contextmanager
+import cookielib
+import copy
 import dogstats_wrapper as dog_stats_api
+import hashlib
 import logging
+from multiprocessing.pool import ThreadPool
+import os
 import requests
+from requests.adapters import HTTPAdapter
+import sys
+import threading
 from django.conf import settings
+from django.core.cache import cache
 from time import time
 from uuid import uuid4
+from django.utils import translation
 from django.utils.translation import get_language
 
+from request_cache.middleware import RequestCache
+
+from .settings import PREFIX
+
 log = logging.getLogger(__name__)
 
+# The session of the calls to the comments service, and the pool of threads
+# running them concurrently, of this process (see get_session and
+# perform_concurrently).
+_SESSION = None
+_THREAD_POOL = None
+_PID = None
+_LOCK = threading.Lock()
+_CONCURRENT_CALLS = threading.local()
+
+# The key of the responses to the GET requests in the request cache.
+REQUEST_CACHE_KEY = 'comment_client.responses'
+
 
 def strip_none(dic):
     return dict([(k, v) for k, v in dic.iteritems() if v is not None])
@@ -31,6 +57,150 @@ def merge_dict(dic1, dic2):
     return dict(dic1.items() + dic2.items())
 
 
+def _reset_if_forked():
+    """
+    Drop the session and the thread pool created by the process this one was
+    forked from, whose connections and threads aren't this process's.
+    """
+    global _SESSION, _THREAD_POOL, _PID  # pylint: disable=global-statement
+    if _PID != os.getpid():
+        _SESSION = None
+        _THREAD_POOL = None
+        _PID = os.getpid()
+
+
+def get_session():
+    """
+    Return the requests Session shared by the calls to the comments service,
+    which keeps their connections alive in pools of up to
+    settings.COMMENTS_SERVICE_POOL_SIZE connections per host.
+    """
+    global _SESSION  # pylint: disable=global-statement
+    with _LOCK:
+        _reset_if_forked()
+        if _SESSION is None:
+            pool_size = getattr(settings, "COMMENTS_SERVICE_POOL_SIZE", 10)
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            # The session is shared by the requests of all the users, it
+            # mustn't keep any cookie.
+            session.cookies.set_policy(cookielib.DefaultCookiePolicy(allowed_domains=[]))
+            _SESSION = session
+        return _SESSION
+
+
+def _get_thread_pool():
+    """
+    Return the pool of settings.COMMENTS_SERVICE_CONCURRENCY threads running
+    the calls to the comments service concurrently.
+    """
+    global _THREAD_POOL  # pylint: disable=global-statement
+    with _LOCK:
+        _reset_if_forked()
+        if _THREAD_POOL is None:
+            _THREAD_POOL = ThreadPool(getattr(settings, "COMMENTS_SERVICE_CONCURRENCY", 1))
+        return _THREAD_POOL
+
+
+def perform_concurrently(*calls):
+    """
+    Run the independent calls to the comments service `calls` (functions
+    without arguments, e.g. `thread.retrieve`) concurrently, and return the
+    list of their results.
+
+    The calls are run by a pool of settings.COMMENTS_SERVICE_CONCURRENCY
+    threads, in the language of the caller. They must not use the database,
+    whose connections are per thread. If some of the calls raise an exception,
+    the exception of the first of them is raised once they are all done.
+    """
+    concurrency = getattr(settings, "COMMENTS_SERVICE_CONCURRENCY", 1)
+    # The calls made by the pool's threads are run in turn, so that they can't
+    # wait for each other.
+    if concurrency <= 1 or len(calls) <= 1 or getattr(_CONCURRENT_CALLS, 'active', False):
+        return [call() for call in calls]
+
+    language = get_language()
+    request_cache = RequestCache.get_request_cache()
+    request_cache_data = request_cache.data
+
+    def _run(call):
+        """Run `call`, and return whether it succeeded, with its result or exception info."""
+        _CONCURRENT_CALLS.active = True
+        # Share the request cache of the caller.
+        request_cache.data = request_cache_data
+        try:
+            with translation.override(language):
+                return True, call()
+        except Exception:  # pylint: disable=broad-except
+            return False, sys.exc_info()
+        finally:
+            _CONCURRENT_CALLS.active = False
+            request_cache.data = {}
+
+    outcomes = _get_thread_pool().map(_run, calls)
+    for succeeded, outcome in outcomes:
+        if not succeeded:
+            raise outcome[0], outcome[1], outcome[2]
+    return [outcome for __, outcome in outcomes]
+
+
+def cache_timeout_for(resource_type):
+    """
+    Return how long (in seconds) the resources of type `resource_type` (e.g.
+    'user') may be cached, per settings.COMMENTS_SERVICE_CACHE_TIMEOUTS, or
+    None if they may not be cached.
+    """
+    return getattr(settings, "COMMENTS_SERVICE_CACHE_TIMEOUTS", {}).get(resource_type) or None
+
+
+def _get_request_cache():
+    """
+    Return the responses to the GET requests made during the current request
+    (by url and parameters), or None if they aren't cached.
+    """
+    if not getattr(settings, "COMMENTS_SERVICE_REQUEST_CACHE", False):
+        return None
+    return RequestCache.get_request_cache().data.setdefault(REQUEST_CACHE_KEY, {})
+
+
+def _resource_cache_key(url):
+    """
+    Return the key of the cached responses to the GET requests of `url`.
+    """
+    return 'comment_client.resource.{}'.format(hashlib.md5(url.encode('utf-8')).hexdigest())
+
+
+def _affected_resources(url, data_or_params):
+    """
+    Return the urls of the resources which may be changed by a write to `url`
+    with `data_or_params`: the resource `url` is (or is under, e.g. the thread
+    of /threads/<id>/comments), and the user of its 'user_id' parameter.
+    """
+    resources = set()
+    if url.startswith(PREFIX):
+        path = url[len(PREFIX):].split('/')
+        if len(path) >= 3:
+            resources.add('/'.join([PREFIX] + path[1:3]))
+    user_id = data_or_params.get('user_id')
+    if user_id:
+        resources.add(u'{prefix}/users/{user_id}'.format(prefix=PREFIX, user_id=user_id))
+    return resources
+
+
+def _invalidate_caches(url, data_or_params):
+    """
+    Drop the cached responses which may be changed by a write to `url` with
+    `data_or_params`.
+    """
+    request_cache = _get_request_cache()
+    if request_cache:
+        request_cache.clear()
+    if getattr(settings, "COMMENTS_SERVICE_CACHE_TIMEOUTS", None):
+        cache.delete_many([_resource_cache_key(resource) for resource in _affected_resources(url, data_or_params)])
+
+
 @contextmanager
 def request_timer(request_id, method, url, tags=None):
     start = time()
@@ -51,8 +221,16 @@ def request_timer(request_id, method, url, tags=None):
 
 
 def perform_request(method, url, data_or_params=None, raw=False,
-                    metric_action=None, metric_tags=None, paged_results=False):
+                    metric_action=None, metric_tags=None, paged_results=False,
+                    cache_timeout=None):
+    """
+    Make a request to the comments service, and return its response.
 
+    The responses to GET requests are cached for the rest of the current
+    request if settings.COMMENTS_SERVICE_REQUEST_CACHE is set, and for
+    `cache_timeout` seconds (see cache_timeout_for) if it isn't None. The
+    other requests drop the cached responses they may change.
+    """
     if metric_tags is None:
         metric_tags = []
 
@@ -62,6 +240,44 @@ def perform_request(method, url, data_or_params=None, raw=False,
 
     if data_or_params is None:
         data_or_params = {}
+
+    if method != 'get':
+        _invalidate_caches(url, data_or_params)
+        return _perform_request(method, url, data_or_params, raw, metric_tags, paged_results)
+
+    # The response depends on the url, the parameters and the language.
+    response_key = repr((sorted(data_or_params.items()), raw, get_language()))
+    request_cache = _get_request_cache()
+    request_cache_key = (url, response_key)
+    if request_cache is not None and request_cache_key in request_cache:
+        dog_stats_api.increment('comment_client.request.cached', tags=metric_tags + [u'cache:request'])
+        return copy.deepcopy(request_cache[request_cache_key])
+
+    responses = None
+    if cache_timeout is not None:
+        # The responses to the requests of a url are cached together, so that
+        # they are dropped together.
+        responses = cache.get(_resource_cache_key(url)) or {}
+        if response_key in responses:
+            dog_stats_api.increment('comment_client.request.cached', tags=metric_tags + [u'cache:shared'])
+            if request_cache is not None:
+                request_cache[request_cache_key] = responses[response_key]
+            return copy.deepcopy(responses[response_key])
+
+    data = _perform_request(method, url, data_or_params, raw, metric_tags, paged_results)
+
+    if request_cache is not None:
+        request_cache[request_cache_key] = copy.deepcopy(data)
+    if responses is not None:
+        responses[response_key] = data
+        cache.set(_resource_cache_key(url), responses, cache_timeout)
+    return data
+
+
+def _perform_request(method, url, data_or_params, raw, metric_tags, paged_results):
+    """
+    Make a request to the comments service, see perform_request.
+    """
     headers = {
         'X-Edx-Api-Key': getattr(settings, "COMMENTS_SERVICE_KEY", None),
         'Accept-Language': get_language(),
@@ -76,7 +292,7 @@ def perform_request(method, url, data_or_params=None, raw=False,
         data = None
         params = merge_dict(data_or_params, request_id_dict)
     with request_timer(request_id, method, url, metric_tags):
-        response = requests.request(
+        response = get_session().request(
             method,
             url,
             data=data,
@@ -38,6 +38,9 @@ def run():
     if settings.FEATURES.get('ENABLE_THIRD_PARTY_AUTH', False):
         enable_third_party_auth()
 
+    if settings.FEATURES.get('ENABLE_CODE_JAIL_WORKER_POOL', False):
+        enable_code_jail_worker_pool()
+
     # Initialize Segment.io analytics module. Flushes first time a message is received and
     # every 50 messages thereafter, or if 10 seconds have passed since last flush
     if settings.FEATURES.get('SEGMENT_IO_LMS') and hasattr(settings, 'SEGMENT_IO_LMS_KEY'):
@@ -133,6 +136,15 @@ def enable_microsites():
         settings.STATICFILES_DIRS.insert(0, microsites_root)
 
 
+def enable_code_jail_worker_pool():
+    """
+    Run the sandboxed code of problems in a pool of warm workers, see
+    common/lib/capa/capa/safe_exec/pool.py.
+    """
+    from capa.safe_exec import pool
+    pool.configure(**settings.CODE_JAIL_WORKER_POOL)
+
+
 def enable_third_party_auth():
     """
     Enable the use of third_party_auth, which allows users to sign in to edX
@@ -181,6 +181,22 @@ def replace_static_urls(data_dir, block, view, frag, context, course_id=None, st
     ))
 
 
+def replace_urls(  # pylint: disable=unused-argument
+        data_dir, block, view, frag, context, course_id=None, jump_to_id_base_url=None, static_asset_path=''
+):
+    """
+    Applies replace_static_urls, replace_course_urls and replace_jump_to_id_urls
+    to the supplied fragment in a single pass over its content.
+    """
+    return wrap_fragment(frag, static_replace.replace_urls(
+        frag.content,
+        course_id,
+        jump_to_id_base_url,
+        data_directory=data_dir,
+        static_asset_path=static_asset_path
+    ))
+
+
 def grade_histogram(module_id):
     '''
     Print out a histogram of grades on a given problem in staff member debug info.